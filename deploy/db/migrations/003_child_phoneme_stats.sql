@@ -0,0 +1,12 @@
+-- Per-child phoneme proficiency (AI worker curriculum updater)
+-- Exponentially decayed count / mean / M2 per phoneme; merged by the worker
+-- with one upsert per processed submission.
+create table if not exists child_phoneme_stats(
+  child_id uuid not null,
+  phoneme text not null,
+  n double precision not null,
+  mean double precision not null,
+  m2 double precision not null,
+  updated_at timestamptz not null default now(),
+  primary key(child_id, phoneme)
+);
@@ -0,0 +1,126 @@
+"""
+Short-lived cache of per-audio analysis results
+Clients usually send the same recording to /api/transcribe and then
+/api/pronunciation; entries are keyed by the SHA-256 of the upload so the
+second request reuses the decoded PCM, transcription (with segments) and
+acoustic analysis instead of recomputing them
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+
+def audio_key(audio_bytes: bytes) -> str:
+    """
+    Cache key of an uploaded file
+    """
+    return hashlib.sha256(audio_bytes).hexdigest()
+
+
+def _entry_size(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return 1024  # transcripts/analysis dicts are small
+
+
+class AnalysisCache:
+    """
+    Thread-safe TTL + LRU cache of {field: value} per audio key
+    Bounded by entry count and by (approximate) bytes held
+    """
+
+    def __init__(self, ttl_s: float = 300.0, max_entries: int = 64, max_bytes: int = 256 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._expires.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _evict(self) -> None:
+        now = self._clock()
+        for key in [k for k, t in self._expires.items() if t <= now]:
+            self._drop(key)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+
+    def get(self, key: str, field: str) -> Optional[Any]:
+        """
+        Cached value of `field` for `key`, or None (missing or expired)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expires[key] <= self._clock():
+                if entry is not None:
+                    self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry.get(field)
+
+    def put(self, key: str, field: str, value: Any) -> None:
+        """
+        Store `field` for `key`; the entry's TTL restarts on every write
+        """
+        with self._lock:
+            entry = self._entries.setdefault(key, {})
+            previous = entry.get(field)
+            delta = _entry_size(value) - (_entry_size(previous) if previous is not None else 0)
+            entry[field] = value
+            self._sizes[key] = self._sizes.get(key, 0) + delta
+            self._bytes += delta
+            self._expires[key] = self._clock() + self.ttl_s
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def get_or_compute(self, key: str, field: str, compute: Callable[[], Any]) -> Any:
+        """
+        Cached `field` for `key`, computing it at most once across concurrent callers
+        Returns (value, cached)
+        """
+        value = self.get(key, field)
+        if value is not None:
+            self.hits += 1
+            return value, True
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                value = self.get(key, field)
+                if value is not None:
+                    self.hits += 1
+                    return value, True
+                self.misses += 1
+                value = compute()
+                self.put(key, field, value)
+                return value, False
+        finally:
+            with self._lock:
+                if not key_lock.locked():
+                    self._key_locks.pop(key, None)
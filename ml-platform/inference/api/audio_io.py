@@ -0,0 +1,86 @@
+"""
+Upload handling without extra copies
+Starlette has already spooled the multipart body into a SpooledTemporaryFile
+(memory, then disk); the size check, the cache key and the decoder all work
+on that file object directly instead of materialising the upload as bytes.
+Audio is decoded with soundfile (WAV/FLAC/OGG/MP3) and, for containers
+libsndfile can't read (m4a, webm, ...), piped through ffmpeg.
+"""
+
+import hashlib
+import io
+import logging
+import shutil
+import subprocess
+from typing import BinaryIO
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+TARGET_SR = 16000
+FFMPEG_TIMEOUT_S = 60
+_HASH_CHUNK = 1024 * 1024
+
+
+def upload_size(fileobj: BinaryIO) -> int:
+    """
+    Size of a seekable upload in bytes, without reading it
+    """
+    position = fileobj.tell()
+    size = fileobj.seek(0, 2)
+    fileobj.seek(position)
+    return size
+
+
+def file_key(fileobj: BinaryIO) -> str:
+    """
+    SHA-256 of the upload (same value as analysis_cache.audio_key of its bytes)
+    """
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    while chunk := fileobj.read(_HASH_CHUNK):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _decode_ffmpeg(fileobj: BinaryIO, sr: int) -> np.ndarray:
+    """
+    Mono float32 PCM at `sr` from ffmpeg (stdin: the upload, stdout: raw f32le)
+    """
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+               "-f", "f32le", "-ac", "1", "-ar", str(sr), "pipe:1"]
+    fileobj.seek(0)
+    # A spool still in memory is passed as a view of its buffer; once rolled
+    # over to disk (or for any real file) ffmpeg reads the descriptor itself
+    inner = getattr(fileobj, "_file", fileobj)
+    if isinstance(inner, io.BytesIO):
+        with inner.getbuffer() as data:
+            proc = subprocess.run(command, input=data, capture_output=True, timeout=FFMPEG_TIMEOUT_S, check=True)
+    else:
+        proc = subprocess.run(command, stdin=inner.fileno(), capture_output=True, timeout=FFMPEG_TIMEOUT_S,
+                              check=True)
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def decode_audio(fileobj: BinaryIO, sr: int = TARGET_SR) -> np.ndarray:
+    """
+    Decode an uploaded file object to mono float32 PCM at `sr`
+    Same result as librosa.load(file, sr=sr) for the formats libsndfile reads
+    """
+    fileobj.seek(0)
+    try:
+        audio, native_sr = sf.read(fileobj, dtype="float32", always_2d=True)
+    except sf.LibsndfileError as e:
+        if shutil.which("ffmpeg") is None:
+            raise
+        logger.info(f"soundfile could not decode upload ({e}), decoding with ffmpeg")
+        return _decode_ffmpeg(fileobj, sr)
+
+    audio = librosa.to_mono(audio.T)
+    if native_sr != sr:
+        audio = librosa.resample(audio, orig_sr=native_sr, target_sr=sr)
+    return audio
@@ -0,0 +1,97 @@
+"""
+Dynamic micro-batching for model calls
+Requests are queued and collected for up to max_wait_ms (or until max_batch
+are waiting), then processed with one call on the executor and the results
+fanned back out. Batches run one at a time, so requests that arrive while a
+batch is running form the next one.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Async front-end that turns concurrent submit() calls into batched
+    process_batch(items) -> results calls (same order, same length)
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], Sequence[Any]], max_batch: int = 8,
+                 max_wait_ms: float = 10.0, executor: Optional[Executor] = None,
+                 on_batch: Optional[Callable[[int, List[float]], None]] = None):
+        self.process_batch = process_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.on_batch = on_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            # Fresh context: the batch loop must not inherit the first caller's request context
+            self._task = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result (exceptions of the batch are re-raised)
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Callers that gave up (client disconnect, timeout) are skipped
+        return [entry for entry in batch if not entry[1].done()]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            if self.on_batch is not None:
+                self.on_batch(len(batch), [started - queued for _, _, queued in batch])
+
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, [item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Batch of {len(batch)} returned {len(results)} results")
+            except Exception as e:
+                logger.error(f"Batch of {len(batch)} failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
@@ -0,0 +1,331 @@
+"""
+Single-pass acoustic feature engine
+One STFT per clip; MFCC, spectral centroid/rolloff and piptrack pitch are
+derived from that spectrogram, RMS and ZCR from one framing of the PCM, and
+per-segment statistics are sliced out of the frame arrays by index instead
+of being recomputed per segment. With librosa's defaults (n_fft=2048,
+hop=512, centered frames) the clip-level arrays match the individual
+librosa.feature calls.
+"""
+
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Sequence
+
+import librosa
+import numpy as np
+
+N_FFT = 2048
+HOP_LENGTH = 512
+
+
+@dataclass
+class FrameFeatures:
+    """
+    Frame-level features of one clip (all arrays are per frame, hop HOP_LENGTH)
+    """
+    mfcc: np.ndarray        # (n_mfcc, frames)
+    centroid: np.ndarray    # (frames,)
+    rolloff: np.ndarray     # (frames,)
+    zcr: np.ndarray         # (frames,)
+    rms: np.ndarray         # (frames,)
+    pitch: np.ndarray       # (frames,) strongest piptrack candidate, 0 where unvoiced
+    hop_length: int = HOP_LENGTH
+
+    @property
+    def n_frames(self) -> int:
+        return self.rms.shape[0]
+
+    @property
+    def voiced_pitch(self) -> np.ndarray:
+        return self.pitch[self.pitch > 0]
+
+
+PITCH_FMIN = 150.0
+PITCH_FMAX = 4000.0
+PITCH_THRESHOLD = 0.1
+ZCR_THRESHOLD = 1e-10
+
+
+@lru_cache(maxsize=8)
+def _mel_basis(sr: int, n_fft: int) -> np.ndarray:
+    return librosa.filters.mel(sr=sr, n_fft=n_fft)
+
+
+def _rms(y: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """
+    librosa.feature.rms: zero-padded centered frames, root mean square
+    """
+    y = np.pad(y, (n_fft // 2, n_fft // 2), mode="constant")
+    frames = librosa.util.frame(y, frame_length=n_fft, hop_length=hop_length)
+    return np.sqrt(np.mean(np.abs(frames) ** 2, axis=0))
+
+
+def _zero_crossing_rate(y: np.ndarray, n_fft: int, hop_length: int) -> np.ndarray:
+    """
+    librosa.feature.zero_crossing_rate: crossings are found once over the
+    edge-padded signal and counted per frame with a cumulative sum
+    """
+    y = np.pad(y, (n_fft // 2, n_fft // 2), mode="edge")
+    # Samples within the threshold count as positive zeros
+    negative = y < -ZCR_THRESHOLD
+    crossings = np.concatenate(([0], np.cumsum(negative[1:] != negative[:-1])))
+    starts = np.arange(1 + (len(y) - n_fft) // hop_length) * hop_length
+    return (crossings[starts + n_fft - 1] - crossings[starts]) / n_fft
+
+
+def _spectral_shape(S: np.ndarray, freqs: np.ndarray, roll_percent: float = 0.85) -> tuple:
+    """
+    Spectral centroid and rolloff of a magnitude spectrogram
+    """
+    total = S.sum(axis=0)
+    norm = np.where(total > np.finfo(S.dtype).tiny, total, 1)
+    centroid = freqs.astype(S.dtype) @ S / norm
+
+    energy = np.cumsum(S, axis=0)
+    rolloff = freqs[np.argmax(energy >= roll_percent * energy[-1], axis=0)]
+    return centroid, rolloff
+
+
+def _pitch_candidates(S: np.ndarray, sr: int, n_fft: int) -> tuple:
+    """
+    Every librosa.piptrack candidate as (bins, frames, pitch, magnitude)
+
+    Same peak picking and parabolic interpolation as piptrack, evaluated only
+    on the bins inside [PITCH_FMIN, PITCH_FMAX) instead of materialising the
+    full pitch/magnitude matrices; candidates come in piptrack's row-major
+    order, so pitch equals piptrack's pitches[pitches > 0]
+    """
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    band = np.flatnonzero((PITCH_FMIN <= freqs) & (freqs < min(PITCH_FMAX, sr / 2)))
+    lo, hi = max(band[0], 1), min(band[-1] + 1, S.shape[0] - 1)
+
+    near = S[lo - 1:hi + 1]
+    thresholded = near * (near > PITCH_THRESHOLD * S.max(axis=0))
+    peak = thresholded[1:-1]
+    candidates = (peak > thresholded[:-2]) & (peak >= thresholded[2:])
+
+    # Parabolic interpolation (in float64, as librosa's stencil) at the peaks only
+    bins, frames = np.nonzero(candidates)
+    bins = bins + lo
+    center, left, right = S[bins, frames], S[bins - 1, frames], S[bins + 1, frames]
+    a = (right + left).astype(np.float64) - 2 * center.astype(np.float64)
+    b = (right - left).astype(np.float64) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(np.abs(b) >= np.abs(a), 0, -b / a).astype(S.dtype)
+
+    pitch = ((bins + shift) * float(sr) / n_fft).astype(S.dtype)
+    magnitude = center + 0.5 * ((right - left) / 2.0) * shift
+    return bins, frames, pitch, magnitude
+
+
+def _strongest_pitch(S: np.ndarray, sr: int, n_fft: int) -> np.ndarray:
+    """
+    Per-frame frequency of the strongest piptrack candidate, 0 where none
+    """
+    bins, frames, pitch, magnitude = _pitch_candidates(S, sr, n_fft)
+    if bins.size == 0:
+        return np.zeros(S.shape[1], dtype=S.dtype)
+
+    lo = bins.min()
+    dense_magnitude = np.zeros((bins.max() + 1 - lo, S.shape[1]), dtype=S.dtype)
+    dense_magnitude[bins - lo, frames] = magnitude
+    dense_pitch = np.zeros_like(dense_magnitude)
+    dense_pitch[bins - lo, frames] = pitch
+
+    strongest = dense_magnitude.argmax(axis=0)[np.newaxis, :]
+    best = np.take_along_axis(dense_pitch, strongest, axis=0)[0]
+    return np.where(np.take_along_axis(dense_magnitude, strongest, axis=0)[0] > 0, best, 0)
+
+
+def _mfcc(S: np.ndarray, sr: int, n_fft: int, n_mfcc: int) -> np.ndarray:
+    """
+    librosa.feature.mfcc from a magnitude spectrogram (power mel, dB, DCT)
+    """
+    mel = np.einsum("...ft,mf->...mt", S ** 2, _mel_basis(sr, n_fft), optimize=True)
+    return librosa.feature.mfcc(S=librosa.power_to_db(mel), n_mfcc=n_mfcc)
+
+
+def extract_frame_features(y: np.ndarray, sr: int = 16000, n_mfcc: int = 13,
+                           n_fft: int = N_FFT, hop_length: int = HOP_LENGTH) -> FrameFeatures:
+    """
+    All frame-level features of a clip from a single STFT
+    """
+    y = np.asarray(y, dtype=np.float32)
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+
+    mfcc = _mfcc(S, sr, n_fft, n_mfcc)
+    centroid, rolloff = _spectral_shape(S, librosa.fft_frequencies(sr=sr, n_fft=n_fft))
+
+    return FrameFeatures(mfcc=mfcc, centroid=centroid, rolloff=rolloff,
+                         zcr=_zero_crossing_rate(y, n_fft, hop_length), rms=_rms(y, n_fft, hop_length),
+                         pitch=_strongest_pitch(S, sr, n_fft), hop_length=hop_length)
+
+
+def segment_frames(starts: Sequence[int], ends: Sequence[int], n_frames: int,
+                   hop_length: int = HOP_LENGTH) -> tuple:
+    """
+    Frame index ranges [first, last) covering sample ranges [start, end)
+
+    A centered frame t sits at sample t * hop_length; every range keeps at
+    least one frame.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    first = np.clip(starts // hop_length, 0, max(n_frames - 1, 0))
+    last = np.clip(-(-ends // hop_length), first + 1, n_frames)
+    return first, last
+
+
+def segment_means(values: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    """
+    Mean of values[first[i]:last[i]] for every segment, via one cumulative sum
+    """
+    totals = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+    return (totals[last] - totals[first]) / (last - first)
+
+
+# Emotion model input: MFCC mean/std, pitch mean/std, RMS mean/std, centroid and rolloff means
+EMOTION_N_MFCC = 40
+EMOTION_FEATURE_DIM = 2 * EMOTION_N_MFCC + 6
+
+
+def _emotion_vector(mfcc_mean, mfcc_std, pitch_mean, pitch_std, rms_mean, rms_std,
+                    centroid_mean, rolloff_mean) -> np.ndarray:
+    return np.concatenate([
+        mfcc_mean, mfcc_std,
+        [pitch_mean, pitch_std, rms_mean, rms_std, centroid_mean, rolloff_mean],
+    ]).astype(np.float32)
+
+
+def emotion_features(y: np.ndarray, sr: int = 16000, n_fft: int = N_FFT,
+                     hop_length: int = HOP_LENGTH) -> np.ndarray:
+    """
+    The emotion model's (EMOTION_FEATURE_DIM,) clip vector from a single STFT
+
+    Pitch statistics cover every piptrack candidate (not only the strongest
+    per frame), as the model was trained with.
+    """
+    y = np.asarray(y, dtype=np.float32)
+    S = np.abs(librosa.stft(y, n_fft=n_fft, hop_length=hop_length))
+
+    mfcc = _mfcc(S, sr, n_fft, EMOTION_N_MFCC)
+    _, _, pitch, _ = _pitch_candidates(S, sr, n_fft)
+    rms = _rms(y, n_fft, hop_length)
+    centroid, rolloff = _spectral_shape(S, librosa.fft_frequencies(sr=sr, n_fft=n_fft))
+
+    return _emotion_vector(
+        np.mean(mfcc, axis=1), np.std(mfcc, axis=1),
+        np.mean(pitch) if pitch.size else 0.0, np.std(pitch) if pitch.size else 0.0,
+        np.mean(rms), np.std(rms), np.mean(centroid), np.mean(rolloff),
+    )
+
+
+def emotion_features_batch(clips: Sequence[np.ndarray], sr: int = 16000,
+                           executor: Optional[Executor] = None) -> np.ndarray:
+    """
+    (N, EMOTION_FEATURE_DIM) matrix, one emotion_features row per clip
+
+    Clips are processed on executor when one is given; the FFTs and array
+    maths release the GIL, so a thread pool extracts them in parallel.
+    """
+    if len(clips) == 0:
+        return np.zeros((0, EMOTION_FEATURE_DIM), dtype=np.float32)
+    if executor is None:
+        rows = [emotion_features(clip, sr) for clip in clips]
+    else:
+        rows = list(executor.map(emotion_features, clips, [sr] * len(clips)))
+    return np.stack(rows)
+
+
+class RunningMoments:
+    """
+    Count, mean and variance of a stream of row blocks (Chan et al. merge)
+    """
+
+    def __init__(self, dim: int):
+        self.count = 0
+        self.mean = np.zeros(dim, dtype=np.float64)
+        self._m2 = np.zeros(dim, dtype=np.float64)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.mean.shape[0])
+        n = values.shape[0]
+        if n == 0:
+            return
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self._m2 = self._m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    @property
+    def std(self) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros_like(self._m2)
+        return np.sqrt(self._m2 / self.count)
+
+    def copy(self) -> "RunningMoments":
+        other = RunningMoments(self.mean.shape[0])
+        other.count, other.mean, other._m2 = self.count, self.mean.copy(), self._m2.copy()
+        return other
+
+
+class EmotionFeatureAccumulator:
+    """
+    Emotion features of a stream: update() with chunks, features() at any point
+
+    The centre padding and the samples of incomplete frames are carried over
+    between chunks, so every frame sees exactly the samples it would in
+    emotion_features and only running moments are kept. The one difference
+    is the log-mel floor (80 dB below the loudest value), which applies per
+    chunk instead of over the whole clip.
+    """
+
+    def __init__(self, sr: int = 16000, n_fft: int = N_FFT, hop_length: int = HOP_LENGTH):
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_samples = 0
+        self._buffer = np.zeros(n_fft // 2, dtype=np.float32)
+        self._frames = RunningMoments(EMOTION_N_MFCC + 3)  # MFCCs, RMS, centroid, rolloff
+        self._pitch = RunningMoments(1)
+
+    def _consume(self, buffer: np.ndarray, frames: RunningMoments, pitches: RunningMoments) -> np.ndarray:
+        """
+        Add every complete frame of buffer to the moments, return the unconsumed tail
+        """
+        if len(buffer) < self.n_fft:
+            return buffer
+        n_frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        block = buffer[:(n_frames - 1) * self.hop_length + self.n_fft]
+
+        S = np.abs(librosa.stft(block, n_fft=self.n_fft, hop_length=self.hop_length, center=False))
+        framed = librosa.util.frame(block, frame_length=self.n_fft, hop_length=self.hop_length)
+        rms = np.sqrt(np.mean(np.abs(framed) ** 2, axis=0))
+        centroid, rolloff = _spectral_shape(S, librosa.fft_frequencies(sr=self.sr, n_fft=self.n_fft))
+        _, _, pitch, _ = _pitch_candidates(S, self.sr, self.n_fft)
+
+        frames.update(np.column_stack([_mfcc(S, self.sr, self.n_fft, EMOTION_N_MFCC).T, rms, centroid, rolloff]))
+        pitches.update(pitch)
+        return buffer[n_frames * self.hop_length:]
+
+    def update(self, chunk: np.ndarray) -> None:
+        chunk = np.asarray(chunk, dtype=np.float32).ravel()
+        self.n_samples += len(chunk)
+        self._buffer = self._consume(np.concatenate([self._buffer, chunk]), self._frames, self._pitch)
+
+    def features(self) -> np.ndarray:
+        """
+        (EMOTION_FEATURE_DIM,) vector of everything seen so far; the stream stays open
+        """
+        frames, pitches = self._frames.copy(), self._pitch.copy()
+        self._consume(np.concatenate([self._buffer, np.zeros(self.n_fft // 2, dtype=np.float32)]),
+                      frames, pitches)
+
+        n = EMOTION_N_MFCC
+        return _emotion_vector(frames.mean[:n], frames.std[:n], pitches.mean[0], pitches.std[0],
+                               frames.mean[n], frames.std[n], frames.mean[n + 1], frames.mean[n + 2])
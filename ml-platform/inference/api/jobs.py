@@ -0,0 +1,198 @@
+"""
+In-process asynchronous jobs
+Submitted jobs wait in a bounded queue and are run by a fixed number of
+worker tasks; clients poll or watch them until they finish. Finished jobs
+(with their results) are kept for retention_s, then dropped. A full queue is
+reported to the caller (JobQueueFull) so the API can shed load with a 503
+instead of accepting work it cannot get to.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when max_queued jobs are already waiting"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Any = field(repr=False)
+    created_at: float
+    status: str = QUEUED
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = field(default=None, repr=False)
+    error: Optional[str] = None
+    version: int = 0
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded queue + worker pool for handler(job) -> result coroutines
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[Any]], workers: int = 1, max_queued: int = 16,
+                 retention_s: float = 900.0, max_retained: int = 1000,
+                 clock: Callable[[], float] = time.time):
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.retention_s = retention_s
+        self.max_retained = max_retained
+        self._clock = clock
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self.running = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self) -> None:
+        self._queue = self._queue or asyncio.Queue()
+        self._tasks = [t for t in self._tasks if not t.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._tasks) < self.workers:
+            # Fresh context: workers must not inherit the submitting request's context
+            self._tasks.append(loop.create_task(self._worker(), context=contextvars.Context()))
+
+    def _update(self, job: Job, status: str, **changes) -> None:
+        job.status = status
+        for name, value in changes.items():
+            setattr(job, name, value)
+        if job.done:
+            job.finished_at = self._clock()
+            self._release(job)
+        job.version += 1
+        # Wake every watcher, later watchers wait on a fresh event
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+
+    @staticmethod
+    def _release(job: Job) -> None:
+        close = getattr(job.payload, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Could not release payload of job {job.id}: {e}")
+        job.payload = None
+
+    def _prune(self) -> None:
+        now = self._clock()
+        finished = [job for job in self._jobs.values() if job.done]
+        expired = {job.id for job in finished if job.finished_at + self.retention_s <= now}
+        overflow = len(finished) - len(expired) - self.max_retained
+        if overflow > 0:
+            remaining = sorted((job for job in finished if job.id not in expired), key=lambda j: j.finished_at)
+            expired.update(job.id for job in remaining[:overflow])
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, kind: str, payload: Any) -> Job:
+        """
+        Queue a job; raises JobQueueFull when max_queued jobs are already waiting
+        """
+        self._ensure_started()
+        self._prune()
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs already queued")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload, created_at=self._clock())
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job (finished jobs are returned unchanged)
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        if job._task is not None:
+            job._task.cancel()  # the worker records the cancellation
+        else:
+            self._update(job, CANCELLED)
+        return job
+
+    async def watch(self, job: Job, keepalive_s: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the job's state on every change until it finishes
+        (None every keepalive_s while nothing changes)
+        """
+        version = -1
+        while True:
+            if job.version != version:
+                version = job.version
+                yield job.to_dict()
+                if job.done:
+                    return
+            try:
+                await asyncio.wait_for(job._changed.wait(), keepalive_s)
+            except asyncio.TimeoutError:
+                yield None
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.status != QUEUED:
+                continue  # cancelled while waiting
+
+            self.running += 1
+            job._task = asyncio.get_running_loop().create_task(self.handler(job))
+            self._update(job, RUNNING, started_at=self._clock())
+            try:
+                result = await asyncio.shield(job._task)
+                self._update(job, SUCCEEDED, result=result)
+            except asyncio.CancelledError:
+                if not job._task.cancelled():
+                    raise  # the worker itself is being cancelled
+                self._update(job, CANCELLED)
+            except Exception as e:
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+                self._update(job, FAILED, error=str(e))
+            finally:
+                job._task = None
+                self.running -= 1
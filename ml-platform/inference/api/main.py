@@ -1,18 +1,34 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Security, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import APIKeyHeader
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-import whisper
-import torch
+from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import contextvars
 import numpy as np
-import librosa
 from scipy.stats import skew, kurtosis
 from pydantic import BaseModel
+from models_onnx import ModelFactory
+from registry import model_cache
+from analysis_cache import AnalysisCache
+from audio_io import decode_audio, file_key, upload_size
+from batching import BatchScheduler
+from features import extract_frame_features, segment_frames, segment_means
+from segmentation import word_spans
+from jobs import Job, JobManager, JobQueueFull
+from profiling import SlowRequestProfiler
+import asyncio
 import logging
+import time
 import os
-import io
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Optional
+import json
+import shutil
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,6 +39,36 @@ limiter = Limiter(key_func=get_remote_address)
 # Security configuration
 API_KEY = os.getenv("ML_API_KEY", "HearLoveen2024!MLApiKey")
 MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", 10485760))  # 10MB default
+MULTIPART_OVERHEAD = 64 * 1024  # form boundaries/headers allowed on top of the file itself
+
+# Model configuration
+STT_BACKEND = os.getenv("STT_BACKEND", "auto")  # onnx | torch | auto (ONNX if exported)
+MODELS_DIR = os.getenv("MODELS_DIR", "./models")
+WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")
+WHISPER_TIMESTAMPS = os.getenv("WHISPER_TIMESTAMPS", "1") == "1"  # ONNX: decode timestamp tokens (timed segments for word spans)
+WHISPER_QUANTIZATION = os.getenv("WHISPER_QUANTIZATION") or None  # int8: serve the INT8 encoder (fails if not exported)
+MODEL_CACHE_MB = int(os.getenv("MODEL_CACHE_MB", 2048))  # loaded models kept (LRU) within this budget
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))  # threads running model calls
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", 32))  # running + queued, then 503
+
+# Micro-batching of transcriptions: wait up to BATCH_MAX_WAIT_MS for up to BATCH_MAX_SIZE clips
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 8))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 10))
+RATE_LIMIT = os.getenv("RATE_LIMIT", "60/minute")  # per client
+
+# Asynchronous jobs (/api/jobs): long analyses run in the background, polled or watched over SSE
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 1))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", 16))  # further submissions get 503
+JOB_RETENTION_S = float(os.getenv("JOB_RETENTION_S", 900))  # finished jobs (and results) kept this long
+
+# Slow-request profiler: requests slower than SLOW_REQUEST_MS get a stage-by-stage JSON dump (0 = off)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))
+SLOW_REQUEST_DUMP_DIR = os.getenv("SLOW_REQUEST_DUMP_DIR", "/tmp/ml-slow-requests")
+
+# Per-audio analysis reuse between /api/transcribe, /api/pronunciation and /api/analyze
+ANALYSIS_CACHE_TTL_S = float(os.getenv("ANALYSIS_CACHE_TTL_S", 300))
+ANALYSIS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", 64))
+ANALYSIS_CACHE_MAX_MB = int(os.getenv("ANALYSIS_CACHE_MAX_MB", 256))
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -42,7 +88,7 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,  # Restricted to specific origins
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],  # Only necessary methods
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],  # Only necessary methods (DELETE: job cancellation)
     allow_headers=["Content-Type", "Authorization", "Accept", "X-API-Key"],  # Specific headers
     max_age=3600,  # Cache preflight requests for 1 hour
 )
@@ -60,61 +106,288 @@ async def verify_api_key(api_key: str = Security(api_key_header)):
 
 # File size validation
 async def validate_file_size(file: UploadFile):
-    """Validate uploaded file size"""
-    # Read file in chunks to avoid memory issues
-    size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-
-    while chunk := await file.read(chunk_size):
-        size += len(chunk)
-        if size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413,
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"
-            )
-
-    # Reset file pointer
-    await file.seek(0)
+    """Validate uploaded file size (from the spooled upload, without reading it)"""
+    size = file.size if file.size is not None else upload_size(file.file)
+    if size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"
+        )
     return size
 
-# Load Whisper model (fine-tuned version)
-logger.info("Loading Whisper model...")
-model = whisper.load_model("base")
-logger.info("Model loaded successfully")
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    """Refuse bodies declared larger than the cap before they are spooled"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"File too large. Maximum size is {MAX_FILE_SIZE / 1024 / 1024}MB"}
+        )
+    return await call_next(request)
+
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    """Request counters, latency and in-flight gauge per route; slow-request profiles"""
+    started = time.perf_counter()
+    trace = profiler.begin()
+    status = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUESTS.labels(endpoint, request.method, str(status)).inc()
+        REQUEST_LATENCY.labels(endpoint).observe(elapsed)
+        info = {"endpoint": endpoint, "method": request.method, "status": status,
+                "inference_pending": inference_pending, "batch_queue_depth": transcription_batcher.queue_depth}
+        if profiler.end(trace, started, elapsed, info) is not None:
+            SLOW_REQUESTS.labels(endpoint).inc()
+
+# Load speech-to-text model (ONNX export or PyTorch Whisper)
+logger.info(f"Loading Whisper {WHISPER_MODEL_SIZE} model (backend: {STT_BACKEND})...")
+MODEL_LOAD_SECONDS = Gauge("ml_model_load_seconds", "Model load time at startup", ["model", "backend"])
+load_start = time.perf_counter()
+model_cache.max_bytes = MODEL_CACHE_MB * 1024 * 1024
+stt_model = ModelFactory.create_speech_to_text(MODELS_DIR, backend=STT_BACKEND, model_size=WHISPER_MODEL_SIZE,
+                                               quantization=WHISPER_QUANTIZATION, timestamps=WHISPER_TIMESTAMPS)
+MODEL_LOAD_SECONDS.labels("speech_to_text", stt_model.backend).set(time.perf_counter() - load_start)
+logger.info(f"Model loaded successfully (backend: {stt_model.backend}, {time.perf_counter() - load_start:.1f}s)")
+
+# Model calls block for seconds: run them on a bounded pool, off the event loop
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+inference_pending = 0
+
+# Decoded PCM, transcription (with segments) and acoustic analysis per upload
+analysis_cache = AnalysisCache(
+    ttl_s=ANALYSIS_CACHE_TTL_S,
+    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+    max_bytes=ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+)
+
+# Metrics
+INFERENCE_LATENCY = Histogram(
+    "ml_inference_latency_seconds", "Audio decode + model inference time per request",
+    ["endpoint", "backend"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+)
+INFERENCE_PENDING = Gauge("ml_inference_pending", "Inference calls running or queued")
+REQUESTS = Counter("ml_requests_total", "HTTP requests", ["endpoint", "method", "status"])
+REQUEST_LATENCY = Histogram(
+    "ml_request_latency_seconds", "HTTP request time (until the response starts)",
+    ["endpoint"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+)
+REQUESTS_IN_FLIGHT = Gauge("ml_requests_in_flight", "HTTP requests being handled")
+STAGE_LATENCY = Histogram(
+    "ml_stage_latency_seconds", "Pipeline stage time: decode, transcribe, feature, score",
+    ["stage"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16)
+)
+SLOW_REQUESTS = Counter("ml_slow_requests_total", "Requests slower than SLOW_REQUEST_MS", ["endpoint"])
+
+profiler = SlowRequestProfiler(threshold_ms=SLOW_REQUEST_MS, dump_dir=SLOW_REQUEST_DUMP_DIR)
+
+def observe_stage(name: str, started: float):
+    """Record a pipeline stage that began at `started` (perf_counter)"""
+    elapsed = time.perf_counter() - started
+    STAGE_LATENCY.labels(name).observe(elapsed)
+    profiler.record(name, started, elapsed)
+
+@contextmanager
+def stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, started)
+BATCH_SIZE = Histogram(
+    "ml_batch_size", "Clips per batched transcription call",
+    buckets=(1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+)
+BATCH_QUEUE_WAIT = Histogram(
+    "ml_batch_queue_wait_seconds", "Time a clip waits in the batching queue",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+def record_batch(size: int, queue_waits: list):
+    BATCH_SIZE.observe(size)
+    for wait in queue_waits:
+        BATCH_QUEUE_WAIT.observe(wait)
+
+# One encoder/decoder pass per batch of concurrent transcriptions
+transcription_batcher = BatchScheduler(
+    lambda audios: stt_model.transcribe_batch(audios, 16000),
+    max_batch=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    executor=inference_executor,
+    on_batch=record_batch
+)
+Gauge("ml_batch_queue_depth", "Clips waiting for the next batch").set_function(lambda: transcription_batcher.queue_depth)
+
+# Transcriptions in flight per upload key: identical concurrent requests await the same batched result
+pending_transcriptions: dict = {}
 
 class TranscriptionResponse(BaseModel):
     text: str
     confidence: float
     language: str
     duration: float
+    backend: str
+    latency_ms: float
+    cached: bool = False
 
 class PronunciationResponse(BaseModel):
     score: float
     phonemes: list[dict]
     overall_quality: str
+    backend: str
+    latency_ms: float
+    cached: bool = False
+
+class AnalysisResponse(BaseModel):
+    text: str
+    confidence: float
+    language: str
+    duration: float
+    score: float
+    phonemes: list[dict]
+    overall_quality: str
+    backend: str
+    latency_ms: float
+    cached: bool = False
+
+class JobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued | running | succeeded | failed | cancelled
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[AnalysisResponse] = None
+    error: Optional[str] = None
+
+class ModelInfo(BaseModel):
+    name: str
+    version: str
+    kind: str
+    path: str
+    sha256: Optional[str] = None
+    inputs: dict
+    quantization: Optional[str] = None
+    files: list[str]
+    files_sha256: dict = {}
+    loaded: bool
 
 # Helper functions
-def calculate_confidence_from_segments(segments):
-    """Calculate average confidence from Whisper segments"""
-    if not segments:
-        return 0.0
-
-    # Whisper provides log probabilities, convert to confidence
-    total_confidence = 0.0
-    total_tokens = 0
-
-    for segment in segments:
-        # Average token probabilities in segment
-        if "avg_logprob" in segment:
-            # Convert log probability to confidence (0-1)
-            confidence = np.exp(segment["avg_logprob"])
-            tokens = len(segment.get("tokens", [1]))
-            total_confidence += confidence * tokens
-            total_tokens += tokens
-
-    return total_confidence / total_tokens if total_tokens > 0 else 0.0
-
-def analyze_phoneme_quality(audio_data, transcription):
+async def run_inference(endpoint: str, pipeline, *args):
+    """
+    Run an analysis pipeline (coroutine function) with admission control
+    Returns (result, latency in ms); 503 when INFERENCE_MAX_PENDING requests are in flight
+    """
+    global inference_pending
+    if inference_pending >= INFERENCE_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Inference queue is full, retry later")
+
+    inference_pending += 1
+    INFERENCE_PENDING.set(inference_pending)
+    start = time.perf_counter()
+    try:
+        result = await pipeline(*args)
+    finally:
+        inference_pending -= 1
+        INFERENCE_PENDING.set(inference_pending)
+
+    latency = time.perf_counter() - start
+    INFERENCE_LATENCY.labels(endpoint, stt_model.backend).observe(latency)
+    return result, latency * 1000
+
+async def in_executor(fn, *args):
+    """Run blocking work (decoding, acoustic analysis) on the inference executor"""
+    # Carry the request context over so stage timings reach its profile
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(inference_executor, context.run, fn, *args)
+
+def decode_upload(upload: BinaryIO) -> np.ndarray:
+    with stage("decode"):
+        return decode_audio(upload)
+
+async def transcribe_once(key: str, audio: np.ndarray) -> tuple:
+    """
+    Transcription of an upload: cached, already in flight for a concurrent
+    request with the same upload, or submitted to the batcher now
+    Returns (result, reused)
+    """
+    result = analysis_cache.get(key, "transcription")
+    if result is not None:
+        return result, True
+    task = pending_transcriptions.get(key)
+    reused = task is not None
+    if task is None:
+        # Not tied to this request: cancelling one caller must not cancel the others
+        task = asyncio.ensure_future(transcription_batcher.submit(audio))
+        pending_transcriptions[key] = task
+
+        def settle(done: asyncio.Future):
+            pending_transcriptions.pop(key, None)
+            if not done.cancelled() and done.exception() is None:
+                analysis_cache.put(key, "transcription", done.result())
+
+        task.add_done_callback(settle)
+    return await asyncio.shield(task), reused
+
+async def analyze_audio(upload: BinaryIO, with_phonemes: bool = True) -> dict:
+    """
+    Decode the spooled upload, transcribe (micro-batched with concurrent
+    requests) and optionally run the acoustic analysis, reusing whatever an
+    earlier request cached for the same upload
+    Returns {audio, transcription, phonemes, cached}
+    """
+    key = await in_executor(file_key, upload)
+    audio, _ = await in_executor(analysis_cache.get_or_compute, key, "audio", lambda: decode_upload(upload))
+    with stage("transcribe"):
+        result, result_cached = await transcribe_once(key, audio)
+    phonemes = None
+    if with_phonemes:
+        phonemes, _ = await in_executor(
+            analysis_cache.get_or_compute, key, "phonemes",
+            lambda: analyze_phoneme_quality(audio, result["text"].strip(), word_timings=result.get("words"),
+                                            segments=result.get("segments"))
+        )
+    return {
+        "audio": audio,
+        "transcription": result,
+        "phonemes": phonemes,
+        "cached": result_cached  # transcription reused from an earlier request
+    }
+
+def score_pronunciation(phonemes: list, confidence: float) -> tuple:
+    """Overall score and quality label from word scores and transcription confidence"""
+    # Calculate overall score
+    if phonemes:
+        phoneme_scores = [p["score"] for p in phonemes]
+        overall_score = sum(phoneme_scores) / len(phoneme_scores)
+    else:
+        overall_score = confidence
+
+    # Weight by transcription confidence
+    final_score = (overall_score * 0.7) + (confidence * 0.3)
+
+    # Determine quality level
+    if final_score >= 0.85:
+        quality = "Excellent"
+    elif final_score >= 0.75:
+        quality = "Good"
+    elif final_score >= 0.60:
+        quality = "Fair - Practice recommended"
+    else:
+        quality = "Needs significant practice"
+
+    return final_score, quality
+
+def analyze_phoneme_quality(y, transcription, sr=16000, word_timings=None, segments=None):
     """
     Analyze phoneme-level pronunciation quality using real acoustic features
 
@@ -124,36 +397,28 @@ def analyze_phoneme_quality(audio_data, transcription):
     - Temporal features (duration, rhythm)
 
     This provides a real acoustic analysis instead of random numbers
+
+    Args:
+        y: Decoded mono PCM (float32)
+        transcription: Recognized text
+        sr: Sample rate of y
+        word_timings: Recognizer word timestamps [{"word", "start", "end"}] (seconds)
+        segments: Recognizer timed segments [{"start", "end", "text"}] (seconds); without
+            word timings, words are spread over their segment, or without either over
+            the voiced part of the clip (each word's "timing" says which)
     """
     phonemes = []
     words = transcription.split()
 
     try:
-        # Load audio with librosa
-        y, sr = librosa.load(io.BytesIO(audio_data), sr=16000)
-
-        # Extract global features
-        # 1. MFCC (Mel-frequency cepstral coefficients)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        mfcc_mean = np.mean(mfcc, axis=1)
-        mfcc_std = np.std(mfcc, axis=1)
-
-        # 2. Spectral features
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-
-        # 3. Prosodic features
-        zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
-        rms_energy = librosa.feature.rms(y=y)[0]
-
-        # 4. Pitch (F0) extraction
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_values = []
-        for t in range(pitches.shape[1]):
-            index = magnitudes[:, t].argmax()
-            pitch = pitches[index, t]
-            if pitch > 0:
-                pitch_values.append(pitch)
+        # Extract all frame-level features from one STFT of the clip
+        with stage("feature"):
+            features = extract_frame_features(y, sr)
+        score_start = time.perf_counter()
+        mfcc_std = np.std(features.mfcc, axis=1)
+        spectral_centroids = features.centroid
+        rms_energy = features.rms
+        pitch_values = features.voiced_pitch
 
         # Calculate quality metrics
         # Higher spectral centroid = clearer articulation
@@ -179,23 +444,25 @@ def analyze_phoneme_quality(audio_data, transcription):
             mfcc_quality * 0.25
         )
 
-        # Segment audio approximately by words
-        num_words = len(words)
-        if num_words > 0:
-            # Simple equal segmentation (in production, use forced alignment)
-            segment_length = len(y) // num_words
-
-            for i, word in enumerate(words[:10]):  # Limit to 10 words
-                # Extract segment
-                start = i * segment_length
-                end = min((i + 1) * segment_length, len(y))
-                segment = y[start:end]
-
-                if len(segment) > 0:
-                    # Calculate segment-specific features
-                    seg_energy = np.mean(librosa.feature.rms(y=segment))
-                    seg_zcr = np.mean(librosa.feature.zero_crossing_rate(segment))
-                    seg_centroid = np.mean(librosa.feature.spectral_centroid(y=segment, sr=sr))
+        # Segment audio by word boundaries (recognizer word timestamps when available)
+        spans = word_spans(transcription, len(y), sr, word_timings=word_timings,
+                           rms=features.rms, hop_length=features.hop_length, segments=segments)
+        if spans:
+            words = [word for word, _, _, _ in spans]
+            starts = np.array([start for _, start, _, _ in spans])
+            ends = np.array([end for _, _, end, _ in spans])
+
+            # Per-word statistics are slices of the clip's frames
+            first, last = segment_frames(starts, ends, features.n_frames, features.hop_length)
+            seg_energies = segment_means(features.rms, first, last)
+            seg_zcrs = segment_means(features.zcr, first, last)
+            seg_centroids = segment_means(features.centroid, first, last)
+
+            for i, word in enumerate(words):
+                if ends[i] > starts[i]:
+                    seg_energy = seg_energies[i]
+                    seg_zcr = seg_zcrs[i]
+                    seg_centroid = seg_centroids[i]
 
                     # Normalize features
                     energy_norm = min(1.0, seg_energy / 0.1)
@@ -229,15 +496,19 @@ def analyze_phoneme_quality(audio_data, transcription):
                             "energy": round(float(seg_energy), 3),
                             "clarity": round(float(centroid_norm), 2),
                             "articulation": round(float(zcr_norm), 2)
-                        }
+                        },
+                        "start": round(float(starts[i]) / sr, 2),
+                        "end": round(float(ends[i]) / sr, 2),
+                        "timing": spans[i][3]  # aligned | segment | estimated
                     })
 
+        observe_stage("score", score_start)
         logger.info(f"Acoustic analysis completed for {len(phonemes)} words")
 
     except Exception as e:
         logger.error(f"Error in acoustic analysis: {str(e)}")
         # Fallback to basic analysis if acoustic processing fails
-        for word in words[:5]:
+        for word in words:
             phonemes.append({
                 "word": word,
                 "phoneme": word[:2].upper() if len(word) >= 2 else word.upper(),
@@ -248,12 +519,74 @@ def analyze_phoneme_quality(audio_data, transcription):
 
     return phonemes
 
+def analysis_response(analysis: dict, latency_ms: float) -> AnalysisResponse:
+    """Combined transcription + pronunciation response from analyze_audio() output"""
+    result = analysis["transcription"]
+    final_score, quality = score_pronunciation(analysis["phonemes"], result["confidence"])
+    return AnalysisResponse(
+        text=result["text"],
+        confidence=round(result["confidence"], 3),
+        language=result.get("language", "en"),
+        duration=result.get("duration", 0.0),
+        score=round(final_score, 2),
+        phonemes=analysis["phonemes"],
+        overall_quality=quality,
+        backend=stt_model.backend,
+        latency_ms=round(latency_ms, 1),
+        cached=analysis["cached"]
+    )
+
+async def run_analysis_job(job: Job) -> dict:
+    """Job handler: full analysis of the upload copied into job.payload"""
+    start = time.perf_counter()
+    analysis = await analyze_audio(job.payload)
+    latency = time.perf_counter() - start
+    INFERENCE_LATENCY.labels("jobs", stt_model.backend).observe(latency)
+    logger.info(f"Job {job.id} analyzed in {latency * 1000:.0f} ms")
+    return analysis_response(analysis, latency * 1000).model_dump()
+
+# Background analyses with a bounded queue; the queue, not the request, absorbs long recordings
+job_manager = JobManager(
+    run_analysis_job,
+    workers=JOB_WORKERS,
+    max_queued=JOB_MAX_QUEUED,
+    retention_s=JOB_RETENTION_S
+)
+Gauge("ml_jobs_queued", "Analysis jobs waiting for a worker").set_function(lambda: job_manager.queue_depth)
+Gauge("ml_jobs_running", "Analysis jobs being processed").set_function(lambda: job_manager.running)
+
+def copy_upload(source: BinaryIO) -> SpooledTemporaryFile:
+    """Copy of an upload that outlives the request (Starlette closes the original)"""
+    spool = SpooledTemporaryFile(max_size=1024 * 1024)
+    source.seek(0)
+    shutil.copyfileobj(source, spool)
+    spool.seek(0)
+    return spool
+
+def get_job_or_404(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (unknown or expired)")
+    return job
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model": "whisper-base"}
+    return {"status": "healthy", "model": f"whisper-{WHISPER_MODEL_SIZE}", "backend": stt_model.backend}
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/api/models", response_model=list[ModelInfo])
+async def list_models(api_key: str = Security(verify_api_key)):
+    """
+    Models in the registry of MODELS_DIR and whether each is loaded
+    Requires API key authentication
+    """
+    return [ModelInfo(**entry) for entry in ModelFactory.registry(MODELS_DIR).describe()]
 
 @app.post("/api/transcribe", response_model=TranscriptionResponse)
-@limiter.limit("10/minute")  # Rate limit: 10 requests per minute
+@limiter.limit(RATE_LIMIT)  # Rate limit per client
 async def transcribe_audio(
     request: Request,
     file: UploadFile = File(...),
@@ -262,7 +595,7 @@ async def transcribe_audio(
     """
     Transcribe audio using Whisper model
     Requires API key authentication
-    Rate limited to 10 requests per minute
+    Rate limited per client (RATE_LIMIT)
     """
     try:
         # Validate file size
@@ -270,34 +603,31 @@ async def transcribe_audio(
 
         logger.info(f"Transcribing file: {file.filename}")
 
-        # Save uploaded file temporarily
-        audio_bytes = await file.read()
-
-        # Process with Whisper (returns segments with probabilities)
-        result = model.transcribe(
-            audio_bytes,
-            language="en",  # Optimize for English
-            task="transcribe",
-            verbose=False
-        )
-
-        # Calculate actual confidence from segments
-        confidence = calculate_confidence_from_segments(result.get("segments", []))
+        # Decode + transcribe off the event loop (confidence from token log-probs)
+        analysis, latency_ms = await run_inference("transcribe", analyze_audio, file.file, False)
+        result = analysis["transcription"]
+        confidence = result["confidence"]
 
-        logger.info(f"Transcription completed: {result['text'][:50]}... (confidence: {confidence:.2f})")
+        logger.info(f"Transcription completed: {result['text'][:50]}... (confidence: {confidence:.2f}, "
+                    f"{stt_model.backend}, {latency_ms:.0f} ms)")
 
         return TranscriptionResponse(
             text=result["text"],
             confidence=round(confidence, 3),
             language=result.get("language", "en"),
-            duration=result.get("duration", 0.0)
+            duration=result.get("duration", 0.0),
+            backend=stt_model.backend,
+            latency_ms=round(latency_ms, 1),
+            cached=analysis["cached"]
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/pronunciation", response_model=PronunciationResponse)
-@limiter.limit("10/minute")  # Rate limit: 10 requests per minute
+@limiter.limit(RATE_LIMIT)  # Rate limit per client
 async def analyze_pronunciation(
     request: Request,
     file: UploadFile = File(...),
@@ -307,7 +637,7 @@ async def analyze_pronunciation(
     """
     Analyze pronunciation quality
     Requires API key authentication
-    Rate limited to 10 requests per minute
+    Rate limited per client (RATE_LIMIT)
 
     Args:
         file: Audio file to analyze
@@ -328,54 +658,114 @@ async def analyze_pronunciation(
 
         logger.info(f"Analyzing pronunciation: {file.filename}")
 
-        # Read audio
-        audio_bytes = await file.read()
-
-        # First, transcribe to get the spoken text
-        result = model.transcribe(
-            audio_bytes,
-            language="en",
-            task="transcribe",
-            verbose=False
-        )
-
-        transcription = result["text"].strip()
-        confidence = calculate_confidence_from_segments(result.get("segments", []))
-
-        # Analyze phoneme quality
-        phonemes = analyze_phoneme_quality(audio_bytes, transcription)
-
-        # Calculate overall score
-        if phonemes:
-            phoneme_scores = [p["score"] for p in phonemes]
-            overall_score = sum(phoneme_scores) / len(phoneme_scores)
-        else:
-            overall_score = confidence
-
-        # Weight by transcription confidence
-        final_score = (overall_score * 0.7) + (confidence * 0.3)
-
-        # Determine quality level
-        if final_score >= 0.85:
-            quality = "Excellent"
-        elif final_score >= 0.75:
-            quality = "Good"
-        elif final_score >= 0.60:
-            quality = "Fair - Practice recommended"
-        else:
-            quality = "Needs significant practice"
+        # Transcribe to get the spoken text (reused if already transcribed), then analyze phoneme quality
+        analysis, latency_ms = await run_inference("pronunciation", analyze_audio, file.file)
+        phonemes = analysis["phonemes"]
+        final_score, quality = score_pronunciation(phonemes, analysis["transcription"]["confidence"])
 
         logger.info(f"Pronunciation analysis complete: score={final_score:.2f}, quality={quality}")
 
         return PronunciationResponse(
             score=round(final_score, 2),
             phonemes=phonemes,
-            overall_quality=quality
+            overall_quality=quality,
+            backend=stt_model.backend,
+            latency_ms=round(latency_ms, 1),
+            cached=analysis["cached"]
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Pronunciation analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/analyze", response_model=AnalysisResponse)
+@limiter.limit(RATE_LIMIT)  # Rate limit per client
+async def analyze(
+    request: Request,
+    file: UploadFile = File(...),
+    api_key: str = Security(verify_api_key)
+):
+    """
+    Transcription and pronunciation analysis in one pass
+    Requires API key authentication
+    Rate limited per client (RATE_LIMIT)
+    """
+    try:
+        # Validate file size
+        await validate_file_size(file)
+
+        logger.info(f"Analyzing: {file.filename}")
+
+        analysis, latency_ms = await run_inference("analyze", analyze_audio, file.file)
+        return analysis_response(analysis, latency_ms)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/jobs", response_model=JobResponse, status_code=202)
+@limiter.limit(RATE_LIMIT)  # Rate limit per client
+async def submit_job(
+    request: Request,
+    file: UploadFile = File(...),
+    api_key: str = Security(verify_api_key)
+):
+    """
+    Queue a transcription + pronunciation analysis and return its job id
+    Poll GET /api/jobs/{job_id} or watch GET /api/jobs/{job_id}/events (SSE)
+    Requires API key authentication
+    Rate limited per client (RATE_LIMIT); 503 when JOB_MAX_QUEUED jobs are waiting
+    """
+    await validate_file_size(file)
+
+    spool = await asyncio.get_running_loop().run_in_executor(None, copy_upload, file.file)
+    try:
+        job = job_manager.submit("analyze", spool)
+    except JobQueueFull:
+        spool.close()
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later", headers={"Retry-After": "30"})
+
+    logger.info(f"Queued job {job.id} for {file.filename}")
+    return JobResponse(**job.to_dict())
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, api_key: str = Security(verify_api_key)):
+    """
+    Status of a job, with the analysis once it has succeeded
+    Requires API key authentication
+    """
+    return JobResponse(**get_job_or_404(job_id).to_dict())
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str, api_key: str = Security(verify_api_key)):
+    """
+    Server-sent events: one `status` event per state change, ending with the final state
+    Requires API key authentication
+    """
+    job = get_job_or_404(job_id)
+
+    async def stream():
+        async for state in job_manager.watch(job):
+            if state is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {json.dumps(JobResponse(**state).model_dump())}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.delete("/api/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, api_key: str = Security(verify_api_key)):
+    """
+    Cancel a queued or running job (finished jobs are returned as they are)
+    A running job reports `cancelled` once its worker has stopped it
+    Requires API key authentication
+    """
+    get_job_or_404(job_id)
+    return JobResponse(**job_manager.cancel(job_id).to_dict())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -5,21 +5,322 @@ This module provides production-ready ML inference using ONNX models
 
 import onnxruntime as ort
 import numpy as np
-import torch
-import torchaudio
-from typing import Dict, Any, Optional
+from concurrent.futures import Executor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import base64
+import json
 import logging
+import threading
 from pathlib import Path
 
+from registry import EMOTION, SPEECH_TO_TEXT, ModelRegistry
+
 logger = logging.getLogger(__name__)
 
+# Whisper mel frames (10 ms hop): 30 s window and the pad buckets used when the
+# encoder was exported with a dynamic time axis. Buckets must be even (the
+# second encoder conv has stride 2).
+WHISPER_MAX_FRAMES = 3000
+DEFAULT_FRAME_BUCKETS = (500, 1000, 1500, 2000, 3000)
+
+# Timestamp tokens are 20 ms apart; the first one may be at most 1 s into the window
+WHISPER_TIMESTAMP_S = 0.02
+WHISPER_MAX_INITIAL_TIMESTAMP_S = 1.0
+
+
+STT_BACKENDS = ('onnx', 'torch', 'auto')
+
+
+def calculate_confidence_from_segments(segments):
+    """Calculate average confidence from Whisper segments"""
+    if not segments:
+        return 0.0
+
+    # Whisper provides log probabilities, convert to confidence
+    total_confidence = 0.0
+    total_tokens = 0
+
+    for segment in segments:
+        # Average token probabilities in segment
+        if "avg_logprob" in segment:
+            # Convert log probability to confidence (0-1)
+            confidence = np.exp(segment["avg_logprob"])
+            tokens = len(segment.get("tokens", [1]))
+            total_confidence += confidence * tokens
+            total_tokens += tokens
+
+    return total_confidence / total_tokens if total_tokens > 0 else 0.0
+
+
+def bucket_frames(n_frames: int, buckets: Sequence[int]) -> int:
+    """
+    Smallest bucket that holds n_frames (the largest bucket if none does)
+    """
+    for bucket in buckets:
+        if n_frames <= bucket:
+            return bucket
+    return buckets[-1]
+
+
+def whisper_decoder_files(encoder_path: Path) -> List[Path]:
+    """
+    Decoder export next to an encoder (whisper_<size>[.int8].onnx):
+    whisper_<size>_decoder.onnx, whisper_<size>_cross_kv.onnx, whisper_<size>_decoder.json
+    """
+    prefix = encoder_path.name.split('.')[0]
+    return [encoder_path.with_name(f"{prefix}_{suffix}") for suffix in ('decoder.onnx', 'cross_kv.onnx', 'decoder.json')]
+
+
+class ONNXWhisperDecoder:
+    """
+    Incremental Whisper decoder over the ONNX decoder export
+    Cross-attention K/V are computed once per clip; self-attention K/V are
+    carried between steps as OrtValues through I/O binding, so the greedy
+    path never copies the cache back to numpy
+    timestamps: sample Whisper's timestamp tokens (with its timestamp rules)
+    so the output can be split into timed segments (see segments())
+    """
+
+    def __init__(self, decoder_path: Path, cross_kv_path: Path, config_path: Path,
+                 sess_options: ort.SessionOptions, providers: List[str],
+                 language: str = 'en', beam_size: int = 1, max_tokens: Optional[int] = None,
+                 timestamps: bool = False):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = json.load(f)
+
+        self.session = ort.InferenceSession(str(decoder_path), sess_options, providers=providers)
+        self.cross_kv_session = ort.InferenceSession(str(cross_kv_path), sess_options, providers=providers)
+        self.device = 'cuda' if 'CUDAExecutionProvider' in self.session.get_providers() else 'cpu'
+
+        tokens = self.config['tokens']
+        self.eot = tokens['eot']
+        self.vocab = [base64.b64decode(t) for t in self.config['vocab']]
+        self.beam_size = max(1, int(beam_size))
+        self.max_tokens = max_tokens or self.config['n_text_ctx'] // 2
+
+        self.timestamp_begin = tokens.get('timestamp_begin')
+        self.timestamps = bool(timestamps) and self.timestamp_begin is not None
+
+        self.language = language
+        if self.config['multilingual']:
+            if language not in self.config['language_tokens']:
+                raise ValueError(f"Unsupported language: {language}")
+            self.sot_sequence = [tokens['sot'], self.config['language_tokens'][language], tokens['transcribe']]
+        else:
+            self.language = 'en'
+            self.sot_sequence = [tokens['sot']]
+        if not self.timestamps:
+            self.sot_sequence.append(tokens['no_timestamps'])
+
+        # Special (and, without timestamps, timestamp) and non-speech tokens are
+        # never sampled; blanks and end-of-text are also suppressed for the first
+        # token, which with timestamps must be a timestamp of at most 1 s
+        suppress = np.zeros(self.config['n_vocab'], dtype=bool)
+        suppress[self.eot + 1:] = True
+        if self.timestamps:
+            suppress[self.timestamp_begin:] = False
+        suppress[self.config['suppress_tokens']] = True
+        self.suppress_mask = np.where(suppress, -np.inf, 0.0).astype(np.float32)
+        self.initial_mask = self.suppress_mask.copy()
+        self.initial_mask[self.config['blank_tokens'] + [self.eot]] = -np.inf
+        if self.timestamps:
+            self.initial_mask[:self.timestamp_begin] = -np.inf
+            last_initial = self.timestamp_begin + round(WHISPER_MAX_INITIAL_TIMESTAMP_S / WHISPER_TIMESTAMP_S)
+            self.initial_mask[last_initial + 1:] = -np.inf
+
+        logger.info(f"Loaded ONNX Whisper decoder from {decoder_path} (language: {self.language}, "
+                    f"beam size: {self.beam_size}, timestamps: {self.timestamps})")
+
+    def _ortvalue(self, array: np.ndarray) -> ort.OrtValue:
+        return ort.OrtValue.ortvalue_from_numpy(np.ascontiguousarray(array), self.device, 0)
+
+    def _step(self, tokens: np.ndarray, cross: Tuple[ort.OrtValue, ort.OrtValue],
+              past: Tuple[ort.OrtValue, ort.OrtValue]):
+        """
+        One decoder call; returns last-position logits (numpy) and the
+        present K/V left as OrtValues for the next step
+        """
+        binding = self.session.io_binding()
+        binding.bind_cpu_input('tokens', tokens)
+        binding.bind_ortvalue_input('cross_k', cross[0])
+        binding.bind_ortvalue_input('cross_v', cross[1])
+        binding.bind_ortvalue_input('past_k', past[0])
+        binding.bind_ortvalue_input('past_v', past[1])
+        for name in ('logits', 'present_k', 'present_v'):
+            binding.bind_output(name, self.device)
+        self.session.run_with_iobinding(binding)
+        logits, present_k, present_v = binding.get_outputs()
+        return logits.numpy(), (present_k, present_v)
+
+    def _reorder(self, cache: Tuple[ort.OrtValue, ort.OrtValue], index: List[int]):
+        """
+        Select/duplicate cached beams (batch axis 1)
+        """
+        return tuple(self._ortvalue(value.numpy()[:, index]) for value in cache)
+
+    def _apply_timestamp_rules(self, logits: np.ndarray, sequences: Sequence[List[int]]) -> None:
+        """
+        Whisper's timestamp rules, in place on [n, n_vocab] logits (one row per
+        sampled sequence): timestamps come in pairs and never decrease, and a
+        timestamp is forced when the timestamps together outweigh every text token
+        """
+        begin = self.timestamp_begin
+        for row, seq in zip(logits, sequences):
+            if not seq:
+                continue  # first token: initial_mask
+            last = seq[-1] >= begin
+            penultimate = len(seq) < 2 or seq[-2] >= begin
+            if last:
+                if penultimate:
+                    row[begin:] = -np.inf  # a pair was closed: text or end-of-text next
+                else:
+                    row[:self.eot] = -np.inf  # a segment was closed: timestamp or end-of-text next
+            stamps = [token for token in seq if token >= begin]
+            if stamps:
+                row[begin:stamps[-1] + (0 if last and not penultimate else 1)] = -np.inf
+            logprobs = row - np.logaddexp.reduce(row)
+            if np.logaddexp.reduce(logprobs[begin:]) > logprobs[:begin].max():
+                row[:begin] = -np.inf
+
+    def segments(self, tokens: Sequence[int], offset: float = 0.0,
+                 duration: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        [{"start", "end", "text"}] between the timestamp tokens of a timestamped
+        decode, in seconds plus `offset` (the window's start); text after the
+        last timestamp ends at `duration` (the window's length)
+        """
+        segments = []
+        start, text = 0.0, []
+
+        def close(stop):
+            words = self.detokenize(text)
+            if words and stop is not None:
+                segments.append({'start': offset + start, 'end': offset + max(stop, start), 'text': words})
+
+        for token in tokens:
+            if self.timestamps and token >= self.timestamp_begin:
+                time = (token - self.timestamp_begin) * WHISPER_TIMESTAMP_S
+                close(time)
+                start, text = time, []
+            elif token < self.eot:
+                text.append(token)
+        close(duration)
+        return segments
+
+    def decode(self, encoder_output: np.ndarray) -> Tuple[str, List[int], List[float]]:
+        """
+        Greedy (beam_size 1) or beam-search decoding of one clip
+        Returns the text, sampled token ids and their log-probabilities
+        """
+        cross_k, cross_v = self.cross_kv_session.run(None, {'encoder_output': encoder_output[:1]})
+        cross = {}
+
+        def cross_for(n_beams):
+            if n_beams not in cross:
+                cross[n_beams] = (self._ortvalue(np.repeat(cross_k, n_beams, axis=1)),
+                                  self._ortvalue(np.repeat(cross_v, n_beams, axis=1)))
+            return cross[n_beams]
+
+        empty = np.zeros((self.config['n_layer'], 1, 0, self.config['n_state']), dtype=np.float32)
+        cache = (self._ortvalue(empty), self._ortvalue(empty))
+
+        # Live beams: (tokens, sum logprob, token logprobs)
+        beams = [([], 0.0, [])]
+        finished = []
+        inputs = np.array([self.sot_sequence], dtype=np.int64)
+        for step in range(self.max_tokens):
+            logits, cache = self._step(inputs, cross_for(len(beams)), cache)
+            logits = logits + (self.initial_mask if step == 0 else self.suppress_mask)
+            if self.timestamps:
+                self._apply_timestamp_rules(logits, [seq for seq, _, _ in beams])
+            logprobs = logits - np.logaddexp.reduce(logits, axis=-1, keepdims=True)
+
+            candidates = []
+            for i, (seq, total, lps) in enumerate(beams):
+                for token in np.argsort(-logprobs[i])[:self.beam_size + 1].tolist():
+                    lp = float(logprobs[i, token])
+                    candidates.append((total + lp, i, token, lp))
+            candidates.sort(key=lambda c: -c[0])
+
+            next_beams, source = [], []
+            for total, i, token, lp in candidates:
+                seq, _, lps = beams[i]
+                if token == self.eot:
+                    if len(finished) < self.beam_size:
+                        finished.append((seq + [token], total, lps + [lp]))
+                else:
+                    next_beams.append((seq + [token], total, lps + [lp]))
+                    source.append(i)
+                if len(next_beams) == self.beam_size:
+                    break
+
+            if len(finished) >= self.beam_size or not next_beams:
+                break
+            if source != list(range(len(beams))):
+                cache = self._reorder(cache, source)
+            beams = next_beams
+            inputs = np.array([[seq[-1]] for seq, _, _ in beams], dtype=np.int64)
+        else:
+            finished.extend(beams)
+
+        if not finished:
+            finished = beams
+        # Whisper's default ranking: sum logprob normalized by length
+        tokens, _, token_logprobs = max(finished, key=lambda b: b[1] / max(len(b[0]), 1))
+        return self.detokenize(tokens), tokens, token_logprobs
+
+    def decode_batch(self, encoder_output: np.ndarray) -> List[Tuple[str, List[int], List[float]]]:
+        """
+        Greedy decoding of a batch of clips in lockstep (one decoder call per
+        step for all of them); finished rows keep feeding end-of-text until
+        the whole batch is done
+        """
+        n = encoder_output.shape[0]
+        cross_k, cross_v = self.cross_kv_session.run(None, {'encoder_output': encoder_output})
+        cross = (self._ortvalue(cross_k), self._ortvalue(cross_v))
+        empty = np.zeros((self.config['n_layer'], n, 0, self.config['n_state']), dtype=np.float32)
+        cache = (self._ortvalue(empty), self._ortvalue(empty))
+
+        tokens = [[] for _ in range(n)]
+        token_logprobs = [[] for _ in range(n)]
+        done = np.zeros(n, dtype=bool)
+        inputs = np.tile(np.array(self.sot_sequence, dtype=np.int64), (n, 1))
+        for step in range(self.max_tokens):
+            logits, cache = self._step(inputs, cross, cache)
+            logits = logits + (self.initial_mask if step == 0 else self.suppress_mask)
+            if self.timestamps:
+                self._apply_timestamp_rules(logits, tokens)
+            logprobs = logits - np.logaddexp.reduce(logits, axis=-1, keepdims=True)
+            best = np.argmax(logprobs, axis=-1)
+            for i in np.flatnonzero(~done).tolist():
+                tokens[i].append(int(best[i]))
+                token_logprobs[i].append(float(logprobs[i, best[i]]))
+            done |= best == self.eot
+            if done.all():
+                break
+            inputs = np.where(done, self.eot, best).astype(np.int64)[:, None]
+
+        return [(self.detokenize(t), t, lps) for t, lps in zip(tokens, token_logprobs)]
+
+    def detokenize(self, tokens: Sequence[int]) -> str:
+        """
+        Byte-level BPE ids -> text (special tokens dropped)
+        """
+        data = b''.join(self.vocab[t] for t in tokens if t < self.eot)
+        return data.decode('utf-8', errors='replace').strip()
+
+
 class ONNXSpeechToText:
     """
     ONNX-based Speech-to-Text model
     Optimized Whisper model converted to ONNX for faster inference
     """
 
-    def __init__(self, model_path: str):
+    backend = 'onnx'
+    ENCODER_MAX_BATCH = 8  # 30 s windows per encoder call (long clips are split into several)
+
+    def __init__(self, model_path: str, frame_buckets: Optional[Sequence[int]] = None,
+                 language: str = 'en', beam_size: int = 1, timestamps: bool = False):
         self.model_path = Path(model_path)
         if not self.model_path.exists():
             raise FileNotFoundError(f"Model not found: {model_path}")
@@ -38,54 +339,90 @@ class ONNXSpeechToText:
             providers=providers
         )
 
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        # Encoders exported with a dynamic time axis only need padding to the
+        # next bucket; fixed exports keep the 30 s window
+        frames_dim = self.session.get_inputs()[0].shape[2]
+        self.dynamic_length = not isinstance(frames_dim, int)
+        buckets = sorted(int(b) for b in (frame_buckets or DEFAULT_FRAME_BUCKETS))
+        if any(b <= 0 or b % 2 or b > WHISPER_MAX_FRAMES for b in buckets):
+            raise ValueError(f"Frame buckets must be even and in (0, {WHISPER_MAX_FRAMES}]: {buckets}")
+        self.frame_buckets = tuple(buckets) if self.dynamic_length else (WHISPER_MAX_FRAMES,)
+
+        # Decoder export lives next to the encoder: whisper_<size>_decoder.onnx,
+        # whisper_<size>_cross_kv.onnx, whisper_<size>_decoder.json
+        decoder_files = whisper_decoder_files(self.model_path)
+        self.decoder = None
+        if all(path.exists() for path in decoder_files):
+            self.decoder = ONNXWhisperDecoder(*decoder_files, sess_options, providers,
+                                              language=language, beam_size=beam_size, timestamps=timestamps)
+        else:
+            logger.warning(f"Whisper decoder not found next to {model_path}; re-run convert_to_onnx.py")
+
         logger.info(f"Loaded ONNX Speech-to-Text model from {model_path}")
         logger.info(f"Using providers: {self.session.get_providers()}")
+        logger.info(f"Mel frame buckets: {self.frame_buckets}")
 
-    def preprocess_audio(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+    def preprocess_audio(self, audio_data: np.ndarray, sample_rate: int, frames: Optional[int] = None) -> np.ndarray:
         """
         Preprocess audio for Whisper model
+        frames: pad/trim to this many mel frames (default: the clip's bucket)
+        """
+        # Convert to mel spectrogram (80 mel bins, padded to the frame bucket)
+        mel_spectrogram = self._compute_mel_spectrogram(self._resample(audio_data, sample_rate), frames)
+
+        return mel_spectrogram
+
+    @staticmethod
+    def _resample(audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Resample to 16kHz if needed
         """
-        # Resample to 16kHz if needed
         if sample_rate != 16000:
+            import torch
+            import torchaudio
+
             resampler = torchaudio.transforms.Resample(sample_rate, 16000)
             audio_tensor = torch.from_numpy(audio_data)
             audio_data = resampler(audio_tensor).numpy()
+        return audio_data
 
-        # Normalize audio
-        audio_data = audio_data / np.abs(audio_data).max()
-
-        # Convert to mel spectrogram (Whisper expects 80 mel bins, 3000 frames)
-        mel_spectrogram = self._compute_mel_spectrogram(audio_data)
-
-        return mel_spectrogram
-
-    def _compute_mel_spectrogram(self, audio: np.ndarray) -> np.ndarray:
+    def _compute_mel_spectrogram(self, audio: np.ndarray, frames: Optional[int] = None) -> np.ndarray:
         """
         Compute mel spectrogram for Whisper
         """
-        # This is a simplified version - in production, use librosa or torchaudio
+        # Matches whisper.log_mel_spectrogram: the clip is followed by silence
+        # (zero samples), centered STFT with reflect padding, power mel
         n_fft = 400
         hop_length = 160
         n_mels = 80
 
         # Use librosa for mel spectrogram
         import librosa
+        audio = np.asarray(audio, dtype=np.float32)
         mel = librosa.feature.melspectrogram(
-            y=audio,
+            y=np.pad(audio, (0, n_fft)),
             sr=16000,
             n_fft=n_fft,
             hop_length=hop_length,
-            n_mels=n_mels
+            n_mels=n_mels,
+            pad_mode='reflect'
         )
 
-        # Convert to log scale
-        mel = np.log10(np.maximum(mel, 1e-10))
+        # Log scale over the clip's frames, 8 (log10) dynamic range, rescaled
+        log_spec = np.log10(np.maximum(mel[:, :max(len(audio) // hop_length, 1)], 1e-10))
+        floor = max(log_spec.max() - 8.0, -10.0)
+        mel = (np.maximum(log_spec, floor) + 4.0) / 4.0
 
-        # Pad or truncate to 3000 frames
-        if mel.shape[1] < 3000:
-            mel = np.pad(mel, ((0, 0), (0, 3000 - mel.shape[1])))
+        # Pad with silence to the frame bucket (3000 frames for fixed-length encoders)
+        if frames is None:
+            frames = bucket_frames(mel.shape[1], self.frame_buckets)
+        if mel.shape[1] < frames:
+            mel = np.pad(mel, ((0, 0), (0, frames - mel.shape[1])), constant_values=(floor + 4.0) / 4.0)
         else:
-            mel = mel[:, :3000]
+            mel = mel[:, :frames]
 
         return mel.astype(np.float32)
 
@@ -94,50 +431,154 @@ class ONNXSpeechToText:
         Transcribe audio to text
         """
         try:
-            # Preprocess audio
-            mel_features = self.preprocess_audio(audio_data, sample_rate)
+            return self.transcribe_batch([audio_data], sample_rate)[0]
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            raise
 
-            # Prepare input for ONNX model
-            input_data = np.expand_dims(mel_features, axis=0)
+    def transcribe_batch(self, audios: Sequence[np.ndarray], sample_rate: int) -> List[Dict[str, Any]]:
+        """
+        Transcribe several clips with batched encoder passes and batched
+        decoding loops; clips longer than the 30 s Whisper window are split
+        into consecutive windows whose texts are joined (as whisper.transcribe
+        does), windows are padded to the bucket of the longest one. With
+        timestamps, results also carry the timed 'segments' of every window.
+        """
+        if self.decoder is None:
+            raise RuntimeError("Whisper decoder not exported; run tools/convert_to_onnx.py")
+
+        # Every clip as 30 s windows of 16 kHz audio: (clip index, start sample, samples)
+        window = WHISPER_MAX_FRAMES * 160
+        windows = []
+        for i, audio_data in enumerate(audios):
+            audio = np.asarray(self._resample(audio_data, sample_rate), dtype=np.float32)
+            windows += [(i, start, audio[start:start + window]) for start in range(0, max(len(audio), 1), window)]
+
+        texts = [[] for _ in audios]
+        logprobs = [[] for _ in audios]
+        segments = [[] for _ in audios]
+        for start in range(0, len(windows), self.ENCODER_MAX_BATCH):
+            chunk = windows[start:start + self.ENCODER_MAX_BATCH]
+
+            # Preprocess audio to a common frame count
+            frames = bucket_frames(max(max(len(w) for _, _, w in chunk) // 160, 1), self.frame_buckets)
+            input_data = np.stack([self._compute_mel_spectrogram(w, frames) for _, _, w in chunk])
+
+            encoder_output = self.session.run([self.output_name], {self.input_name: input_data})[0]
+
+            # Decode tokens with the KV-cached decoder
+            if len(chunk) > 1 and self.decoder.beam_size == 1:
+                decoded = self.decoder.decode_batch(encoder_output)
+            else:
+                decoded = [self.decoder.decode(encoder_output[j:j + 1]) for j in range(len(chunk))]
+
+            for (i, offset, samples), (text, tokens, token_logprobs) in zip(chunk, decoded):
+                texts[i].append(text.strip())
+                if self.decoder.timestamps:
+                    # confidence stays over text tokens (and end-of-text), as without timestamps
+                    token_logprobs = [lp for t, lp in zip(tokens, token_logprobs) if t < self.decoder.timestamp_begin]
+                    segments[i] += self.decoder.segments(tokens, offset / 16000, len(samples) / 16000)
+                logprobs[i] += token_logprobs
+
+        results = []
+        for audio_data, text, token_logprobs, timed in zip(audios, texts, logprobs, segments):
+            result = {
+                'text': " ".join(t for t in text if t),
+                'confidence': self._calculate_confidence(token_logprobs),
+                'avg_logprob': float(np.mean(token_logprobs)) if token_logprobs else 0.0,
+                'language': self.decoder.language,
+                'duration': len(audio_data) / sample_rate
+            }
+            if self.decoder.timestamps:
+                result['segments'] = timed
+            results.append(result)
+        return results
 
-            # Run inference
-            input_name = self.session.get_inputs()[0].name
-            output_name = self.session.get_outputs()[0].name
+    def _calculate_confidence(self, token_logprobs: List[float]) -> float:
+        """
+        Calculate confidence score from token log-probabilities
+        (geometric mean token probability)
+        """
+        if not token_logprobs:
+            return 0.0
+        return float(np.exp(np.mean(token_logprobs)))
 
-            result = self.session.run([output_name], {input_name: input_data})
 
-            # Post-process results
-            # In production, this would decode the tokens to text
-            # For now, returning a simplified result
+class TorchSpeechToText:
+    """
+    PyTorch Whisper behind the same transcribe() interface as ONNXSpeechToText
+    Kept for A/B comparison and as a fallback while ONNX exports roll out
+    """
 
-            text = self._decode_output(result[0])
-            confidence = self._calculate_confidence(result[0])
+    backend = 'torch'
 
-            return {
-                'text': text,
-                'confidence': confidence,
-                'language': 'en',
-                'duration': len(audio_data) / sample_rate
-            }
-        except Exception as e:
-            logger.error(f"Transcription error: {e}")
-            raise
+    def __init__(self, model_size: str = "base", language: str = 'en'):
+        import whisper
 
+        self.model_size = model_size
+        self.language = language
+        self.model = whisper.load_model(model_size)
+        logger.info(f"Loaded PyTorch Whisper {model_size} model")
 
-    def _decode_output(self, output: np.ndarray) -> str:
+    def transcribe(self, audio_data: np.ndarray, sample_rate: int) -> Dict[str, Any]:
         """
-        Decode ONNX model output to text
-        In production, this would use a proper tokenizer/decoder
+        Transcribe audio to text
         """
-        # Placeholder - in production, use Whisper tokenizer
-        return "Transcribed text from ONNX model"
+        import librosa
+
+        audio = np.asarray(audio_data, dtype=np.float32)
+        if sample_rate != 16000:
+            audio = librosa.resample(audio, orig_sr=sample_rate, target_sr=16000)
+
+        result = self.model.transcribe(
+            audio,
+            language=self.language,
+            task="transcribe",
+            verbose=False,
+            fp16=False,
+            word_timestamps=True
+        )
+        segments = result.get("segments", [])
+        words = [
+            {'word': w['word'].strip(), 'start': float(w['start']), 'end': float(w['end']),
+             'probability': float(w.get('probability', 0.0))}
+            for segment in segments for w in segment.get('words', [])
+        ]
+        return {
+            'text': result["text"],
+            'confidence': float(calculate_confidence_from_segments(segments)),
+            'language': result.get("language", self.language),
+            'duration': len(audio_data) / sample_rate,
+            'segments': segments,
+            'words': words
+        }
 
-    def _calculate_confidence(self, output: np.ndarray) -> float:
+    def transcribe_batch(self, audios: Sequence[np.ndarray], sample_rate: int) -> List[Dict[str, Any]]:
         """
-        Calculate confidence score from model output
+        Whisper's transcribe() has no batch mode; clips run one after another
         """
-        # Placeholder - calculate from logits
-        return 0.95
+        return [self.transcribe(audio, sample_rate) for audio in audios]
+
+
+# Valence (negative/positive) and arousal (activation) of each emotion label
+EMOTION_VALENCE = {
+    'happy': 1.0,
+    'surprised': 0.5,
+    'neutral': 0.0,
+    'fearful': -0.3,
+    'disgusted': -0.5,
+    'angry': -0.7,
+    'sad': -1.0
+}
+EMOTION_AROUSAL = {
+    'angry': 1.0,
+    'fearful': 0.8,
+    'surprised': 0.7,
+    'happy': 0.6,
+    'disgusted': 0.4,
+    'neutral': 0.0,
+    'sad': -0.3
+}
 
 
 class ONNXEmotionAnalyzer:
@@ -164,152 +605,161 @@ class ONNXEmotionAnalyzer:
         )
 
         self.emotion_labels = ['neutral', 'happy', 'sad', 'angry', 'fearful', 'surprised', 'disgusted']
+        self._check_input_signature()
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        # (labels, 2) projection of a distribution onto valence and arousal
+        self.affect_weights = np.array(
+            [[EMOTION_VALENCE.get(label, 0.0), EMOTION_AROUSAL.get(label, 0.0)] for label in self.emotion_labels]
+        )
 
         logger.info(f"Loaded ONNX Emotion Analysis model from {model_path}")
 
-    def extract_features(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+    def _check_input_signature(self) -> None:
         """
-        Extract acoustic features for emotion analysis
+        Fail at load time if the model does not take (batch, EMOTION_FEATURE_DIM) features
         """
-        import librosa
-
-        # Extract MFCCs
-        mfccs = librosa.feature.mfcc(y=audio_data, sr=sample_rate, n_mfcc=40)
+        from features import EMOTION_FEATURE_DIM
 
-        # Extract prosodic features
-        pitch, _ = librosa.piptrack(y=audio_data, sr=sample_rate)
-        pitch_mean = np.mean(pitch[pitch > 0]) if np.any(pitch > 0) else 0
-        pitch_std = np.std(pitch[pitch > 0]) if np.any(pitch > 0) else 0
+        model_input = self.session.get_inputs()[0]
+        shape = list(model_input.shape)
+        if len(shape) != 2 or (isinstance(shape[1], int) and shape[1] != EMOTION_FEATURE_DIM):
+            raise ValueError(
+                f"Emotion model {self.model_path} expects input {model_input.name} of shape {shape}, "
+                f"the feature extractor produces [batch, {EMOTION_FEATURE_DIM}]"
+            )
 
-        # Extract energy features
-        rms = librosa.feature.rms(y=audio_data)[0]
-        energy_mean = np.mean(rms)
-        energy_std = np.std(rms)
+    def extract_features(self, audio_data: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Extract acoustic features for emotion analysis (one STFT, see features.emotion_features)
+        """
+        from features import emotion_features
 
-        # Extract spectral features
-        spectral_centroid = librosa.feature.spectral_centroid(y=audio_data, sr=sample_rate)[0]
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=audio_data, sr=sample_rate)[0]
+        return emotion_features(audio_data, sample_rate)
 
-        # Combine features
-        features = np.concatenate([
-            np.mean(mfccs, axis=1),
-            np.std(mfccs, axis=1),
-            [pitch_mean, pitch_std, energy_mean, energy_std],
-            [np.mean(spectral_centroid), np.mean(spectral_rolloff)]
-        ])
+    def extract_features_batch(self, clips: Sequence[np.ndarray], sample_rate: int,
+                               executor: Optional[Executor] = None) -> np.ndarray:
+        """
+        Emotion features of several clips as a (N, EMOTION_FEATURE_DIM) matrix
+        """
+        from features import emotion_features_batch
 
-        return features.astype(np.float32)
+        return emotion_features_batch(clips, sample_rate, executor)
 
     def analyze(self, audio_data: np.ndarray, sample_rate: int) -> Dict[str, Any]:
         """
         Analyze emotion from audio
         """
-        try:
-            # Extract features
-            features = self.extract_features(audio_data, sample_rate)
-
-            # Prepare input for ONNX model
-            input_data = np.expand_dims(features, axis=0)
-
-            # Run inference
-            input_name = self.session.get_inputs()[0].name
-            output_name = self.session.get_outputs()[0].name
-
-            result = self.session.run([output_name], {input_name: input_data})
-
-            # Get probabilities
-            probabilities = result[0][0]
-
-            # Get top emotion
-            top_emotion_idx = np.argmax(probabilities)
-            top_emotion = self.emotion_labels[top_emotion_idx]
-            confidence = float(probabilities[top_emotion_idx])
-
-            # Create emotion distribution
-            emotion_distribution = {
-                label: float(prob)
-                for label, prob in zip(self.emotion_labels, probabilities)
-            }
+        return self.analyze_batch([audio_data], sample_rate)[0]
 
-            return {
-                'emotion': top_emotion,
-                'confidence': confidence,
-                'distribution': emotion_distribution,
-                'valence': self._calculate_valence(emotion_distribution),
-                'arousal': self._calculate_arousal(emotion_distribution)
-            }
+    def analyze_batch(self, audios: Sequence[np.ndarray], sample_rate: int,
+                      executor: Optional[Executor] = None) -> List[Dict[str, Any]]:
+        """
+        Analyze emotion of several clips with one model call over the batch axis
+        Features are extracted on executor (in parallel) when one is given
+        """
+        if len(audios) == 0:
+            return []
+        try:
+            features = self.extract_features_batch(audios, sample_rate, executor)
+            probabilities = self.session.run([self.output_name], {self.input_name: features})[0]
+
+            # Valence and arousal of every clip in one product with the label maps
+            affect = probabilities.astype(np.float64) @ self.affect_weights
+            top = probabilities.argmax(axis=1)
+
+            return [
+                {
+                    'emotion': self.emotion_labels[top[i]],
+                    'confidence': float(probabilities[i, top[i]]),
+                    'distribution': dict(zip(self.emotion_labels, probabilities[i].tolist())),
+                    'valence': float(affect[i, 0]),
+                    'arousal': float(affect[i, 1])
+                }
+                for i in range(len(audios))
+            ]
         except Exception as e:
             logger.error(f"Emotion analysis error: {e}")
             raise
 
-    def _calculate_valence(self, distribution: Dict[str, float]) -> float:
-        """
-        Calculate valence (positive/negative) from emotion distribution
-        """
-        valence_map = {
-            'happy': 1.0,
-            'surprised': 0.5,
-            'neutral': 0.0,
-            'fearful': -0.3,
-            'disgusted': -0.5,
-            'angry': -0.7,
-            'sad': -1.0
-        }
-
-        valence = sum(distribution[emotion] * valence_map.get(emotion, 0.0)
-                     for emotion in distribution)
-        return float(valence)
-
-    def _calculate_arousal(self, distribution: Dict[str, float]) -> float:
-        """
-        Calculate arousal (activation level) from emotion distribution
-        """
-        arousal_map = {
-            'angry': 1.0,
-            'fearful': 0.8,
-            'surprised': 0.7,
-            'happy': 0.6,
-            'disgusted': 0.4,
-            'neutral': 0.0,
-            'sad': -0.3
-        }
-
-        arousal = sum(distribution[emotion] * arousal_map.get(emotion, 0.0)
-                     for emotion in distribution)
-        return float(arousal)
-
 
 # Model factory
 class ModelFactory:
     """
     Factory for creating ML models based on availability
+    ONNX models come from the registry of models_dir: loaded on first use and
+    shared process-wide (see registry.py), so repeated calls reuse sessions
     """
 
-    @staticmethod
-    def create_speech_to_text(models_dir: str = "./models") -> ONNXSpeechToText:
+    _registries: Dict[str, ModelRegistry] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def registry(cls, models_dir: str = "./models") -> ModelRegistry:
         """
-        Create Speech-to-Text model (ONNX if available, fallback to PyTorch)
+        The (process-wide) registry of models_dir
         """
-        onnx_path = Path(models_dir) / "whisper_base.onnx"
-
-        if onnx_path.exists():
+        key = str(Path(models_dir).resolve())
+        with cls._lock:
+            if key not in cls._registries:
+                cls._registries[key] = ModelRegistry(models_dir, builders={
+                    SPEECH_TO_TEXT: ONNXSpeechToText,
+                    EMOTION: ONNXEmotionAnalyzer,
+                })
+            return cls._registries[key]
+
+    @classmethod
+    def create_speech_to_text(cls, models_dir: str = "./models", backend: str = "auto",
+                              model_size: str = "base", quantization: Optional[str] = None, **kwargs):
+        """
+        Create Speech-to-Text model
+        backend: 'onnx', 'torch' (PyTorch Whisper) or 'auto' (ONNX if
+        exported, fallback to PyTorch)
+        quantization: None (FP32) or 'int8'; a quantized model is ONNX only,
+        so there is no PyTorch fallback for it
+        """
+        if backend not in STT_BACKENDS:
+            raise ValueError(f"Unknown speech-to-text backend: {backend} (expected one of {STT_BACKENDS})")
+        if backend == "torch" and quantization:
+            raise ValueError(f"Quantization {quantization!r} needs the ONNX backend")
+
+        if backend == "torch":
+            logger.info("Using PyTorch Speech-to-Text model")
+            return TorchSpeechToText(model_size, language=kwargs.get('language', 'en'))
+
+        # Encoder-only exports (older converter) cannot produce text: not usable
+        registry = cls.registry(models_dir)
+        spec = registry.find("whisper", model_size, quantization)
+        decoder_missing = spec is not None and not all(
+            path.exists() for path in whisper_decoder_files(registry.models_dir / spec.path))
+        if spec is not None and not decoder_missing:
             logger.info("Using ONNX Speech-to-Text model")
-            return ONNXSpeechToText(str(onnx_path))
+            return registry.get("whisper", model_size, quantization, **kwargs)
+        if backend == "onnx" or quantization:
+            # an explicitly requested quantization is never replaced by FP32 PyTorch
+            wanted = f"{model_size} ({quantization})" if quantization else model_size
+            reason = "has no decoder export" if decoder_missing else "not available"
+            raise FileNotFoundError(f"ONNX Whisper {wanted} in {models_dir} {reason} "
+                                    f"(available: {[s.key for s in registry.specs]}). "
+                                    f"Please convert Whisper to ONNX.")
+
+        if decoder_missing:
+            logger.warning(f"ONNX Whisper {model_size} in {models_dir} has no decoder export "
+                           f"(re-run convert_to_onnx.py), using PyTorch fallback")
         else:
-            logger.warning(f"ONNX model not found at {onnx_path}, using fallback")
-            # Fallback to PyTorch Whisper
-            raise FileNotFoundError("ONNX model not available. Please convert Whisper to ONNX.")
+            logger.warning(f"ONNX Whisper {model_size} not found in {models_dir}, using PyTorch fallback")
+        return TorchSpeechToText(model_size, language=kwargs.get('language', 'en'))
 
-    @staticmethod
-    def create_emotion_analyzer(models_dir: str = "./models") -> ONNXEmotionAnalyzer:
+    @classmethod
+    def create_emotion_analyzer(cls, models_dir: str = "./models", version: Optional[str] = None,
+                                quantization: Optional[str] = None) -> ONNXEmotionAnalyzer:
         """
         Create Emotion Analyzer (ONNX if available)
         """
-        onnx_path = Path(models_dir) / "emotion_analyzer.onnx"
-
-        if onnx_path.exists():
-            logger.info("Using ONNX Emotion Analyzer model")
-            return ONNXEmotionAnalyzer(str(onnx_path))
-        else:
-            logger.warning(f"ONNX model not found at {onnx_path}")
+        registry = cls.registry(models_dir)
+        if registry.find("emotion", version, quantization) is None:
+            logger.warning(f"ONNX emotion model not found in {models_dir}")
             raise FileNotFoundError("ONNX emotion model not available.")
+        logger.info("Using ONNX Emotion Analyzer model")
+        return registry.get("emotion", version, quantization)
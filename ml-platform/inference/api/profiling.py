@@ -0,0 +1,87 @@
+"""
+Slow-request profiler
+Every request collects a trace of its pipeline stages (decode, transcribe,
+feature, score, ...) in a context variable; requests slower than threshold_ms
+are written to dump_dir as one JSON file each (oldest removed beyond
+max_dumps) so latency outliers can be broken down after the fact.
+"""
+
+import json
+import logging
+import time
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_trace: ContextVar[Optional[List[Dict[str, float]]]] = ContextVar("request_trace", default=None)
+
+
+class SlowRequestProfiler:
+    """
+    Per-request stage traces, dumped for requests slower than threshold_ms (0 disables)
+    """
+
+    def __init__(self, threshold_ms: float = 0.0, dump_dir: str = "/tmp/ml-slow-requests", max_dumps: int = 100):
+        self.threshold_ms = threshold_ms
+        self.dump_dir = Path(dump_dir)
+        self.max_dumps = max_dumps
+        self.dumps = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def begin(self) -> Optional[Token]:
+        """
+        Start tracing the current request (no-op when disabled)
+        """
+        if not self.enabled:
+            return None
+        return _trace.set([])
+
+    @staticmethod
+    def record(stage: str, started: float, elapsed: float) -> None:
+        """
+        Add a stage (perf_counter start, seconds) to the current request's trace, if any
+        """
+        trace = _trace.get()
+        if trace is not None:
+            trace.append({"stage": stage, "started": started, "seconds": elapsed})
+
+    def end(self, token: Optional[Token], started: float, elapsed: float, info: Dict[str, Any]) -> Optional[Path]:
+        """
+        Finish the trace; dump it when the request took threshold_ms or more
+        Returns the dump path (None when the request was fast or tracing is off)
+        """
+        if token is None:
+            return None
+        trace = _trace.get() or []
+        _trace.reset(token)
+        if elapsed * 1000 < self.threshold_ms:
+            return None
+
+        profile = dict(info, total_ms=round(elapsed * 1000, 1), stages=[
+            {"stage": s["stage"], "start_ms": round((s["started"] - started) * 1000, 1),
+             "duration_ms": round(s["seconds"] * 1000, 1)}
+            for s in trace
+        ])
+        try:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1e6) % 1000000:06d}.json"
+            path = self.dump_dir / name
+            path.write_text(json.dumps(profile, indent=2))
+            self.dumps += 1
+            self._rotate()
+        except OSError as e:
+            logger.warning(f"Could not write slow-request profile: {e}")
+            return None
+        logger.warning(f"Slow request {info.get('method')} {info.get('endpoint')}: "
+                       f"{profile['total_ms']:.0f} ms, profile written to {path}")
+        return path
+
+    def _rotate(self) -> None:
+        dumps = sorted(self.dump_dir.glob("*.json"))
+        for old in dumps[:max(0, len(dumps) - self.max_dumps)]:
+            old.unlink(missing_ok=True)
@@ -0,0 +1,307 @@
+"""
+Model registry
+models_dir/manifest.json lists the models the API may serve (name, version,
+kind, file, sha256 checksums of the model and its companion files, input
+signature, quantization: None for FP32 or "int8"). Models are
+loaded on first use, verified against their manifest entry, and kept in a
+process-wide cache that evicts the least recently used ones once the loaded
+models exceed a memory budget; several Whisper sizes and emotion models can
+be listed without loading any of them at startup. Directories without a
+manifest are indexed from the converter's file names.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+SPEECH_TO_TEXT = "speech_to_text"
+EMOTION = "emotion"
+KINDS = (SPEECH_TO_TEXT, EMOTION)
+INT8 = "int8"  # quantization label of *.int8.onnx models, whichever mode produced them
+QUANTIZATIONS = (None, INT8)
+
+
+@dataclass
+class ModelSpec:
+    """
+    One manifest entry; path and files are relative to the models directory
+    """
+    name: str
+    version: str
+    kind: str
+    path: str
+    sha256: Optional[str] = None
+    inputs: Dict[str, List[Any]] = field(default_factory=dict)  # input name -> dims (int or symbolic)
+    quantization: Optional[str] = None
+    files: List[str] = field(default_factory=list)  # companion files loaded with the model
+    files_sha256: Dict[str, str] = field(default_factory=dict)  # companion file -> checksum
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}:{self.version}" + (f":{self.quantization}" if self.quantization else "")
+
+    @classmethod
+    def from_dict(cls, entry: Dict[str, Any]) -> "ModelSpec":
+        spec = cls(**{name: entry[name] for name in cls.__dataclass_fields__ if name in entry})
+        if spec.kind not in KINDS:
+            raise ValueError(f"Model {spec.key}: unknown kind {spec.kind!r} (expected one of {KINDS})")
+        if spec.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Model {spec.key}: unknown quantization {spec.quantization!r} "
+                             f"(expected one of {QUANTIZATIONS})")
+        return spec
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_signature(session) -> Dict[str, List[Any]]:
+    """
+    {input name: dims} of an onnxruntime session, as stored in the manifest
+    """
+    return {inp.name: list(inp.shape) for inp in session.get_inputs()}
+
+
+def signature_mismatches(expected: Dict[str, List[Any]], actual: Dict[str, List[Any]]) -> List[str]:
+    """
+    Differences between a manifest signature and a session's; fixed dims must
+    be equal, symbolic (dynamic) dims only need to be symbolic on both sides
+    """
+    problems = []
+    for name, dims in expected.items():
+        if name not in actual:
+            problems.append(f"missing input {name}")
+        elif len(dims) != len(actual[name]) or any(
+            isinstance(e, int) != isinstance(a, int) or (isinstance(e, int) and e != a)
+            for e, a in zip(dims, actual[name])
+        ):
+            problems.append(f"input {name} is {actual[name]}, manifest says {dims}")
+    return problems
+
+
+def discover_models(models_dir: Path) -> List[ModelSpec]:
+    """
+    Specs for a directory without manifest, from convert_to_onnx.py's file names
+    (no checksum or signature to verify)
+    """
+    specs = []
+    for path in sorted(models_dir.glob("whisper_*.onnx")):
+        match = re.fullmatch(r"whisper_([a-z0-9]+)(\.int8)?\.onnx", path.name)
+        if match is None:
+            continue  # decoder / cross-attention / optimized graphs
+        size = match.group(1)
+        files = [f"whisper_{size}_{suffix}" for suffix in ("decoder.onnx", "cross_kv.onnx", "decoder.json")]
+        specs.append(ModelSpec("whisper", size, SPEECH_TO_TEXT, path.name,
+                               quantization=INT8 if match.group(2) else None,
+                               files=[f for f in files if (models_dir / f).exists()]))
+    for path in sorted(models_dir.glob("emotion_analyzer*.onnx")):
+        if path.name in ("emotion_analyzer.onnx", "emotion_analyzer.int8.onnx"):
+            specs.append(ModelSpec("emotion", "default", EMOTION, path.name,
+                                   quantization=INT8 if ".int8" in path.name else None))
+    return specs
+
+
+def load_manifest(models_dir: Path) -> List[ModelSpec]:
+    manifest = models_dir / MANIFEST_NAME
+    if not manifest.exists():
+        return discover_models(models_dir)
+    entries = json.loads(manifest.read_text(encoding="utf-8")).get("models", [])
+    specs = [ModelSpec.from_dict(entry) for entry in entries]
+    duplicates = {spec.key for spec in specs if sum(s.key == spec.key for s in specs) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate models in {manifest}: {sorted(duplicates)}")
+    return specs
+
+
+class ModelCache:
+    """
+    Thread-safe LRU of loaded models, bounded by their approximate memory
+    (on-disk size of the model files); each model is loaded at most once
+    across concurrent callers. Evicted models are only dropped from the
+    cache, callers still holding one keep using it.
+    """
+
+    def __init__(self, max_bytes: int = 2 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._models
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+    def _drop(self, key: str) -> None:
+        self._models.pop(key, None)
+        self._bytes -= self._sizes.pop(key, 0)
+
+    def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._models) > 1:
+            oldest = next(k for k in self._models if k != keep)
+            logger.info(f"Evicting model {oldest} ({self._sizes[oldest] / 1024 ** 2:.0f} MB) from the model cache")
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def get_or_load(self, key: str, size_bytes: int, load: Callable[[], Any]) -> Any:
+        """
+        Cached model for `key`, loading it (at most once at a time) on a miss
+        """
+        model = self._get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                model = self._get(key)
+                if model is not None:
+                    return model
+                model = load()
+                with self._lock:
+                    self._models[key] = model
+                    self._sizes[key] = size_bytes
+                    self._bytes += size_bytes
+                    self.loads += 1
+                    if size_bytes > self.max_bytes:
+                        logger.warning(f"Model {key} ({size_bytes / 1024 ** 2:.0f} MB) exceeds the model cache "
+                                       f"budget ({self.max_bytes / 1024 ** 2:.0f} MB)")
+                    self._evict(keep=key)
+                return model
+        finally:
+            with self._lock:
+                if not key_lock.locked():
+                    self._key_locks.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+
+# Shared by every registry in the process (the budget covers all loaded models)
+model_cache = ModelCache()
+
+
+class ModelRegistry:
+    """
+    Manifest of a models directory + lazy, cached, verified loading
+    builders: kind -> callable(path, **options) returning the model object
+    (its ONNX session, if any, as .session)
+    """
+
+    def __init__(self, models_dir: str, builders: Dict[str, Callable[..., Any]],
+                 cache: Optional[ModelCache] = None):
+        self.models_dir = Path(models_dir)
+        self.builders = builders
+        self.cache = cache if cache is not None else model_cache
+        self.specs = load_manifest(self.models_dir)
+
+    def find(self, name: str, version: Optional[str] = None,
+             quantization: Optional[str] = None) -> Optional[ModelSpec]:
+        """
+        Spec of name (at version, or the first one listed) with this quantization (None: FP32)
+        """
+        for spec in self.specs:
+            if spec.name == name and version in (None, spec.version) and spec.quantization == quantization:
+                return spec
+        return None
+
+    def resolve(self, name: str, version: Optional[str] = None, quantization: Optional[str] = None) -> ModelSpec:
+        spec = self.find(name, version, quantization)
+        if spec is None:
+            wanted = ":".join(p for p in (name, version, quantization) if p)
+            raise FileNotFoundError(f"Model {wanted} is not in the registry at {self.models_dir} "
+                                    f"(available: {[s.key for s in self.specs]})")
+        return spec
+
+    def size_bytes(self, spec: ModelSpec) -> int:
+        return sum((self.models_dir / f).stat().st_size
+                   for f in [spec.path, *spec.files] if (self.models_dir / f).exists())
+
+    def cache_key(self, spec: ModelSpec, options: Dict[str, Any]) -> str:
+        suffix = ",".join(f"{k}={options[k]!r}" for k in sorted(options))
+        return f"{self.models_dir.resolve()}/{spec.key}" + (f"[{suffix}]" if suffix else "")
+
+    def is_loaded(self, spec: ModelSpec, **options) -> bool:
+        return self.cache_key(spec, options) in self.cache
+
+    def _load(self, spec: ModelSpec, options: Dict[str, Any]) -> Any:
+        path = self.models_dir / spec.path
+        if not path.exists():
+            raise FileNotFoundError(f"Model {spec.key}: {path} not found")
+        if spec.sha256 and file_sha256(path) != spec.sha256:
+            raise ValueError(f"Model {spec.key}: checksum of {path} does not match the manifest")
+        for name in spec.files:
+            companion = self.models_dir / name
+            if not companion.exists():
+                raise FileNotFoundError(f"Model {spec.key}: {companion} not found")
+            if name in spec.files_sha256 and file_sha256(companion) != spec.files_sha256[name]:
+                raise ValueError(f"Model {spec.key}: checksum of {companion} does not match the manifest")
+
+        model = self.builders[spec.kind](str(path), **options)
+        session = getattr(model, "session", None)
+        if spec.inputs and session is not None:
+            problems = signature_mismatches(spec.inputs, input_signature(session))
+            if problems:
+                raise ValueError(f"Model {spec.key}: {'; '.join(problems)}")
+        logger.info(f"Loaded model {spec.key} from {path}")
+        return model
+
+    def get(self, name: str, version: Optional[str] = None, quantization: Optional[str] = None, **options) -> Any:
+        """
+        The loaded model (from the cache, or loaded now); options go to its builder
+        """
+        spec = self.resolve(name, version, quantization)
+        return self.cache.get_or_load(self.cache_key(spec, options), self.size_bytes(spec),
+                                      lambda: self._load(spec, options))
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        Manifest entries with whether each is currently loaded (with any options)
+        """
+        loaded = self.cache.keys()
+
+        def is_loaded(spec):
+            base = self.cache_key(spec, {})
+            return any(key == base or key.startswith(base + "[") for key in loaded)
+
+        return [dict(spec.to_dict(), loaded=is_loaded(spec)) for spec in self.specs]
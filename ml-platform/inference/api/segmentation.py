@@ -0,0 +1,104 @@
+"""
+Word segmentation of an utterance for per-word acoustic scoring
+Word spans come from the recognizer's word timestamps (Whisper
+word_timestamps, aligned on cross-attention) when the backend provides them
+(timing "aligned"); otherwise each timed segment's words (Whisper timestamp
+tokens) are spread over that segment ("segment"), and without either the
+transcript's words are spread over the voiced part of the clip ("estimated"),
+in proportion to their length. Only "aligned" spans are word boundaries.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Frames quieter than this (relative to the loudest frame) are treated as silence
+SILENCE_TOP_DB = 40.0
+
+# How a span's boundaries were obtained
+TIMING_ALIGNED = "aligned"
+TIMING_SEGMENT = "segment"
+TIMING_ESTIMATED = "estimated"
+
+
+def voiced_range(rms: np.ndarray, hop_length: int, n_samples: int,
+                 top_db: float = SILENCE_TOP_DB) -> Tuple[int, int]:
+    """
+    Sample range [start, end) between the first and last non-silent frame
+    """
+    if rms.size == 0 or rms.max() <= 0:
+        return 0, n_samples
+    loud = np.flatnonzero(20 * np.log10(np.maximum(rms, 1e-10) / rms.max()) > -top_db)
+    start = max(0, loud[0] * hop_length - hop_length // 2)
+    end = min(n_samples, (loud[-1] + 1) * hop_length - hop_length // 2)
+    return start, max(end, start + 1)
+
+
+def _sample_range(start_s: float, end_s: float, n_samples: int, sr: int) -> Tuple[int, int]:
+    start = min(max(int(round(float(start_s) * sr)), 0), max(n_samples - 1, 0))
+    # Whisper can emit zero-length words; keep at least one sample
+    end = min(max(int(round(float(end_s) * sr)), start + 1), n_samples)
+    return start, end
+
+
+def _timed_words(word_timings: Sequence[Dict[str, Any]], n_samples: int, sr: int) -> List[Tuple[str, int, int, str]]:
+    spans = []
+    for timing in word_timings:
+        word = str(timing.get("word", "")).strip()
+        if not word:
+            continue
+        start, end = _sample_range(timing["start"], timing["end"], n_samples, sr)
+        spans.append((word, start, end, TIMING_ALIGNED))
+    return spans
+
+
+def _proportional_words(words: Sequence[str], start: int, end: int,
+                        timing: str = TIMING_ESTIMATED) -> List[Tuple[str, int, int, str]]:
+    # Character count (plus the following space) stands in for duration
+    weights = np.array([len(word) + 1 for word in words], dtype=np.float64)
+    edges = start + np.round(np.concatenate(([0.0], np.cumsum(weights))) / weights.sum() * (end - start))
+    edges = edges.astype(np.int64)
+    return [(word, int(edges[i]), int(edges[i + 1]), timing) for i, word in enumerate(words)]
+
+
+def _segment_words(segments: Sequence[Dict[str, Any]], n_samples: int, sr: int) -> List[Tuple[str, int, int, str]]:
+    spans = []
+    for segment in segments:
+        words = str(segment.get("text", "")).split()
+        if words:
+            start, end = _sample_range(segment["start"], segment["end"], n_samples, sr)
+            spans += _proportional_words(words, start, end, TIMING_SEGMENT)
+    return spans
+
+
+def word_spans(transcription: str, n_samples: int, sr: int = 16000,
+               word_timings: Optional[Sequence[Dict[str, Any]]] = None,
+               rms: Optional[np.ndarray] = None, hop_length: int = 512,
+               segments: Optional[Sequence[Dict[str, Any]]] = None) -> List[Tuple[str, int, int, str]]:
+    """
+    [(word, start_sample, end_sample, timing)] for every word of the utterance
+    timing: TIMING_ALIGNED, TIMING_SEGMENT or TIMING_ESTIMATED (see module docstring)
+
+    Args:
+        transcription: Recognized text (used when there are no word timings or segments)
+        n_samples: Clip length in samples
+        sr: Sample rate
+        word_timings: [{"word", "start", "end"}] in seconds, as returned by the recognizer
+        rms: Frame RMS of the clip, to restrict the fallback to the voiced region
+        hop_length: Hop of the rms frames
+        segments: [{"start", "end", "text"}] in seconds, the recognizer's timed segments
+    """
+    if word_timings:
+        spans = _timed_words(word_timings, n_samples, sr)
+        if spans:
+            return spans
+    if segments:
+        spans = _segment_words(segments, n_samples, sr)
+        if spans:
+            return spans
+
+    words = transcription.split()
+    if not words:
+        return []
+    start, end = (0, n_samples) if rms is None else voiced_range(rms, hop_length, n_samples)
+    return _proportional_words(words, start, end)
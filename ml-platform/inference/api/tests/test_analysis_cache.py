@@ -0,0 +1,78 @@
+"""Tests for the per-audio analysis cache"""
+import threading
+import time
+
+import numpy as np
+
+from analysis_cache import AnalysisCache, audio_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_audio_key_is_content_hash():
+    """Identical uploads share a key"""
+    assert audio_key(b"RIFF....") == audio_key(b"RIFF....")
+    assert audio_key(b"RIFF....") != audio_key(b"RIFF...!")
+
+
+def test_get_or_compute_reuses_value():
+    """Second request reuses the first request's result"""
+    cache = AnalysisCache()
+    calls = []
+    compute = lambda: calls.append(1) or {"text": "hello"}
+
+    first, first_cached = cache.get_or_compute("k", "transcription", compute)
+    second, second_cached = cache.get_or_compute("k", "transcription", compute)
+    assert first == second == {"text": "hello"}
+    assert (first_cached, second_cached) == (False, True)
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_ttl():
+    """Entries are dropped once the TTL has passed"""
+    clock = FakeClock()
+    cache = AnalysisCache(ttl_s=10, clock=clock)
+    cache.put("k", "audio", np.zeros(16000, dtype=np.float32))
+    clock.now = 9.9
+    assert cache.get("k", "audio") is not None
+    clock.now = 20.0
+    assert cache.get("k", "audio") is None
+    assert len(cache) == 0
+    assert cache.size_bytes == 0
+
+
+def test_lru_eviction_by_bytes():
+    """Least recently used entries go first when the byte budget is exceeded"""
+    cache = AnalysisCache(max_bytes=3 * 64000)
+    for key in ("a", "b", "c"):
+        cache.put(key, "audio", np.zeros(16000, dtype=np.float32))  # 64 kB each
+    cache.get("a", "audio")
+    cache.put("d", "audio", np.zeros(16000, dtype=np.float32))
+    assert cache.get("b", "audio") is None
+    assert cache.get("a", "audio") is not None
+    assert cache.size_bytes <= 3 * 64000
+
+
+def test_concurrent_callers_compute_once():
+    """Concurrent requests for the same audio share one computation"""
+    cache = AnalysisCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return "text"
+
+    threads = [threading.Thread(target=cache.get_or_compute, args=("k", "transcription", compute)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
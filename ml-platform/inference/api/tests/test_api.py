@@ -0,0 +1,173 @@
+"""Tests for the ML API endpoints, with a fake speech-to-text model"""
+import io
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("slowapi")
+pytest.importorskip("multipart")
+pytest.importorskip("httpx")  # TestClient
+sf = pytest.importorskip("soundfile")
+from fastapi.testclient import TestClient
+
+from tests.test_models_onnx import TINY_TOKENS, tiny_decoder_model, tiny_encoder_model
+
+API_KEY = "test-key"
+HEADERS = {"X-API-Key": API_KEY}
+
+
+class FakeSTT:
+    """transcribe_batch blocks until `release` is set (set by default) and counts its calls"""
+    backend = "fake"
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def transcribe_batch(self, audios, sample_rate):
+        self.calls.append(len(audios))
+        assert self.release.wait(10)
+        return [{"text": " hello world", "confidence": 0.9, "language": "en",
+                 "duration": len(audio) / sample_rate} for audio in audios]
+
+
+@pytest.fixture(scope="module")
+def main(tmp_path_factory):
+    """main.py imported against a tiny ONNX Whisper export (the fake model replaces it per test, each test uses its own audio)"""
+    models_dir = tmp_path_factory.mktemp("models")
+    tiny_encoder_model(models_dir / "whisper_tiny.onnx", "n_frames")
+    tiny_decoder_model(models_dir, [0, TINY_TOKENS['eot']], prefix="whisper_tiny")
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in {"MODELS_DIR": str(models_dir), "STT_BACKEND": "onnx", "WHISPER_MODEL_SIZE": "tiny",
+                            "ML_API_KEY": API_KEY, "RATE_LIMIT": "1000/minute"}.items():
+            mp.setenv(name, value)
+        import main
+    return main
+
+
+@pytest.fixture(scope="module")
+def client(main):
+    # one event loop for the module, as in the server: the batcher and job queues are bound to it
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def api(main, client, monkeypatch):
+    stt = FakeSTT()
+    monkeypatch.setattr(main, "stt_model", stt)
+    yield client, stt
+    stt.release.set()
+
+
+def wav_bytes(seed: int, seconds: float = 1.0) -> bytes:
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    sf.write(buffer, (0.1 * rng.standard_normal(int(16000 * seconds))).astype(np.float32), 16000, format="WAV")
+    return buffer.getvalue()
+
+
+def post(client, path, data):
+    return client.post(path, files={"file": ("clip.wav", data, "audio/wav")}, headers=HEADERS)
+
+
+def in_threads(fn, n):
+    results = [None] * n
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, fn())) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_requests_for_one_upload_share_a_transcription(api, main, monkeypatch):
+    client, stt = api
+    waiting = []
+    transcribe_once = main.transcribe_once
+
+    async def counting_transcribe_once(key, audio):
+        waiting.append(key)
+        return await transcribe_once(key, audio)
+
+    monkeypatch.setattr(main, "transcribe_once", counting_transcribe_once)
+    stt.release.clear()
+    data = wav_bytes(0)
+    threads, responses = in_threads(lambda: post(client, "/api/transcribe", data), 3)
+    # all three requests wait for the transcription still in flight
+    wait_until(lambda: len(waiting) == 3 and stt.calls == [1])
+    assert main.analysis_cache.get(main.file_key(io.BytesIO(data)), "transcription") is None
+    stt.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert sorted(r.json()["cached"] for r in responses) == [False, True, True]
+    assert stt.calls == [1]
+    assert main.pending_transcriptions == {}
+    # the result is cached for the other endpoints
+    assert post(client, "/api/analyze", data).json()["cached"] is True
+    assert stt.calls == [1]
+
+
+def test_full_inference_queue_returns_503(api, main, monkeypatch):
+    client, stt = api
+    monkeypatch.setattr(main, "INFERENCE_MAX_PENDING", 1)
+    stt.release.clear()
+    threads, first = in_threads(lambda: post(client, "/api/transcribe", wav_bytes(1)), 1)
+    wait_until(lambda: stt.calls == [1])
+
+    response = post(client, "/api/transcribe", wav_bytes(2))
+    assert response.status_code == 503
+    stt.release.set()
+    threads[0].join()
+    assert first[0].status_code == 200
+    assert post(client, "/api/transcribe", wav_bytes(2)).status_code == 200
+
+
+def test_oversized_uploads_return_413(api, main, monkeypatch):
+    client, stt = api
+    monkeypatch.setattr(main, "MAX_FILE_SIZE", 1000)
+    # declared body beyond the cap: refused by the middleware before it is read
+    response = post(client, "/api/transcribe", wav_bytes(3))
+    assert response.status_code == 413 and "too large" in response.json()["detail"]
+    # within the multipart allowance but the file itself is too large
+    response = post(client, "/api/transcribe", b"\0" * 2000)
+    assert response.status_code == 413
+    assert stt.calls == []
+
+
+def test_job_submit_poll_events_and_cancel(api, main):
+    client, stt = api
+    response = post(client, "/api/jobs", wav_bytes(4))
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = lambda: client.get(f"/api/jobs/{job_id}", headers=HEADERS).json()
+    wait_until(lambda: job()["status"] in ("succeeded", "failed"))
+    assert job()["status"] == "succeeded" and job()["result"]["text"] == " hello world"
+
+    events = client.get(f"/api/jobs/{job_id}/events", headers=HEADERS)
+    assert events.headers["content-type"].startswith("text/event-stream")
+    states = [json.loads(line[len("data: "):]) for line in events.text.splitlines() if line.startswith("data: ")]
+    assert states[-1]["status"] == "succeeded"
+
+    stt.release.clear()
+    job_id = post(client, "/api/jobs", wav_bytes(5)).json()["job_id"]
+    assert client.delete(f"/api/jobs/{job_id}", headers=HEADERS).status_code == 200
+    stt.release.set()
+    wait_until(lambda: job()["status"] == "cancelled")
+    assert client.get("/api/jobs/unknown", headers=HEADERS).status_code == 404
+
+    preflight = client.options(f"/api/jobs/{job_id}", headers={
+        "Origin": "http://localhost:3000", "Access-Control-Request-Method": "DELETE"})
+    assert preflight.status_code == 200 and "DELETE" in preflight.headers["access-control-allow-methods"]
@@ -0,0 +1,64 @@
+"""Tests for upload decoding straight from the spooled file"""
+import io
+import shutil
+import subprocess
+from tempfile import SpooledTemporaryFile
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from analysis_cache import audio_key
+from audio_io import decode_audio, file_key, upload_size
+
+
+def wav_bytes(seconds=1.0, sr=44100, channels=2):
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    sf.write(buffer, 0.1 * rng.standard_normal((int(seconds * sr), channels)), sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def spooled(data, max_size):
+    upload = SpooledTemporaryFile(max_size=max_size)
+    upload.write(data)
+    upload.seek(0)
+    return upload
+
+
+@pytest.mark.parametrize("max_size", [1024 * 1024, 1024], ids=["in-memory", "rolled-over"])
+def test_decode_matches_librosa_load(max_size):
+    """Decoding the spool gives the same PCM as librosa.load of the bytes"""
+    data = wav_bytes()
+    audio = decode_audio(spooled(data, max_size))
+
+    expected, _ = librosa.load(io.BytesIO(data), sr=16000)
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, expected)
+
+
+def test_size_and_key_without_consuming_upload():
+    """Size and cache key leave the upload readable from the start"""
+    data = wav_bytes(seconds=0.2)
+    upload = spooled(data, 1024)
+
+    assert upload_size(upload) == len(data)
+    assert file_key(upload) == audio_key(data)
+    assert upload.read() == data
+
+
+def test_undecodable_upload_raises():
+    upload = spooled(b"not audio at all", 1024)
+    with pytest.raises((sf.LibsndfileError, subprocess.CalledProcessError)):
+        decode_audio(upload)
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_fallback():
+    """Containers libsndfile can't read are decoded through ffmpeg"""
+    data = subprocess.run(["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+                           "-f", "adts", "pipe:1"], capture_output=True, check=True).stdout
+    audio = decode_audio(spooled(data, 1024 * 1024))
+    assert audio.dtype == np.float32
+    assert abs(len(audio) - 16000) < 2048
@@ -0,0 +1,60 @@
+"""Tests for the micro-batching scheduler"""
+import asyncio
+
+from batching import BatchScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_requests_share_a_batch():
+    """Requests arriving within max_wait are processed together, in order"""
+    sizes = []
+
+    def process(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    async def main():
+        scheduler = BatchScheduler(process, max_batch=4, max_wait_ms=20)
+        return await asyncio.gather(*(scheduler.submit(i) for i in range(6)))
+
+    assert run(main()) == [0, 2, 4, 6, 8, 10]
+    assert sizes == [4, 2]
+
+
+def test_lone_request_waits_at_most_max_wait():
+    """A single request is flushed after max_wait"""
+    waits = []
+
+    async def main():
+        scheduler = BatchScheduler(lambda items: items, max_batch=8, max_wait_ms=5,
+                                   on_batch=lambda size, queued: waits.extend(queued))
+        return await scheduler.submit("x")
+
+    assert run(main()) == "x"
+    assert len(waits) == 1 and waits[0] < 1.0
+
+
+def test_batch_errors_reach_every_caller():
+    """A failing batch raises in each waiting request"""
+    def process(items):
+        raise ValueError("model failed")
+
+    async def main():
+        scheduler = BatchScheduler(process, max_batch=4, max_wait_ms=5)
+        return await asyncio.gather(*(scheduler.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_result_count_mismatch_is_an_error():
+    """process_batch must return one result per item"""
+    async def main():
+        scheduler = BatchScheduler(lambda items: items[:1], max_batch=4, max_wait_ms=5)
+        return await asyncio.gather(*(scheduler.submit(i) for i in range(2)), return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
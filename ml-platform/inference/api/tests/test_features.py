@@ -0,0 +1,110 @@
+"""Tests for the single-pass acoustic feature engine"""
+from concurrent.futures import ThreadPoolExecutor
+
+import librosa
+import numpy as np
+import pytest
+
+from features import (
+    EMOTION_FEATURE_DIM,
+    EmotionFeatureAccumulator,
+    emotion_features,
+    emotion_features_batch,
+    extract_frame_features,
+    segment_frames,
+    segment_means,
+)
+
+SR = 16000
+
+
+@pytest.fixture(scope="module")
+def clip():
+    rng = np.random.default_rng(0)
+    t = np.arange(3 * SR) / SR
+    voice = 0.2 * np.sin(2 * np.pi * (150 + 30 * np.sin(2 * t)) * t) * (1 + np.sin(3 * t))
+    return (voice + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def test_features_match_librosa(clip):
+    """Every frame-level feature equals its standalone librosa computation"""
+    features = extract_frame_features(clip, SR)
+
+    np.testing.assert_array_equal(features.mfcc, librosa.feature.mfcc(y=clip, sr=SR, n_mfcc=13))
+    np.testing.assert_allclose(features.centroid, librosa.feature.spectral_centroid(y=clip, sr=SR)[0], rtol=1e-6)
+    np.testing.assert_array_equal(features.rolloff, librosa.feature.spectral_rolloff(y=clip, sr=SR)[0])
+    np.testing.assert_array_equal(features.zcr, librosa.feature.zero_crossing_rate(clip)[0])
+    np.testing.assert_array_equal(features.rms, librosa.feature.rms(y=clip)[0])
+
+
+def test_pitch_is_strongest_candidate(clip):
+    """Per-frame pitch is the piptrack candidate with the largest magnitude"""
+    features = extract_frame_features(clip, SR)
+    pitches, magnitudes = librosa.piptrack(y=clip, sr=SR)
+    expected = np.array([pitches[magnitudes[:, t].argmax(), t] for t in range(pitches.shape[1])])
+
+    np.testing.assert_array_equal(features.pitch, expected)
+    assert np.all(features.voiced_pitch > 0)
+
+
+def test_segment_means():
+    """Segment statistics are means over the frames covering each sample range"""
+    values = np.arange(10, dtype=np.float32)
+    first, last = segment_frames([0, 1024, 4000], [1024, 4000, 4100], n_frames=10, hop_length=512)
+
+    assert first.tolist() == [0, 2, 7]
+    assert last.tolist() == [2, 8, 9]
+    np.testing.assert_allclose(segment_means(values, first, last),
+                               [values[0:2].mean(), values[2:8].mean(), values[7:9].mean()])
+
+
+def test_short_segments_keep_one_frame():
+    """A range shorter than a hop still maps to a frame inside the clip"""
+    first, last = segment_frames([5000], [5001], n_frames=4, hop_length=512)
+    assert first.tolist() == [3]
+    assert last.tolist() == [4]
+
+
+def reference_emotion_features(y, sr):
+    """The per-feature librosa computation the emotion model was trained on"""
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=40)
+    pitch, _ = librosa.piptrack(y=y, sr=sr)
+    voiced = pitch[pitch > 0]
+    rms = librosa.feature.rms(y=y)[0]
+    return np.concatenate([
+        np.mean(mfccs, axis=1), np.std(mfccs, axis=1),
+        [np.mean(voiced), np.std(voiced), np.mean(rms), np.std(rms)],
+        [np.mean(librosa.feature.spectral_centroid(y=y, sr=sr)[0]),
+         np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr)[0])],
+    ]).astype(np.float32)
+
+
+def test_emotion_features_match_librosa(clip):
+    features = emotion_features(clip, SR)
+
+    assert features.shape == (EMOTION_FEATURE_DIM,)
+    np.testing.assert_allclose(features, reference_emotion_features(clip, SR), rtol=1e-5)
+
+
+def test_emotion_features_batch(clip):
+    batch = emotion_features_batch([clip, clip[:SR]], SR)
+
+    assert batch.shape == (2, EMOTION_FEATURE_DIM)
+    np.testing.assert_array_equal(batch[1], emotion_features(clip[:SR], SR))
+    assert emotion_features_batch([], SR).shape == (0, EMOTION_FEATURE_DIM)
+    with ThreadPoolExecutor(2) as executor:
+        np.testing.assert_array_equal(emotion_features_batch([clip, clip[:SR]], SR, executor), batch)
+
+
+def test_accumulator_matches_whole_clip(clip):
+    """Chunks of any size give the whole-clip features (up to the per-chunk dB floor)"""
+    accumulator = EmotionFeatureAccumulator(SR)
+    for start in range(0, clip.size, 3001):
+        accumulator.update(clip[start:start + 3001])
+
+    assert accumulator.n_samples == clip.size
+    np.testing.assert_allclose(accumulator.features(), emotion_features(clip, SR), rtol=1e-4, atol=1e-3)
+    # Reading features does not close the stream
+    accumulator.update(clip[:SR])
+    np.testing.assert_allclose(accumulator.features(), emotion_features(np.concatenate([clip, clip[:SR]]), SR),
+                               rtol=1e-4, atol=1e-3)
@@ -0,0 +1,111 @@
+"""Tests for the in-process job queue"""
+import asyncio
+
+import pytest
+
+from jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobManager, JobQueueFull
+
+
+class Payload:
+    def __init__(self, value):
+        self.value = value
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_job_runs_and_keeps_result():
+    """Submitted jobs run in the background and keep their result"""
+    async def handler(job):
+        await asyncio.sleep(0)
+        return {"double": job.payload.value * 2}
+
+    async def main():
+        manager = JobManager(handler)
+        payload = Payload(21)
+        job = manager.submit("analyze", payload)
+        assert job.status == QUEUED
+        states = [state["status"] async for state in manager.watch(job) if state]
+        return manager, job, payload, states
+
+    manager, job, payload, states = asyncio.run(main())
+    assert states == [QUEUED, RUNNING, SUCCEEDED]
+    assert manager.get(job.id).result == {"double": 42}
+    assert payload.closed and job.payload is None
+
+
+def test_failed_job_reports_error():
+    async def handler(job):
+        raise ValueError("undecodable audio")
+
+    async def main():
+        manager = JobManager(handler)
+        job = manager.submit("analyze", None)
+        async for _ in manager.watch(job):
+            pass
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == FAILED
+    assert job.error == "undecodable audio"
+
+
+def test_full_queue_sheds_load():
+    """Submissions beyond max_queued are refused instead of piling up"""
+    async def handler(job):
+        await asyncio.sleep(1)
+
+    async def main():
+        manager = JobManager(handler, workers=1, max_queued=2)
+        manager.submit("analyze", None)
+        manager.submit("analyze", None)
+        with pytest.raises(JobQueueFull):
+            manager.submit("analyze", None)
+        for task in manager._tasks:
+            task.cancel()
+
+    asyncio.run(main())
+
+
+def test_cancel_queued_and_running_jobs():
+    started = []
+
+    async def handler(job):
+        started.append(job.id)
+        await asyncio.sleep(10)
+
+    async def main():
+        manager = JobManager(handler, workers=1)
+        running = manager.submit("analyze", Payload(1))
+        queued = manager.submit("analyze", Payload(2))
+        await asyncio.sleep(0.01)
+        assert running.status == RUNNING
+
+        manager.cancel(queued.id)
+        manager.cancel(running.id)
+        await asyncio.sleep(0.01)
+        return running, queued
+
+    running, queued = asyncio.run(main())
+    assert (running.status, queued.status) == (CANCELLED, CANCELLED)
+    assert started == [running.id]
+
+
+def test_finished_jobs_expire():
+    """Results are retained for retention_s, then dropped"""
+    now = [1000.0]
+
+    async def handler(job):
+        return "ok"
+
+    async def main():
+        manager = JobManager(handler, retention_s=60, clock=lambda: now[0])
+        job = manager.submit("analyze", None)
+        async for _ in manager.watch(job):
+            pass
+        assert manager.get(job.id) is job
+        now[0] += 61
+        return manager.get(job.id)
+
+    assert asyncio.run(main()) is None
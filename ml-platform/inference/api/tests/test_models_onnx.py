@@ -1,7 +1,146 @@
 """Tests for ONNX models"""
+import importlib.util
+from pathlib import Path
+
 import pytest
 import numpy as np
 
+TOOLS_DIR = Path(__file__).resolve().parents[3] / "tools"
+
+
+def load_converter():
+    """Import tools/convert_to_onnx.py (needs onnx + onnxruntime, not torch)"""
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime.quantization")
+    spec = importlib.util.spec_from_file_location("convert_to_onnx", TOOLS_DIR / "convert_to_onnx.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def tiny_encoder_model(path: Path, frames_dim) -> Path:
+    """Stride-2 conv stand-in for the Whisper encoder ([B, 80, T] -> [B, T/2, 8])"""
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    weight = np.random.default_rng(0).standard_normal((8, 80, 3)).astype(np.float32) * 0.1
+    nodes = [
+        helper.make_node("Conv", ["mel_spectrogram", "w"], ["c"], pads=[1, 1], strides=[2]),
+        helper.make_node("Transpose", ["c"], ["encoder_output"], perm=[0, 2, 1]),
+    ]
+    graph = helper.make_graph(
+        nodes, "encoder",
+        [helper.make_tensor_value_info("mel_spectrogram", TensorProto.FLOAT, ["batch_size", 80, frames_dim])],
+        [helper.make_tensor_value_info("encoder_output", TensorProto.FLOAT, None)],
+        [numpy_helper.from_array(weight, "w")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8)
+    onnx.save(model, str(path))
+    return path
+
+
+TINY_VOCAB = ["h", "e", "l", "o", " ", "w", "r", "d", "!", "x"]
+TINY_TOKENS = {'eot': 10, 'sot': 11, 'transcribe': 12, 'translate': 13, 'no_timestamps': 14, 'timestamp_begin': 15}
+
+
+def tiny_decoder_model(directory: Path, script, prefix: str = "whisper_base", state: int = 8) -> None:
+    """
+    Decoder export stand-in with the real I/O contract whose next token is
+    scripted by sequence length (row n of `script` follows n tokens)
+    """
+    import base64
+    import json
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    n_vocab, n_ctx = 20, 32
+    table = np.zeros((n_ctx, n_vocab), dtype=np.float32)
+    for position, token in enumerate(script, start=2):
+        table[position, token] = 5.0
+    embedding = np.random.default_rng(0).standard_normal((n_vocab, state)).astype(np.float32)
+    inits = [
+        numpy_helper.from_array(table, "table"),
+        numpy_helper.from_array(embedding, "embedding"),
+        numpy_helper.from_array(np.array([0], dtype=np.int64), "axis0"),
+        numpy_helper.from_array(np.array([1], dtype=np.int64), "axis1"),
+        numpy_helper.from_array(np.array([1, 2], dtype=np.int64), "axes12"),
+        numpy_helper.from_array(np.array(2, dtype=np.int64), "two"),
+        numpy_helper.from_array(np.array(0.0, dtype=np.float32), "zero"),
+    ]
+    nodes = [
+        helper.make_node("Gather", ["embedding", "tokens"], ["emb"]),
+        helper.make_node("Unsqueeze", ["emb", "axis0"], ["new_kv"]),
+        helper.make_node("Concat", ["past_k", "new_kv"], ["present_k"], axis=2),
+        helper.make_node("Concat", ["past_v", "new_kv"], ["present_v"], axis=2),
+        helper.make_node("Shape", ["present_k"], ["shape"]),
+        helper.make_node("Gather", ["shape", "two"], ["n_total"]),
+        helper.make_node("Gather", ["table", "n_total"], ["row"]),
+        helper.make_node("ReduceSum", ["emb", "axes12"], ["per_batch"], keepdims=0),
+        helper.make_node("Mul", ["per_batch", "zero"], ["zeros"]),
+        helper.make_node("Unsqueeze", ["zeros", "axis1"], ["zeros_col"]),
+        helper.make_node("Add", ["zeros_col", "row"], ["logits"]),
+    ]
+    kv = lambda name, dim: helper.make_tensor_value_info(name, TensorProto.FLOAT, [1, "batch_size", dim, state])
+    graph = helper.make_graph(
+        nodes, "decoder",
+        [helper.make_tensor_value_info("tokens", TensorProto.INT64, ["batch_size", "n_tokens"]),
+         kv("cross_k", "n_ctx"), kv("cross_v", "n_ctx"), kv("past_k", "n_past"), kv("past_v", "n_past")],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch_size", n_vocab]),
+         kv("present_k", "n_total"), kv("present_v", "n_total")],
+        inits,
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8),
+              str(directory / f"{prefix}_decoder.onnx"))
+
+    # Cross K/V: encoder_output [B, n_ctx, 8] -> [1, B, n_ctx, 8]
+    graph = helper.make_graph(
+        [helper.make_node("Unsqueeze", ["encoder_output", "axis0"], ["cross_k"]),
+         helper.make_node("Identity", ["cross_k"], ["cross_v"])],
+        "cross_kv",
+        [helper.make_tensor_value_info("encoder_output", TensorProto.FLOAT, ["batch_size", "n_ctx", state])],
+        [kv("cross_k", "n_ctx"), kv("cross_v", "n_ctx")],
+        [numpy_helper.from_array(np.array([0], dtype=np.int64), "axis0")],
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8),
+              str(directory / f"{prefix}_cross_kv.onnx"))
+
+    config = {
+        'n_layer': 1, 'n_head': 1, 'n_state': state, 'n_vocab': n_vocab, 'n_text_ctx': n_ctx,
+        'multilingual': False, 'tokens': TINY_TOKENS, 'language_tokens': {},
+        'suppress_tokens': [9], 'blank_tokens': [4],
+        'vocab': [base64.b64encode(t.encode()).decode("ascii") for t in TINY_VOCAB],
+    }
+    (directory / f"{prefix}_decoder.json").write_text(json.dumps(config))
+
+
+def tiny_emotion_model(path: Path, n_features: int = 86) -> Path:
+    """n_features (86) -> 64 -> 7 MLP with softmax, same I/O names as the emotion export"""
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    rng = np.random.default_rng(0)
+    inits = [
+        numpy_helper.from_array(rng.standard_normal((n_features, 64)).astype(np.float32) * 0.1, "w1"),
+        numpy_helper.from_array(np.zeros(64, np.float32), "b1"),
+        numpy_helper.from_array(rng.standard_normal((64, 7)).astype(np.float32) * 0.1, "w2"),
+        numpy_helper.from_array(np.zeros(7, np.float32), "b2"),
+    ]
+    nodes = [
+        helper.make_node("Gemm", ["features", "w1", "b1"], ["h"]),
+        helper.make_node("Relu", ["h"], ["hr"]),
+        helper.make_node("Gemm", ["hr", "w2", "b2"], ["logits"]),
+        helper.make_node("Softmax", ["logits"], ["probabilities"], axis=1),
+    ]
+    graph = helper.make_graph(
+        nodes, "emotion",
+        [helper.make_tensor_value_info("features", TensorProto.FLOAT, ["batch_size", n_features])],
+        [helper.make_tensor_value_info("probabilities", TensorProto.FLOAT, ["batch_size", 7])],
+        inits,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8)
+    onnx.save(model, str(path))
+    return path
+
 
 class TestONNXSpeechToText:
     """Tests for ONNX Speech-to-Text model"""
@@ -26,6 +165,134 @@ class TestONNXSpeechToText:
         expected_shape = (80, -1)  # 80 mel bands, variable time steps
         assert n_mels == expected_shape[0]
 
+    def test_frame_bucket_selection(self):
+        """Clips are padded to the smallest bucket that holds them"""
+        from models_onnx import bucket_frames, DEFAULT_FRAME_BUCKETS
+
+        assert bucket_frames(1, DEFAULT_FRAME_BUCKETS) == 500
+        assert bucket_frames(500, DEFAULT_FRAME_BUCKETS) == 500
+        assert bucket_frames(501, DEFAULT_FRAME_BUCKETS) == 1000
+        assert bucket_frames(4000, DEFAULT_FRAME_BUCKETS) == 3000
+
+    @pytest.mark.parametrize("frames_dim,expected", [("n_frames", 500), (3000, 3000)])
+    def test_bucket_padding_follows_export(self, tmp_path, frames_dim, expected):
+        """Dynamic-length encoders get bucket padding, fixed ones the 30 s window"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", frames_dim)
+        stt = ONNXSpeechToText(str(path))
+        assert stt.dynamic_length is (frames_dim == "n_frames")
+
+        audio = np.random.default_rng(0).standard_normal(3 * 16000).astype(np.float32)
+        mel = stt.preprocess_audio(audio, 16000)
+        assert mel.shape == (80, expected)
+        output = stt.session.run(None, {"mel_spectrogram": mel[None]})[0]
+        assert output.shape[1] == expected // 2
+
+    @pytest.mark.parametrize("beam_size", [1, 3])
+    def test_transcribe_decodes_with_kv_cache(self, tmp_path, beam_size):
+        """Encoder + cached decoder produce text and token log-probs"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        hello = [0, 1, 2, 2, 3, 4, 5, 3, 6, 2, 7, TINY_TOKENS['eot']]
+        tiny_decoder_model(tmp_path, hello)
+        stt = ONNXSpeechToText(str(path), beam_size=beam_size)
+
+        audio = np.random.default_rng(0).standard_normal(16000).astype(np.float32)
+        result = stt.transcribe(audio, 16000)
+        assert result['text'] == "hello world"
+        assert 0.0 < result['confidence'] <= 1.0
+        assert np.isclose(result['confidence'], np.exp(result['avg_logprob']))
+
+    def test_transcribe_batch_matches_single(self, tmp_path):
+        """Batched encoder + lockstep decoding give the per-clip results"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        tiny_decoder_model(tmp_path, [0, 1, 2, 2, 3, TINY_TOKENS['eot']])
+        stt = ONNXSpeechToText(str(path))
+
+        rng = np.random.default_rng(0)
+        audios = [rng.standard_normal(n).astype(np.float32) for n in (8000, 16000 * 7, 16000)]
+        batched = stt.transcribe_batch(audios, 16000)
+        single = [stt.transcribe(a, 16000) for a in audios]
+        assert [r['text'] for r in batched] == [r['text'] for r in single] == ["hello"] * 3
+        assert [r['duration'] for r in batched] == [0.5, 7.0, 1.0]
+        assert np.allclose([r['avg_logprob'] for r in batched], [r['avg_logprob'] for r in single])
+
+    @pytest.mark.parametrize("frames_dim", ["n_frames", 3000])
+    def test_long_clips_are_transcribed_in_30s_windows(self, tmp_path, frames_dim):
+        """Audio past the 30 s window is transcribed too, not dropped"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", frames_dim)
+        tiny_decoder_model(tmp_path, [0, 1, 2, 2, 3, TINY_TOKENS['eot']])
+        stt = ONNXSpeechToText(str(path))
+
+        rng = np.random.default_rng(0)
+        long_clip = rng.standard_normal(16000 * 70).astype(np.float32) * 0.1  # windows of 30 + 30 + 10 s
+        results = stt.transcribe_batch([long_clip, rng.standard_normal(16000).astype(np.float32)], 16000)
+
+        assert [r['text'] for r in results] == ["hello hello hello", "hello"]
+        assert results[0]['duration'] == 70.0
+        assert stt.transcribe(long_clip, 16000)['text'] == "hello hello hello"
+        assert np.isclose(results[0]['avg_logprob'], results[1]['avg_logprob'])
+
+    @pytest.mark.parametrize("beam_size", [1, 3])
+    def test_timestamp_tokens_give_timed_segments(self, tmp_path, beam_size):
+        """With timestamps, Whisper's timestamp tokens split each window's text into timed segments"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        ts = lambda seconds: TINY_TOKENS['timestamp_begin'] + round(seconds / 0.02)
+        # The prompt is one token shorter (no <|notimestamps|>): the first, unscripted
+        # token is the forced initial timestamp <|0.00|>
+        script = [0, 1, 2, 2, 3, ts(0.04), ts(0.04), 4, 5, 3, 6, 2, 7, ts(0.08), TINY_TOKENS['eot']]
+        tiny_decoder_model(tmp_path, script)
+        stt = ONNXSpeechToText(str(path), beam_size=beam_size, timestamps=True)
+
+        rng = np.random.default_rng(0)
+        clip, long_clip = (rng.standard_normal(n).astype(np.float32) * 0.1 for n in (16000, 16000 * 40))
+        results = stt.transcribe_batch([clip, long_clip], 16000)
+        assert [r['text'] for r in results] == ["hello world", "hello world hello world"]
+        expected = [(0.0, 0.04, "hello"), (0.04, 0.08, "world")]
+        assert [(s['start'], s['end'], s['text']) for s in results[0]['segments']] == pytest.approx(expected)
+        assert [(s['start'], s['end'], s['text']) for s in results[1]['segments']] == pytest.approx(
+            expected + [(30 + start, 30 + end, text) for start, end, text in expected])
+        # timestamp tokens do not count towards the confidence
+        assert np.isclose(results[0]['confidence'], np.exp(results[0]['avg_logprob']))
+        assert 'segments' not in ONNXSpeechToText(str(path)).transcribe(clip, 16000)
+
+    def test_first_token_suppression(self, tmp_path):
+        """Blank/end-of-text first tokens and suppressed tokens are never sampled"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        tiny_decoder_model(tmp_path, [4, 9, TINY_TOKENS['eot']])
+        stt = ONNXSpeechToText(str(path))
+        _, tokens, _ = stt.decoder.decode(np.zeros((1, 4, 8), dtype=np.float32))
+        assert tokens[0] not in (4, TINY_TOKENS['eot'])
+        assert 9 not in tokens
+
+    def test_transcribe_requires_decoder(self, tmp_path):
+        """Encoder-only exports cannot produce text"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        stt = ONNXSpeechToText(str(path))
+        assert stt.decoder is None
+        with pytest.raises(RuntimeError):
+            stt.transcribe(np.zeros(16000, dtype=np.float32), 16000)
+
+    def test_invalid_frame_buckets(self, tmp_path):
+        """Odd or oversized buckets are rejected"""
+        from models_onnx import ONNXSpeechToText
+
+        path = tiny_encoder_model(tmp_path / "whisper_base.onnx", "n_frames")
+        with pytest.raises(ValueError):
+            ONNXSpeechToText(str(path), frame_buckets=(501, 3000))
+
 
 class TestONNXEmotionAnalyzer:
     """Tests for ONNX Emotion Analyzer"""
@@ -37,6 +304,47 @@ class TestONNXEmotionAnalyzer:
         assert 'neutral' in emotions
         assert 'happy' in emotions
 
+    def test_analyze_with_exported_model(self, tmp_path):
+        """Extracted features fit the model input and yield a distribution"""
+        from models_onnx import ONNXEmotionAnalyzer
+
+        analyzer = ONNXEmotionAnalyzer(str(tiny_emotion_model(tmp_path / "emotion_analyzer.onnx")))
+        audio = np.random.default_rng(0).standard_normal(16000).astype(np.float32) * 0.1
+        result = analyzer.analyze(audio, 16000)
+
+        assert result['emotion'] in analyzer.emotion_labels
+        assert np.isclose(sum(result['distribution'].values()), 1.0, atol=1e-5)
+
+    def test_analyze_batch_matches_single_clips(self, tmp_path):
+        """One batched model call gives each clip's single-clip result"""
+        from concurrent.futures import ThreadPoolExecutor
+        from models_onnx import EMOTION_AROUSAL, EMOTION_VALENCE, ONNXEmotionAnalyzer
+
+        analyzer = ONNXEmotionAnalyzer(str(tiny_emotion_model(tmp_path / "emotion_analyzer.onnx")))
+        rng = np.random.default_rng(0)
+        audios = [rng.standard_normal(n).astype(np.float32) * 0.1 for n in (8000, 16000, 24000)]
+        with ThreadPoolExecutor(2) as executor:
+            results = analyzer.analyze_batch(audios, 16000, executor)
+
+        assert len(results) == 3
+        for audio, result in zip(audios, results):
+            single = analyzer.analyze(audio, 16000)
+            assert result['emotion'] == single['emotion']
+            for label, prob in single['distribution'].items():
+                assert np.isclose(result['distribution'][label], prob, atol=1e-6)
+            distribution = result['distribution']
+            assert np.isclose(result['valence'], sum(p * EMOTION_VALENCE[label] for label, p in distribution.items()))
+            assert np.isclose(result['arousal'], sum(p * EMOTION_AROUSAL[label] for label, p in distribution.items()))
+        assert analyzer.analyze_batch([], 16000) == []
+
+    def test_feature_size_mismatch_fails_at_load(self, tmp_path):
+        """A model trained on another feature layout is rejected when loaded, not per request"""
+        from models_onnx import ONNXEmotionAnalyzer
+
+        path = tiny_emotion_model(tmp_path / "emotion_analyzer.onnx", n_features=80)
+        with pytest.raises(ValueError, match="86"):
+            ONNXEmotionAnalyzer(str(path))
+
     def test_confidence_range(self):
         """Test that confidence scores are in valid range"""
         # Simulate softmax output
@@ -73,12 +381,137 @@ class TestModelConversion:
 
     def test_quantization_config(self):
         """Test model quantization settings"""
-        quantization = {
-            'enabled': True,
-            'type': 'dynamic',  # or 'static'
-            'per_channel': False
-        }
-        assert quantization['type'] in ['dynamic', 'static']
+        converter = load_converter()
+        for mode in converter.QUANTIZATION_MODES:
+            quantization = converter.quantization_config(mode)
+            assert quantization['enabled'] is True
+            assert quantization['type'] in ['dynamic', 'static']
+            assert quantization['per_channel'] is False
+        with pytest.raises(ValueError):
+            converter.quantization_config('fp16')
+
+    @pytest.mark.parametrize("mode", ["dynamic", "static"])
+    def test_int8_quantization_report(self, tmp_path, mode):
+        """INT8 model is produced and compared against FP32"""
+        converter = load_converter()
+        fp32 = tiny_emotion_model(tmp_path / "emotion_analyzer.onnx")
+        feeds = converter.model_inputs(fp32, "emotion", None, count=8)
+
+        int8 = converter.quantize_model(fp32, mode, feeds)
+        assert int8.name == "emotion_analyzer.int8.onnx"
+        assert int8.exists()
+
+        report = converter.compare_models(fp32, int8, feeds, runs=2)
+        assert report['size_mb']['int8'] < report['size_mb']['fp32']
+        assert set(report['latency_ms']['int8']) == {'p50', 'p95'}
+        assert report['divergence']['max_abs'] < 0.1
+        assert report['divergence']['cosine'] > 0.99
+
+    def test_manifest_entries_are_served_by_factory(self, tmp_path):
+        """Models registered by the converter load through ModelFactory and are verified"""
+        import json
+        from models_onnx import ModelFactory
+
+        converter = load_converter()
+        path = tiny_emotion_model(tmp_path / "emotion_analyzer.onnx")
+        entry = converter.manifest_entry(path, "emotion", "1", "emotion")
+        assert entry['inputs'] == {'features': ['batch_size', 86]}
+        converter.update_manifest(str(tmp_path), [entry])
+        converter.update_manifest(str(tmp_path), [dict(entry)])  # re-registering replaces the entry
+        assert len(json.loads((tmp_path / "manifest.json").read_text())['models']) == 1
+
+        analyzer = ModelFactory.create_emotion_analyzer(str(tmp_path), version="1")
+        assert ModelFactory.create_emotion_analyzer(str(tmp_path)) is analyzer
+
+        tampered = tmp_path / "tampered"
+        tampered.mkdir()
+        tiny_emotion_model(tampered / "emotion_analyzer.onnx", n_features=80)
+        converter.update_manifest(str(tampered), [dict(entry)])
+        with pytest.raises(ValueError, match="checksum"):
+            ModelFactory.create_emotion_analyzer(str(tampered))
+
+    def test_quantized_whisper_entry(self, tmp_path):
+        """INT8 entries are labelled as discovery labels them, companion files are checksummed"""
+        import shutil
+        from models_onnx import ModelFactory
+        from registry import discover_models
+
+        converter = load_converter()
+        tiny_encoder_model(tmp_path / "whisper_tiny.int8.onnx", "n_frames")
+        tiny_decoder_model(tmp_path, [0, TINY_TOKENS['eot']], prefix="whisper_tiny")
+        assert discover_models(tmp_path)[0].quantization == "int8"
+        tampered = tmp_path / "tampered"
+        shutil.copytree(tmp_path, tampered)
+
+        entry = converter.manifest_entry(tmp_path / "whisper_tiny.int8.onnx", "whisper", "tiny", "speech_to_text",
+                                         quantization="dynamic", files=converter.whisper_companion_files("tiny"))
+        assert entry['quantization'] == "int8" and entry['quantization_mode'] == "dynamic"
+        assert sorted(entry['files_sha256']) == sorted(entry['files']) and len(entry['files']) == 3
+        converter.update_manifest(str(tmp_path), [entry])
+        model = ModelFactory.create_speech_to_text(str(tmp_path), model_size="tiny", quantization="int8")
+        assert model.backend == "onnx"
+        with pytest.raises(FileNotFoundError, match="dynamic"):  # no silent PyTorch fallback
+            ModelFactory.create_speech_to_text(str(tmp_path), model_size="tiny", quantization="dynamic")
+
+        (tampered / "whisper_tiny_decoder.json").write_text("{}")
+        converter.update_manifest(str(tampered), [entry])
+        with pytest.raises(ValueError, match="checksum"):
+            ModelFactory.create_speech_to_text(str(tampered), model_size="tiny", quantization="int8")
+
+    def test_static_quantization_requires_calibration(self, tmp_path):
+        """Static mode refuses to run without calibration data"""
+        converter = load_converter()
+        fp32 = tiny_emotion_model(tmp_path / "emotion_analyzer.onnx")
+        with pytest.raises(ValueError):
+            converter.quantize_model(fp32, "static", [])
+
+
+class TestModelFactory:
+    """Tests for backend selection in ModelFactory"""
+
+    @pytest.mark.parametrize("backend", ["onnx", "auto"])
+    def test_onnx_backend(self, tmp_path, backend):
+        """ONNX exports are used for 'onnx' and 'auto'"""
+        from models_onnx import ModelFactory
+
+        tiny_encoder_model(tmp_path / "whisper_tiny.onnx", "n_frames")
+        tiny_decoder_model(tmp_path, [0, TINY_TOKENS['eot']], prefix="whisper_tiny")
+        model = ModelFactory.create_speech_to_text(str(tmp_path), backend=backend, model_size="tiny")
+        assert model.backend == "onnx"
+        assert model.transcribe(np.zeros(8000, dtype=np.float32), 16000)['text'] == "h"
+
+    def test_missing_onnx_export(self, tmp_path):
+        """Explicit ONNX backend does not fall back silently"""
+        from models_onnx import ModelFactory
+
+        with pytest.raises(FileNotFoundError):
+            ModelFactory.create_speech_to_text(str(tmp_path), backend="onnx")
+
+    def test_encoder_only_export_falls_back(self, tmp_path, monkeypatch):
+        """'auto' skips an export without decoder (every request would fail); 'onnx' refuses it"""
+        import models_onnx
+        from models_onnx import ModelFactory
+
+        class FakeTorch:
+            backend = "torch"
+
+            def __init__(self, model_size, language='en'):
+                self.model_size = model_size
+
+        monkeypatch.setattr(models_onnx, "TorchSpeechToText", FakeTorch)
+        tiny_encoder_model(tmp_path / "whisper_tiny.onnx", "n_frames")
+
+        model = ModelFactory.create_speech_to_text(str(tmp_path), backend="auto", model_size="tiny")
+        assert model.backend == "torch" and model.model_size == "tiny"
+        with pytest.raises(FileNotFoundError, match="decoder"):
+            ModelFactory.create_speech_to_text(str(tmp_path), backend="onnx", model_size="tiny")
+
+    def test_unknown_backend(self, tmp_path):
+        """Unknown backends are rejected"""
+        from models_onnx import ModelFactory
+
+        with pytest.raises(ValueError):
+            ModelFactory.create_speech_to_text(str(tmp_path), backend="tensorrt")
 
 
 def test_file_size_validation():
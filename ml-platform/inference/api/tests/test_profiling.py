@@ -0,0 +1,43 @@
+"""Tests for the slow-request profiler"""
+import json
+import time
+
+from profiling import SlowRequestProfiler
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    profiler = SlowRequestProfiler(threshold_ms=0, dump_dir=str(tmp_path))
+    token = profiler.begin()
+    profiler.record("decode", time.perf_counter(), 1.0)
+    assert token is None
+    assert profiler.end(token, time.perf_counter(), 10.0, {}) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_slow_request_is_dumped_with_stages(tmp_path):
+    """Requests over the threshold are written out stage by stage"""
+    profiler = SlowRequestProfiler(threshold_ms=100, dump_dir=str(tmp_path))
+    started = time.perf_counter()
+    token = profiler.begin()
+    profiler.record("decode", started, 0.02)
+    profiler.record("transcribe", started + 0.02, 0.15)
+    path = profiler.end(token, started, 0.2, {"endpoint": "/api/analyze", "method": "POST"})
+
+    profile = json.loads(path.read_text())
+    assert profile["endpoint"] == "/api/analyze"
+    assert profile["total_ms"] == 200.0
+    assert [(s["stage"], s["start_ms"], s["duration_ms"]) for s in profile["stages"]] == [
+        ("decode", 0.0, 20.0), ("transcribe", 20.0, 150.0)
+    ]
+
+
+def test_fast_requests_and_rotation(tmp_path):
+    """Fast requests are not dumped; only the newest max_dumps profiles are kept"""
+    profiler = SlowRequestProfiler(threshold_ms=100, dump_dir=str(tmp_path), max_dumps=2)
+    assert profiler.end(profiler.begin(), time.perf_counter(), 0.05, {}) is None
+
+    for _ in range(4):
+        profiler.end(profiler.begin(), time.perf_counter(), 0.5, {})
+        time.sleep(0.002)
+    assert profiler.dumps == 4
+    assert len(list(tmp_path.glob("*.json"))) == 2
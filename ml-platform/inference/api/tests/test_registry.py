@@ -0,0 +1,130 @@
+"""Tests for the model registry and its process-wide model cache"""
+import json
+import threading
+import time
+
+import pytest
+
+from registry import EMOTION, SPEECH_TO_TEXT, ModelCache, ModelRegistry, file_sha256, signature_mismatches
+
+
+class FakeModel:
+    session = None
+
+    def __init__(self, path, **options):
+        self.path = path
+        self.options = options
+
+
+def write_models(directory, entries):
+    for entry in entries:
+        (directory / entry["path"]).write_bytes(b"x" * entry.pop("size", 100))
+    (directory / "manifest.json").write_text(json.dumps({"models": entries}))
+
+
+def registry(directory, cache=None):
+    builders = {SPEECH_TO_TEXT: FakeModel, EMOTION: FakeModel}
+    return ModelRegistry(str(directory), builders, cache=cache if cache is not None else ModelCache())
+
+
+def test_manifest_models_load_lazily_once(tmp_path):
+    """Nothing is loaded until asked for; repeated gets share one instance"""
+    write_models(tmp_path, [
+        {"name": "whisper", "version": "base", "kind": "speech_to_text", "path": "whisper_base.onnx"},
+        {"name": "whisper", "version": "small", "kind": "speech_to_text", "path": "whisper_small.onnx"},
+        {"name": "emotion", "version": "2", "kind": "emotion", "path": "emotion_v2.onnx"},
+    ])
+    models = registry(tmp_path)
+    assert len(models.cache) == 0
+
+    small = models.get("whisper", "small", beam_size=3)
+    assert small.path.endswith("whisper_small.onnx") and small.options == {"beam_size": 3}
+    assert models.get("whisper", "small", beam_size=3) is small
+    assert models.get("whisper", "small") is not small  # other options, other instance
+    assert models.get("emotion").path.endswith("emotion_v2.onnx")
+    assert models.cache.loads == 3
+    assert [m["loaded"] for m in models.describe()] == [False, True, True]
+
+    with pytest.raises(FileNotFoundError):
+        models.get("whisper", "large")
+
+
+def test_checksum_is_verified(tmp_path):
+    write_models(tmp_path, [{"name": "emotion", "version": "1", "kind": "emotion", "path": "emotion.onnx"}])
+    good = file_sha256(tmp_path / "emotion.onnx")
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+
+    manifest["models"][0]["sha256"] = good
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    assert registry(tmp_path).get("emotion") is not None
+
+    manifest["models"][0]["sha256"] = "0" * 64
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    with pytest.raises(ValueError, match="checksum"):
+        registry(tmp_path).get("emotion")
+
+
+def test_unknown_quantization_label_is_rejected(tmp_path):
+    write_models(tmp_path, [{"name": "emotion", "version": "1", "kind": "emotion", "path": "emotion.onnx",
+                             "quantization": "dynamic"}])
+    with pytest.raises(ValueError, match="quantization"):
+        registry(tmp_path)
+
+
+def test_lru_eviction_by_memory_budget(tmp_path):
+    """Loading past the budget drops the least recently used models"""
+    write_models(tmp_path, [
+        {"name": "whisper", "version": size, "kind": "speech_to_text", "path": f"whisper_{size}.onnx", "size": 400}
+        for size in ("tiny", "base", "small")
+    ])
+    models = registry(tmp_path, ModelCache(max_bytes=1000))
+
+    tiny = models.get("whisper", "tiny")
+    models.get("whisper", "base")
+    assert models.get("whisper", "tiny") is tiny  # tiny is now the most recent
+    models.get("whisper", "small")
+
+    assert [m["loaded"] for m in models.describe()] == [True, False, True]
+    assert models.cache.size_bytes == 800
+    assert models.cache.evictions == 1
+
+
+def test_concurrent_gets_load_once(tmp_path):
+    write_models(tmp_path, [{"name": "emotion", "version": "1", "kind": "emotion", "path": "emotion.onnx"}])
+    loads = []
+
+    def slow_model(path, **options):
+        loads.append(path)
+        time.sleep(0.05)
+        return FakeModel(path)
+
+    models = ModelRegistry(str(tmp_path), {EMOTION: slow_model}, cache=ModelCache())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(models.get("emotion"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_directory_without_manifest_is_discovered(tmp_path):
+    """Exports named as convert_to_onnx.py writes them are found without a manifest"""
+    for name in ("whisper_base.onnx", "whisper_base_decoder.onnx", "whisper_base_cross_kv.onnx",
+                 "whisper_base_decoder.json", "whisper_base.int8.onnx", "emotion_analyzer.onnx"):
+        (tmp_path / name).write_bytes(b"x")
+    models = registry(tmp_path)
+
+    assert [spec.key for spec in models.specs] == ["whisper:base:int8", "whisper:base", "emotion:default"]
+    assert models.find("whisper", "base").files == [
+        "whisper_base_decoder.onnx", "whisper_base_cross_kv.onnx", "whisper_base_decoder.json"]
+    assert models.find("whisper", "base", "int8").path == "whisper_base.int8.onnx"
+
+
+def test_signature_mismatches():
+    assert signature_mismatches({"features": ["batch_size", 86]}, {"features": ["batch", 86]}) == []
+    assert signature_mismatches({"features": ["batch_size", 86]}, {"features": ["batch_size", 80]})
+    assert signature_mismatches({"mel": ["batch_size", 80, "n_frames"]}, {"mel": ["batch_size", 80, 3000]})
+    assert signature_mismatches({"mel": [1, 80, 3000]}, {"features": [1, 86]}) == ["missing input mel"]
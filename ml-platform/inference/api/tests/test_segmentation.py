@@ -0,0 +1,58 @@
+"""Tests for word segmentation of utterances"""
+import numpy as np
+
+from segmentation import TIMING_ALIGNED, TIMING_ESTIMATED, TIMING_SEGMENT, voiced_range, word_spans
+
+SR = 16000
+
+
+def test_word_timings_are_used():
+    """Recognizer word timestamps define the spans"""
+    timings = [{"word": " Hello", "start": 0.25, "end": 0.6}, {"word": " world.", "start": 0.6, "end": 1.1}]
+    spans = word_spans("Hello world.", 2 * SR, SR, word_timings=timings)
+    assert spans == [("Hello", 4000, 9600, TIMING_ALIGNED), ("world.", 9600, 17600, TIMING_ALIGNED)]
+
+
+def test_timings_are_clipped_to_clip():
+    """Zero-length and out-of-range words keep at least one sample inside the clip"""
+    timings = [{"word": "a", "start": 0.5, "end": 0.5}, {"word": "b", "start": 3.0, "end": 3.5}]
+    spans = word_spans("a b", SR, SR, word_timings=timings)
+    assert spans == [("a", 8000, 8001, TIMING_ALIGNED), ("b", SR - 1, SR, TIMING_ALIGNED)]
+
+
+def test_no_word_cap():
+    """Long utterances are segmented in full"""
+    text = " ".join(f"word{i}" for i in range(40))
+    spans = word_spans(text, 20 * SR, SR)
+    assert len(spans) == 40
+    assert spans[0][1] == 0 and spans[-1][2] == 20 * SR
+    assert all(a[2] == b[1] for a, b in zip(spans, spans[1:]))
+
+
+def test_fallback_spreads_words_over_voiced_region():
+    """Without timings, words share the voiced span in proportion to their length"""
+    rms = np.zeros(100)
+    rms[20:80] = 0.1
+    spans = word_spans("a longer", 100 * 512, SR, rms=rms, hop_length=512)
+
+    start, end = voiced_range(rms, 512, 100 * 512)
+    assert (spans[0][1], spans[-1][2]) == (start, end)
+    assert start == 20 * 512 - 256 and end == 80 * 512 - 256
+    short, long = (s[2] - s[1] for s in spans)
+    assert abs(long - 3.5 * short) <= 2  # weights len + 1: 2 vs 7
+    assert {s[3] for s in spans} == {TIMING_ESTIMATED}
+
+
+def test_segment_timestamps_bound_their_words():
+    """Words of a timed segment stay inside it; word timings still win"""
+    segments = [{"start": 0.0, "end": 0.5, "text": " Hello there"}, {"start": 1.0, "end": 1.5, "text": " world"}]
+    spans = word_spans("Hello there world", 2 * SR, SR, segments=segments)
+    assert [s[0] for s in spans] == ["Hello", "there", "world"]
+    assert spans[0][1] == 0 and spans[1][2] == SR // 2
+    assert spans[2][1:] == (SR, 24000, TIMING_SEGMENT)
+    timings = [{"word": "Hello", "start": 0.1, "end": 0.2}]
+    assert word_spans("Hello", 2 * SR, SR, word_timings=timings, segments=segments)[0][3] == TIMING_ALIGNED
+
+
+def test_empty_transcription():
+    assert word_spans("", SR, SR) == []
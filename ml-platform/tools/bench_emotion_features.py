@@ -0,0 +1,84 @@
+"""
+Latency benchmark of the emotion model's input features: the previous
+per-feature librosa calls (five STFTs per clip) vs the single-STFT
+features.emotion_features, per clip and for a batch of clips
+
+Usage:
+    python bench_emotion_features.py
+    python bench_emotion_features.py --durations 3 10 30 --batch 8 --repeats 5
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference" / "api"))
+
+from features import EMOTION_FEATURE_DIM, emotion_features, emotion_features_batch  # noqa: E402
+
+
+def separate_calls(y, sr):
+    """
+    The previous ONNXEmotionAnalyzer.extract_features
+    """
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=40)
+    pitch, _ = librosa.piptrack(y=y, sr=sr)
+    pitch_mean = np.mean(pitch[pitch > 0]) if np.any(pitch > 0) else 0
+    pitch_std = np.std(pitch[pitch > 0]) if np.any(pitch > 0) else 0
+    rms = librosa.feature.rms(y=y)[0]
+    centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
+    return np.concatenate([
+        np.mean(mfccs, axis=1), np.std(mfccs, axis=1),
+        [pitch_mean, pitch_std, np.mean(rms), np.std(rms)],
+        [np.mean(centroid), np.mean(rolloff)],
+    ]).astype(np.float32)
+
+
+def timed(fn, repeats, *args):
+    fn(*args)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, latencies
+
+
+def synthetic_clip(rng, seconds, sr):
+    t = np.arange(int(seconds * sr)) / sr
+    voice = 0.2 * np.sin(2 * np.pi * (150 + 30 * np.sin(2 * t)) * t) * (1 + np.sin(3 * t))
+    return (voice + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion feature extraction benchmark (CPU)")
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30], help="Synthetic clip lengths (s)")
+    parser.add_argument("--batch", type=int, default=8, help="Clips per batch for the batch timing")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    sr = 16000
+    rng = np.random.default_rng(0)
+    print(f"{'clip':>8} {'before p50':>11} {'after p50':>10} {'speedup':>8} {'batch/clip':>11}  max rel. diff")
+    for seconds in args.durations:
+        y = synthetic_clip(rng, seconds, sr)
+        clips = [synthetic_clip(rng, seconds, sr) for _ in range(args.batch)]
+
+        reference, before = timed(separate_calls, args.repeats, y, sr)
+        result, after = timed(emotion_features, args.repeats, y, sr)
+        batch, batch_times = timed(emotion_features_batch, max(1, args.repeats // 2), clips, sr)
+        assert result.shape == (EMOTION_FEATURE_DIM,) and batch.shape == (args.batch, EMOTION_FEATURE_DIM)
+        diff = np.max(np.abs(reference - result) / np.maximum(np.abs(reference), 1e-9))
+
+        print(f"{seconds:>7g}s {np.median(before):>9.1f}ms {np.median(after):>8.1f}ms "
+              f"{np.median(before) / np.median(after):>7.1f}x {np.median(batch_times) / args.batch:>9.1f}ms  "
+              f"{diff:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark Whisper encoder latency vs. utterance length:
+fixed 30 s padding against bucket padding (dynamic-length export)
+
+Usage:
+    python bench_encoder_length.py --model ./models/whisper_base.onnx
+    python bench_encoder_length.py --dummy   # synthetic encoder, no PyTorch needed
+"""
+
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference" / "api"))
+
+from models_onnx import ONNXSpeechToText, DEFAULT_FRAME_BUCKETS, WHISPER_MAX_FRAMES  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING)
+
+DURATIONS_S = (1, 2, 3, 5, 8, 10, 15, 20, 30)
+
+
+def write_dummy_encoder(path: Path, width: int = 384, layers: int = 4, heads: int = 6) -> Path:
+    """
+    Whisper-shaped encoder (two convs, positional slice, self-attention + MLP
+    blocks) with random weights and a dynamic time axis
+    """
+    import onnx
+    from onnx import helper, numpy_helper, TensorProto
+
+    rng = np.random.default_rng(0)
+    inits, nodes = [], []
+
+    def weight(name, *shape):
+        fan_in = shape[1] * shape[2] if len(shape) == 3 else shape[0]
+        inits.append(numpy_helper.from_array((rng.standard_normal(shape) / np.sqrt(fan_in)).astype(np.float32), name))
+        return name
+
+    def const(name, value, dtype=np.int64):
+        inits.append(numpy_helper.from_array(np.array(value, dtype=dtype), name))
+        return name
+
+    head_dim = width // heads
+    nodes += [
+        helper.make_node("Conv", ["mel_spectrogram", weight("conv1_w", width, 80, 3)], ["c1"], pads=[1, 1]),
+        helper.make_node("Relu", ["c1"], ["c1r"]),
+        helper.make_node("Conv", ["c1r", weight("conv2_w", width, width, 3)], ["c2"], pads=[1, 1], strides=[2]),
+        helper.make_node("Relu", ["c2"], ["c2r"]),
+        helper.make_node("Transpose", ["c2r"], ["x_t"], perm=[0, 2, 1]),
+        helper.make_node("Shape", ["x_t"], ["x_shape"]),
+        helper.make_node("Gather", ["x_shape", const("one", 1)], ["n_ctx"]),
+        helper.make_node("Unsqueeze", ["n_ctx", const("axis0", [0])], ["n_ctx_1d"]),
+        helper.make_node("Slice", [weight("pos", WHISPER_MAX_FRAMES // 2, width), const("zero_1d", [0]), "n_ctx_1d", const("axis0_s", [0])], ["pos_n"]),
+        helper.make_node("Add", ["x_t", "pos_n"], ["x0"]),
+    ]
+    split_shape = const("split_shape", [0, 0, heads, head_dim])
+    merge_shape = const("merge_shape", [0, 0, width])
+    scale = const("scale", 1.0 / np.sqrt(head_dim), np.float32)
+    x = "x0"
+    for i in range(layers):
+        qkv = {}
+        for name in ("q", "k", "v"):
+            nodes += [
+                helper.make_node("MatMul", [x, weight(f"l{i}_w{name}", width, width)], [f"l{i}_{name}"]),
+                helper.make_node("Reshape", [f"l{i}_{name}", split_shape], [f"l{i}_{name}_h"]),
+                helper.make_node("Transpose", [f"l{i}_{name}_h"], [f"l{i}_{name}_t"],
+                                 perm=[0, 2, 3, 1] if name == "k" else [0, 2, 1, 3]),
+            ]
+            qkv[name] = f"l{i}_{name}_t"
+        nodes += [
+            helper.make_node("MatMul", [qkv["q"], qkv["k"]], [f"l{i}_s"]),
+            helper.make_node("Mul", [f"l{i}_s", scale], [f"l{i}_ss"]),
+            helper.make_node("Softmax", [f"l{i}_ss"], [f"l{i}_p"], axis=-1),
+            helper.make_node("MatMul", [f"l{i}_p", qkv["v"]], [f"l{i}_a"]),
+            helper.make_node("Transpose", [f"l{i}_a"], [f"l{i}_at"], perm=[0, 2, 1, 3]),
+            helper.make_node("Reshape", [f"l{i}_at", merge_shape], [f"l{i}_am"]),
+            helper.make_node("MatMul", [f"l{i}_am", weight(f"l{i}_wo", width, width)], [f"l{i}_o"]),
+            helper.make_node("Add", [x, f"l{i}_o"], [f"l{i}_r1"]),
+            helper.make_node("MatMul", [f"l{i}_r1", weight(f"l{i}_fc1", width, 4 * width)], [f"l{i}_f1"]),
+            helper.make_node("Relu", [f"l{i}_f1"], [f"l{i}_f1r"]),
+            helper.make_node("MatMul", [f"l{i}_f1r", weight(f"l{i}_fc2", 4 * width, width)], [f"l{i}_f2"]),
+            helper.make_node("Add", [f"l{i}_r1", f"l{i}_f2"], [f"l{i}_out"]),
+        ]
+        x = f"l{i}_out"
+    nodes.append(helper.make_node("Identity", [x], ["encoder_output"]))
+
+    graph = helper.make_graph(
+        nodes, "dummy_whisper_encoder",
+        [helper.make_tensor_value_info("mel_spectrogram", TensorProto.FLOAT, ["batch_size", 80, "n_frames"])],
+        [helper.make_tensor_value_info("encoder_output", TensorProto.FLOAT, ["batch_size", "n_ctx", width])],
+        inits,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)], ir_version=8)
+    onnx.checker.check_model(model)
+    onnx.save(model, str(path))
+    return path
+
+
+def time_encoder(stt: ONNXSpeechToText, audio: np.ndarray, repeats: int):
+    """
+    (padded frames, median encoder ms) for one clip
+    """
+    mel = stt.preprocess_audio(audio, 16000)[None]
+    name = stt.session.get_inputs()[0].name
+    stt.session.run(None, {name: mel})  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        stt.session.run(None, {name: mel})
+        samples.append((time.perf_counter() - start) * 1000)
+    return mel.shape[2], float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper encoder latency vs. utterance length")
+    parser.add_argument("--model", type=str, default=None, help="Dynamic-length Whisper encoder (.onnx)")
+    parser.add_argument("--dummy", action="store_true", help="Benchmark a synthetic Whisper-shaped encoder")
+    parser.add_argument("--buckets", type=int, nargs="+", default=list(DEFAULT_FRAME_BUCKETS),
+                        help="Mel frame buckets (10 ms per frame)")
+    parser.add_argument("--durations", type=float, nargs="+", default=list(DURATIONS_S), help="Utterance lengths (s)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    if not args.model and not args.dummy:
+        parser.error("pass --model or --dummy")
+
+    tmp = tempfile.TemporaryDirectory()
+    model = args.model or str(write_dummy_encoder(Path(tmp.name) / "whisper_dummy.onnx"))
+
+    bucketed = ONNXSpeechToText(model, frame_buckets=args.buckets)
+    if not bucketed.dynamic_length:
+        parser.error(f"{model} has a fixed time axis; re-export without --fixed-length")
+    fixed = ONNXSpeechToText(model, frame_buckets=(WHISPER_MAX_FRAMES,))
+
+    rng = np.random.default_rng(0)
+    print(f"{'length':>7} {'frames':>7} {'padded 30s':>12} {'bucketed':>10} {'speedup':>8}")
+    for seconds in args.durations:
+        audio = rng.standard_normal(int(seconds * 16000)).astype(np.float32) * 0.1
+        _, fixed_ms = time_encoder(fixed, audio, args.repeats)
+        frames, bucket_ms = time_encoder(bucketed, audio, args.repeats)
+        print(f"{seconds:>6.1f}s {frames:>7d} {fixed_ms:>10.1f}ms {bucket_ms:>8.1f}ms {fixed_ms / bucket_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Latency benchmark of the acoustic features behind /api/pronunciation:
+separate librosa calls per feature plus per-word recomputation (the previous
+analyze_phoneme_quality path) vs the single-STFT feature engine
+
+Usage:
+    python bench_phoneme_features.py
+    python bench_phoneme_features.py --durations 5 30 --words 10 --repeats 5
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import librosa
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference" / "api"))
+
+from features import extract_frame_features, segment_frames, segment_means  # noqa: E402
+
+
+def separate_calls(y, sr, words):
+    """
+    One librosa call per feature, a Python loop over piptrack frames and
+    features recomputed for every word segment
+    """
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    librosa.feature.spectral_rolloff(y=y, sr=sr)
+    librosa.feature.zero_crossing_rate(y)
+    rms = librosa.feature.rms(y=y)[0]
+    pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
+    pitch_values = []
+    for t in range(pitches.shape[1]):
+        pitch = pitches[magnitudes[:, t].argmax(), t]
+        if pitch > 0:
+            pitch_values.append(pitch)
+
+    segment_length = len(y) // words
+    segments = []
+    for i in range(words):
+        segment = y[i * segment_length:(i + 1) * segment_length]
+        segments.append((np.mean(librosa.feature.rms(y=segment)),
+                         np.mean(librosa.feature.zero_crossing_rate(segment)),
+                         np.mean(librosa.feature.spectral_centroid(y=segment, sr=sr))))
+    return mfcc, centroid, rms, np.array(pitch_values), np.array(segments)
+
+
+def single_pass(y, sr, words):
+    """
+    The feature engine: one STFT, frame-sliced segment statistics
+    """
+    features = extract_frame_features(y, sr)
+    segment_length = len(y) // words
+    starts = np.arange(words) * segment_length
+    first, last = segment_frames(starts, starts + segment_length, features.n_frames)
+    segments = np.stack([segment_means(values, first, last)
+                         for values in (features.rms, features.zcr, features.centroid)], axis=1)
+    return features.mfcc, features.centroid, features.rms, features.voiced_pitch, segments
+
+
+def timed(fn, repeats, *args):
+    fn(*args)
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return result, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phoneme-quality feature extraction benchmark (CPU)")
+    parser.add_argument("--durations", type=float, nargs="+", default=[5, 30], help="Synthetic clip lengths (s)")
+    parser.add_argument("--words", type=int, default=10, help="Word segments per clip")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    sr = 16000
+    rng = np.random.default_rng(0)
+    print(f"{'clip':>8} {'separate p50':>13} {'single p50':>11} {'speedup':>8}  clip-level features")
+    for seconds in args.durations:
+        t = np.arange(int(seconds * sr)) / sr
+        voice = 0.2 * np.sin(2 * np.pi * (150 + 30 * np.sin(2 * t)) * t) * (1 + np.sin(3 * t))
+        y = (voice + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+        reference, before = timed(separate_calls, args.repeats, y, sr, args.words)
+        result, after = timed(single_pass, args.repeats, y, sr, args.words)
+        identical = all(np.allclose(a, b, rtol=1e-6, atol=0) for a, b in zip(reference[:4], result[:4]))
+        segment_diff = np.max(np.abs(reference[4] - result[4]) / np.maximum(np.abs(reference[4]), 1e-9))
+
+        print(f"{seconds:>7g}s {np.median(before):>11.1f}ms {np.median(after):>9.1f}ms "
+              f"{np.median(before) / np.median(after):>7.1f}x  "
+              f"{'match' if identical else 'DIFFER'} (segment stats max rel. diff {segment_diff:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+A/B latency benchmark of the speech-to-text backends (PyTorch Whisper vs ONNX)
+on CPU, through the same ModelFactory path the ML API uses
+
+Usage:
+    python bench_stt_backends.py --models-dir ./models --audio-dir ./samples
+    python bench_stt_backends.py --models-dir ./models --durations 3 10 30
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "inference" / "api"))
+
+from models_onnx import ModelFactory  # noqa: E402
+
+logging.basicConfig(level=logging.WARNING)
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a")
+
+
+def load_clips(audio_dir, durations, max_files):
+    """
+    [(label, 16 kHz float32 audio)] from a directory, or tones + noise of the given lengths
+    """
+    if audio_dir:
+        import librosa
+
+        files = sorted(p for p in Path(audio_dir).rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:max_files]
+        return [(f.name, librosa.load(str(f), sr=16000)[0]) for f in files]
+
+    rng = np.random.default_rng(0)
+    clips = []
+    for seconds in durations:
+        t = np.arange(int(seconds * 16000)) / 16000
+        audio = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.02 * rng.standard_normal(t.size)
+        clips.append((f"{seconds:g}s", audio.astype(np.float32)))
+    return clips
+
+
+def bench(model, clips, repeats):
+    """
+    {label: [latency ms]} (after one warm-up call per clip)
+    """
+    out = {}
+    for label, audio in clips:
+        model.transcribe(audio, 16000)
+        out[label] = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model.transcribe(audio, 16000)
+            out[label].append((time.perf_counter() - start) * 1000)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speech-to-text backend A/B latency benchmark (CPU)")
+    parser.add_argument("--models-dir", default="./models", help="Directory with the ONNX exports")
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx"], choices=["torch", "onnx"])
+    parser.add_argument("--audio-dir", default=None, help="Real clips to transcribe (default: synthetic)")
+    parser.add_argument("--durations", type=float, nargs="+", default=[3, 10, 30], help="Synthetic clip lengths (s)")
+    parser.add_argument("--max-files", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    clips = load_clips(args.audio_dir, args.durations, args.max_files)
+    if not clips:
+        parser.error("no audio clips found")
+
+    results = {}
+    for backend in args.backends:
+        start = time.perf_counter()
+        model = ModelFactory.create_speech_to_text(args.models_dir, backend=backend, model_size=args.model_size)
+        load_s = time.perf_counter() - start
+        print(f"[{backend}] loaded in {load_s:.1f}s")
+        results[backend] = bench(model, clips, args.repeats)
+        del model
+
+    header = "".join(f" {b + ' p50':>11} {b + ' p95':>11}" for b in args.backends)
+    print(f"{'clip':>16}{header}")
+    for label, _ in clips:
+        row = "".join(f" {np.percentile(results[b][label], 50):>9.0f}ms {np.percentile(results[b][label], 95):>9.0f}ms"
+                      for b in args.backends)
+        print(f"{label:>16}{row}")
+    if len(args.backends) == 2:
+        a, b = args.backends
+        ratio = np.median([np.median(results[a][l]) / np.median(results[b][l]) for l, _ in clips])
+        print(f"median speedup {b} vs {a}: {ratio:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
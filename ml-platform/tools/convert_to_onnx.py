@@ -1,13 +1,18 @@
 """
 Script to convert PyTorch models to ONNX format for optimized inference
-Converts Whisper and Emotion Analysis models to ONNX
+Converts Whisper and Emotion Analysis models to ONNX, and optionally
+quantizes them to INT8 with an FP32-vs-INT8 comparison report
 """
 
-import torch
-import whisper
 import onnx
 import onnxruntime as ort
+import numpy as np
 from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import base64
+import hashlib
+import json
+import time
 import logging
 import argparse
 
@@ -15,27 +20,247 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def convert_whisper_to_onnx(model_size: str = "base", output_dir: str = "./models"):
+def whisper_encoder_module(encoder, dynamic_length: bool = True):
+    """
+    Whisper's AudioEncoder asserts a full 30 s (1500 position) input; the
+    dynamic-length wrapper slices the positional embedding to the actual
+    number of frames so the exported graph accepts any even frame count
+    """
+    import torch
+    import torch.nn.functional as F
+
+    if not dynamic_length:
+        return encoder
+
+    class DynamicLengthEncoder(torch.nn.Module):
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, mel):
+            x = F.gelu(self.encoder.conv1(mel))
+            x = F.gelu(self.encoder.conv2(x))
+            x = x.permute(0, 2, 1)
+            x = x + self.encoder.positional_embedding[:x.shape[1]].to(x.dtype)
+            for block in self.encoder.blocks:
+                x = block(x)
+            return self.encoder.ln_post(x)
+
+    return DynamicLengthEncoder(encoder).eval()
+
+
+def whisper_decoder_modules(decoder):
+    """
+    ONNX-friendly wrappers around Whisper's TextDecoder
+
+    CrossKV: encoder_output [B, n_ctx, d] -> cross_k, cross_v [L, B, n_ctx, d],
+    run once per clip. DecoderWithPast: tokens [B, T] plus cross K/V and the
+    self-attention cache past_k/past_v [L, B, P, d] -> logits of the last
+    position [B, n_vocab] and present_k/present_v [L, B, P + T, d]
+    """
+    import torch
+
+    def attend(attn, q, k, v, mask=None):
+        batch, n_q, state = q.shape
+        scale = (state // attn.n_head) ** -0.25
+        q = q.reshape(batch, n_q, attn.n_head, -1).permute(0, 2, 1, 3) * scale
+        k = k.reshape(batch, k.shape[1], attn.n_head, -1).permute(0, 2, 3, 1) * scale
+        v = v.reshape(batch, v.shape[1], attn.n_head, -1).permute(0, 2, 1, 3)
+        qk = q @ k
+        if mask is not None:
+            qk = qk + mask
+        w = torch.softmax(qk.float(), dim=-1).to(q.dtype)
+        return attn.out((w @ v).permute(0, 2, 1, 3).flatten(start_dim=2))
+
+    class CrossKV(torch.nn.Module):
+        def __init__(self, decoder):
+            super().__init__()
+            self.decoder = decoder
+
+        def forward(self, encoder_output):
+            blocks = self.decoder.blocks
+            cross_k = torch.stack([b.cross_attn.key(encoder_output) for b in blocks])
+            cross_v = torch.stack([b.cross_attn.value(encoder_output) for b in blocks])
+            return cross_k, cross_v
+
+    class DecoderWithPast(torch.nn.Module):
+        def __init__(self, decoder):
+            super().__init__()
+            self.decoder = decoder
+
+        def forward(self, tokens, cross_k, cross_v, past_k, past_v):
+            n_past, n_new = past_k.shape[2], tokens.shape[1]
+            x = self.decoder.token_embedding(tokens) + self.decoder.positional_embedding[n_past:n_past + n_new]
+
+            # Causal mask over [past + new] keys for the new queries
+            q_pos = torch.arange(n_new).unsqueeze(1) + n_past
+            k_pos = torch.arange(n_past + n_new).unsqueeze(0)
+            mask = torch.where(k_pos > q_pos, torch.tensor(float("-inf")), torch.tensor(0.0))
+
+            present_k, present_v = [], []
+            for i, block in enumerate(self.decoder.blocks):
+                h = block.attn_ln(x)
+                k = torch.cat([past_k[i], block.attn.key(h)], dim=1)
+                v = torch.cat([past_v[i], block.attn.value(h)], dim=1)
+                present_k.append(k)
+                present_v.append(v)
+                x = x + attend(block.attn, block.attn.query(h), k, v, mask)
+                h = block.cross_attn_ln(x)
+                x = x + attend(block.cross_attn, block.cross_attn.query(h), cross_k[i], cross_v[i])
+                x = x + block.mlp(block.mlp_ln(x))
+
+            x = self.decoder.ln(x[:, -1])
+            logits = (x @ self.decoder.token_embedding.weight.to(x.dtype).T).float()
+            return logits, torch.stack(present_k), torch.stack(present_v)
+
+    return CrossKV(decoder).eval(), DecoderWithPast(decoder).eval()
+
+
+def whisper_decoder_config(model, language: str = "en") -> Dict:
+    """
+    Dimensions, special tokens and the byte-level vocabulary, so the API can
+    build prompts and detokenize without the whisper/tiktoken packages
+    """
+    import whisper
+
+    kwargs = {"num_languages": model.num_languages} if hasattr(model, "num_languages") else {}
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        model.is_multilingual, language=language if model.is_multilingual else None, task="transcribe", **kwargs
+    )
+    dims = model.dims
+    return {
+        'n_layer': dims.n_text_layer,
+        'n_head': dims.n_text_head,
+        'n_state': dims.n_text_state,
+        'n_vocab': dims.n_vocab,
+        'n_text_ctx': dims.n_text_ctx,
+        'multilingual': bool(model.is_multilingual),
+        'tokens': {
+            'sot': tokenizer.sot,
+            'eot': tokenizer.eot,
+            'transcribe': tokenizer.transcribe,
+            'translate': tokenizer.translate,
+            'no_timestamps': tokenizer.no_timestamps,
+            'timestamp_begin': tokenizer.timestamp_begin,
+        },
+        'language_tokens': dict(zip(tokenizer.all_language_codes, tokenizer.all_language_tokens))
+        if model.is_multilingual else {},
+        'suppress_tokens': sorted(tokenizer.non_speech_tokens),
+        'blank_tokens': tokenizer.encode(" "),
+        'vocab': [base64.b64encode(tokenizer.encoding.decode_single_token_bytes(i)).decode("ascii")
+                  for i in range(tokenizer.eot)],
+    }
+
+
+def convert_whisper_decoder_to_onnx(model, model_size: str = "base", output_dir: str = "./models"):
+    """
+    Export the Whisper decoder with past key/value inputs and outputs
+    Writes whisper_<size>_cross_kv.onnx, whisper_<size>_decoder.onnx and
+    whisper_<size>_decoder.json next to the encoder
+    """
+    import torch
+
+    output_dir = Path(output_dir)
+    cross_kv_path = output_dir / f"whisper_{model_size}_cross_kv.onnx"
+    decoder_path = output_dir / f"whisper_{model_size}_decoder.onnx"
+    config_path = output_dir / f"whisper_{model_size}_decoder.json"
+
+    cross_kv, decoder = whisper_decoder_modules(model.decoder)
+    config = whisper_decoder_config(model)
+    dims = model.dims
+
+    logger.info("Converting Whisper decoder (with KV cache) to ONNX...")
+    encoder_output = torch.randn(1, dims.n_audio_ctx, dims.n_audio_state)
+    sot = [config['tokens']['sot'], config['tokens']['no_timestamps']]
+    tokens = torch.tensor([sot + [config['blank_tokens'][0]]], dtype=torch.long)
+    with torch.no_grad():
+        torch.onnx.export(
+            cross_kv,
+            (encoder_output,),
+            str(cross_kv_path),
+            export_params=True,
+            opset_version=14,
+            do_constant_folding=True,
+            input_names=['encoder_output'],
+            output_names=['cross_k', 'cross_v'],
+            dynamic_axes={
+                'encoder_output': {0: 'batch_size', 1: 'n_ctx'},
+                'cross_k': {1: 'batch_size', 2: 'n_ctx'},
+                'cross_v': {1: 'batch_size', 2: 'n_ctx'}
+            }
+        )
+        cross_k, cross_v = cross_kv(encoder_output)
+        past = torch.randn(dims.n_text_layer, 1, 2, dims.n_text_state)
+        torch.onnx.export(
+            decoder,
+            (tokens[:, -1:], cross_k, cross_v, past, past),
+            str(decoder_path),
+            export_params=True,
+            opset_version=14,
+            do_constant_folding=True,
+            input_names=['tokens', 'cross_k', 'cross_v', 'past_k', 'past_v'],
+            output_names=['logits', 'present_k', 'present_v'],
+            dynamic_axes={
+                'tokens': {0: 'batch_size', 1: 'n_tokens'},
+                'cross_k': {1: 'batch_size', 2: 'n_ctx'},
+                'cross_v': {1: 'batch_size', 2: 'n_ctx'},
+                'past_k': {1: 'batch_size', 2: 'n_past'},
+                'past_v': {1: 'batch_size', 2: 'n_past'},
+                'logits': {0: 'batch_size'},
+                'present_k': {1: 'batch_size', 2: 'n_total'},
+                'present_v': {1: 'batch_size', 2: 'n_total'}
+            }
+        )
+    config_path.write_text(json.dumps(config))
+
+    # Verify: prompt in one call, then one cached step, against PyTorch
+    for path in (cross_kv_path, decoder_path):
+        onnx.checker.check_model(onnx.load(str(path)))
+    cross_session = ort.InferenceSession(str(cross_kv_path))
+    decoder_session = ort.InferenceSession(str(decoder_path))
+    ck, cv = cross_session.run(None, {'encoder_output': encoder_output.numpy()})
+    empty = np.zeros((dims.n_text_layer, 1, 0, dims.n_text_state), dtype=np.float32)
+    _, pk, pv = decoder_session.run(None, {'tokens': tokens[:, :-1].numpy(), 'cross_k': ck, 'cross_v': cv,
+                                           'past_k': empty, 'past_v': empty})
+    logits = decoder_session.run(None, {'tokens': tokens[:, -1:].numpy(), 'cross_k': ck, 'cross_v': cv,
+                                        'past_k': pk, 'past_v': pv})[0]
+    with torch.no_grad():
+        reference = model.decoder(tokens, encoder_output)[:, -1].float().numpy()
+    logger.info(f"Decoder verified: cached step max |diff| vs PyTorch: {np.abs(logits - reference).max():.2e}")
+    logger.info(f"Whisper decoder saved to {decoder_path} (+ {cross_kv_path.name}, {config_path.name})")
+
+    return decoder_path
+
+
+def convert_whisper_to_onnx(model_size: str = "base", output_dir: str = "./models", dynamic_length: bool = True):
     """
     Convert Whisper model to ONNX format
+    With dynamic_length the mel time axis is dynamic (up to 3000 frames), so
+    short utterances only need padding to the next frame bucket
     """
+    import torch
+    import whisper
+
     logger.info(f"Loading Whisper {model_size} model...")
-    model = whisper.load_model(model_size)
+    model = whisper.load_model(model_size, device="cpu")
     model.eval()
 
     output_path = Path(output_dir) / f"whisper_{model_size}.onnx"
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Create dummy input (mel spectrogram)
-    # Whisper expects 80 mel bins, 3000 frames
+    # Whisper expects 80 mel bins, at most 3000 frames
     dummy_input = torch.randn(1, 80, 3000)
 
-    logger.info("Converting Whisper encoder to ONNX...")
+    logger.info(f"Converting Whisper encoder to ONNX (dynamic length: {dynamic_length})...")
+
+    mel_axes = {0: 'batch_size', 2: 'n_frames'} if dynamic_length else {0: 'batch_size'}
+    out_axes = {0: 'batch_size', 1: 'n_ctx'} if dynamic_length else {0: 'batch_size'}
 
     # Export encoder to ONNX
     with torch.no_grad():
         torch.onnx.export(
-            model.encoder,
+            whisper_encoder_module(model.encoder, dynamic_length),
             dummy_input,
             str(output_path),
             export_params=True,
@@ -44,8 +269,8 @@ def convert_whisper_to_onnx(model_size: str = "base", output_dir: str = "./model
             input_names=['mel_spectrogram'],
             output_names=['encoder_output'],
             dynamic_axes={
-                'mel_spectrogram': {0: 'batch_size'},
-                'encoder_output': {0: 'batch_size'}
+                'mel_spectrogram': mel_axes,
+                'encoder_output': out_axes
             }
         )
 
@@ -65,7 +290,19 @@ def convert_whisper_to_onnx(model_size: str = "base", output_dir: str = "./model
     test_input = dummy_input.numpy()
     result = session.run([output_name], {input_name: test_input})
 
-    logger.info(f"ONNX inference successful. Output shape: {result[0].shape}")
+    with torch.no_grad():
+        reference = model.encoder(dummy_input).numpy()
+    logger.info(f"ONNX inference successful. Output shape: {result[0].shape}, "
+                f"max |diff| vs PyTorch: {np.abs(result[0] - reference).max():.2e}")
+
+    if dynamic_length:
+        short = session.run([output_name], {input_name: test_input[:, :, :500]})[0]
+        if short.shape[1] != 250:
+            raise RuntimeError(f"Dynamic-length export returned {short.shape[1]} positions for 500 frames")
+        logger.info(f"Dynamic length verified: 500 frames -> {short.shape[1]} positions")
+
+    convert_whisper_decoder_to_onnx(model, model_size, output_dir)
+
     logger.info(f"✓ Whisper {model_size} model converted successfully!")
 
     return output_path
@@ -76,6 +313,8 @@ def create_emotion_model_onnx(output_dir: str = "./models"):
     Create and convert Emotion Analysis model to ONNX
     This creates a simple CNN-based emotion classifier
     """
+    import torch
+
     logger.info("Creating Emotion Analysis model...")
 
     class EmotionCNN(torch.nn.Module):
@@ -164,6 +403,281 @@ def optimize_onnx_model(model_path: Path):
     logger.info(f"Optimized model saved to {sess_options.optimized_model_filepath}")
 
 
+# ---------- INT8 quantization ----------
+
+QUANTIZATION_MODES = ("dynamic", "static")
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a")
+
+
+def quantization_config(mode: str, per_channel: bool = False) -> Dict:
+    """
+    Settings used by quantize_model for `mode`
+    Dynamic: INT8 weights, activations quantized at run time (MatMul/Gemm only)
+    Static: INT8 weights + UINT8 activations calibrated on audio, QDQ format
+    """
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    return {
+        'enabled': True,
+        'type': mode,
+        'per_channel': per_channel,
+        'weight_type': 'QInt8',
+        'activation_type': 'QUInt8' if mode == 'static' else None,
+        'format': 'QDQ' if mode == 'static' else 'QOperator',
+        'op_types': None if mode == 'static' else ['MatMul', 'Gemm'],
+    }
+
+
+def load_calibration_audio(audio_dir: str, max_files: int = 64, sample_rate: int = 16000) -> List[np.ndarray]:
+    """
+    Load up to `max_files` clips (mono, resampled) from a local directory
+    """
+    import librosa
+
+    files = sorted(p for p in Path(audio_dir).rglob("*") if p.suffix.lower() in AUDIO_EXTENSIONS)[:max_files]
+    if not files:
+        raise FileNotFoundError(f"No audio files ({', '.join(AUDIO_EXTENSIONS)}) in {audio_dir}")
+    logger.info(f"Loading {len(files)} calibration clips from {audio_dir}")
+    return [librosa.load(str(f), sr=sample_rate, mono=True)[0] for f in files]
+
+
+# Preprocessing below mirrors ONNXSpeechToText / ONNXEmotionAnalyzer in
+# inference/api/models_onnx.py so calibration sees production inputs.
+
+def whisper_features(audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Log-mel [80, 3000] input for the Whisper encoder
+    """
+    import librosa
+
+    audio = np.asarray(audio, dtype=np.float32)[:3000 * 160]
+    mel = librosa.feature.melspectrogram(y=np.pad(audio, (0, 400)), sr=sample_rate, n_fft=400, hop_length=160,
+                                         n_mels=80, pad_mode='reflect')
+    log_spec = np.log10(np.maximum(mel[:, :max(len(audio) // 160, 1)], 1e-10))
+    floor = max(log_spec.max() - 8.0, -10.0)
+    mel = (np.maximum(log_spec, floor) + 4.0) / 4.0
+    mel = np.pad(mel, ((0, 0), (0, 3000 - mel.shape[1])), constant_values=(floor + 4.0) / 4.0)
+    return mel.astype(np.float32)
+
+
+def emotion_features(audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+    """
+    86-dim acoustic features for the emotion model
+    """
+    import librosa
+
+    mfccs = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=40)
+    pitch, _ = librosa.piptrack(y=audio, sr=sample_rate)
+    voiced = pitch[pitch > 0]
+    rms = librosa.feature.rms(y=audio)[0]
+    centroid = librosa.feature.spectral_centroid(y=audio, sr=sample_rate)[0]
+    rolloff = librosa.feature.spectral_rolloff(y=audio, sr=sample_rate)[0]
+    return np.concatenate([
+        np.mean(mfccs, axis=1),
+        np.std(mfccs, axis=1),
+        [np.mean(voiced) if voiced.size else 0, np.std(voiced) if voiced.size else 0, np.mean(rms), np.std(rms)],
+        [np.mean(centroid), np.mean(rolloff)]
+    ]).astype(np.float32)
+
+
+FEATURE_EXTRACTORS = {"whisper": whisper_features, "emotion": emotion_features}
+
+
+def model_inputs(model_path: Path, kind: str, audio: Optional[List[np.ndarray]], count: int = 16, seed: int = 0) -> List[Dict[str, np.ndarray]]:
+    """
+    Session feeds (batch of 1) from calibration audio, or random inputs of the
+    model's shape when no audio is given (dynamic quantization only)
+    """
+    session = ort.InferenceSession(str(model_path), providers=['CPUExecutionProvider'])
+    inp = session.get_inputs()[0]
+    if audio:
+        return [{inp.name: FEATURE_EXTRACTORS[kind](clip)[None]} for clip in audio]
+    rng = np.random.default_rng(seed)
+    shape = [d if isinstance(d, int) else 3000 if d == 'n_frames' else 1 for d in inp.shape]
+    return [{inp.name: rng.standard_normal(shape).astype(np.float32)} for _ in range(count)]
+
+
+def quantize_model(model_path: Path, mode: str, feeds: Optional[List[Dict[str, np.ndarray]]] = None,
+                   per_channel: bool = False) -> Path:
+    """
+    Quantize an FP32 ONNX model to INT8; static mode calibrates on `feeds`
+    Returns the path of the *.int8.onnx model
+    """
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_dynamic, quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    config = quantization_config(mode, per_channel)
+    output_path = model_path.with_suffix('.int8.onnx')
+    logger.info(f"Quantizing {model_path.name} ({mode}, per_channel={per_channel})...")
+
+    if mode == "dynamic":
+        quantize_dynamic(str(model_path), str(output_path), weight_type=QuantType.QInt8,
+                         per_channel=per_channel, op_types_to_quantize=config['op_types'])
+    else:
+        if not feeds:
+            raise ValueError("Static quantization needs calibration inputs")
+
+        class FeedReader(CalibrationDataReader):
+            def __init__(self, items):
+                self._items = iter(items)
+
+            def get_next(self):
+                return next(self._items, None)
+
+        prepared = model_path.with_suffix('.preprocessed.onnx')
+        try:
+            quant_pre_process(str(model_path), str(prepared))
+        except Exception as e:
+            logger.warning(f"Quantization pre-processing skipped: {e}")
+            prepared = model_path
+        quantize_static(str(prepared), str(output_path), FeedReader(feeds),
+                        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8, per_channel=per_channel,
+                        calibrate_method=CalibrationMethod.MinMax)
+        if prepared != model_path:
+            prepared.unlink(missing_ok=True)
+
+    onnx.checker.check_model(onnx.load(str(output_path)))
+    logger.info(f"INT8 model saved to {output_path}")
+    return output_path
+
+
+def compare_models(fp32_path: Path, int8_path: Path, feeds: List[Dict[str, np.ndarray]], runs: int = 10) -> Dict:
+    """
+    Size, CPU latency (p50/p95 over all feeds x runs) and output divergence
+    of the INT8 model against FP32
+    """
+    def session(path):
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(str(path), so, providers=['CPUExecutionProvider'])
+
+    def timed(sess):
+        sess.run(None, feeds[0])  # warm-up
+        lat = []
+        for _ in range(runs):
+            for feed in feeds:
+                start = time.perf_counter()
+                sess.run(None, feed)
+                lat.append((time.perf_counter() - start) * 1000)
+        return lat
+
+    fp32, int8 = session(fp32_path), session(int8_path)
+    ref = [fp32.run(None, f)[0] for f in feeds]
+    out = [int8.run(None, f)[0] for f in feeds]
+    fp32_lat, int8_lat = timed(fp32), timed(int8)
+
+    diff = np.concatenate([np.abs(a - b).ravel() for a, b in zip(ref, out)])
+    a = np.concatenate([r.ravel() for r in ref]).astype(np.float64)
+    b = np.concatenate([o.ravel() for o in out]).astype(np.float64)
+    cosine = float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b) + 1e-12))
+    top1 = float(np.mean([np.array_equal(np.argmax(r, axis=-1), np.argmax(o, axis=-1)) for r, o in zip(ref, out)]))
+
+    size = lambda p: Path(p).stat().st_size / (1024 * 1024)
+    return {
+        'fp32_model': str(fp32_path),
+        'int8_model': str(int8_path),
+        'inputs': len(feeds),
+        'size_mb': {'fp32': round(size(fp32_path), 3), 'int8': round(size(int8_path), 3),
+                    'ratio': round(size(int8_path) / size(fp32_path), 3)},
+        'latency_ms': {
+            'fp32': {'p50': round(float(np.percentile(fp32_lat, 50)), 3), 'p95': round(float(np.percentile(fp32_lat, 95)), 3)},
+            'int8': {'p50': round(float(np.percentile(int8_lat, 50)), 3), 'p95': round(float(np.percentile(int8_lat, 95)), 3)},
+        },
+        'divergence': {'max_abs': float(diff.max()), 'mean_abs': float(diff.mean()),
+                       'cosine': cosine, 'top1_agreement': top1},
+    }
+
+
+def quantize_and_report(models: Dict[str, Path], mode: str, calibration_dir: Optional[str] = None,
+                        calibration_samples: int = 64, per_channel: bool = False,
+                        report_path: Optional[Path] = None) -> Dict:
+    """
+    Quantize each {kind: fp32 path} model and write the comparison report (JSON)
+    """
+    audio = load_calibration_audio(calibration_dir, calibration_samples) if calibration_dir else None
+    if mode == "static" and not audio:
+        raise ValueError("Static quantization requires --calibration-dir")
+
+    report = {'mode': mode, 'config': quantization_config(mode, per_channel),
+              'calibration_dir': calibration_dir, 'models': {}}
+    for kind, path in models.items():
+        feeds = model_inputs(path, kind, audio)
+        int8_path = quantize_model(path, mode, feeds, per_channel)
+        report['models'][kind] = compare_models(path, int8_path, feeds[:16])
+        r = report['models'][kind]
+        logger.info(f"  • {kind}: {r['size_mb']['fp32']:.2f} MB -> {r['size_mb']['int8']:.2f} MB, "
+                    f"p50 {r['latency_ms']['fp32']['p50']:.2f} -> {r['latency_ms']['int8']['p50']:.2f} ms, "
+                    f"p95 {r['latency_ms']['fp32']['p95']:.2f} -> {r['latency_ms']['int8']['p95']:.2f} ms, "
+                    f"max |diff| {r['divergence']['max_abs']:.4g}, top-1 agreement {r['divergence']['top1_agreement']:.2%}")
+
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2))
+        logger.info(f"Quantization report saved to {report_path}")
+    return report
+
+
+# ---------- Model manifest ----------
+# Read by the ML API's model registry (inference/api/registry.py)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def whisper_companion_files(size: str) -> List[str]:
+    return [f"whisper_{size}_{suffix}" for suffix in ("decoder.onnx", "cross_kv.onnx", "decoder.json")]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_entry(path: Path, name: str, version: str, kind: str, quantization: Optional[str] = None,
+                   files: Sequence[str] = ()) -> Dict:
+    """
+    Registry entry of an exported model: checksums and input signature
+    quantization: the INT8 mode (dynamic/static) for *.int8.onnx models; the
+    registry label is always "int8", the mode is kept as quantization_mode
+    """
+    session = ort.InferenceSession(str(path), providers=['CPUExecutionProvider'])
+    files = [f for f in files if (path.parent / f).exists()]
+    return {
+        'name': name,
+        'version': version,
+        'kind': kind,
+        'path': path.name,
+        'sha256': file_sha256(path),
+        'inputs': {inp.name: list(inp.shape) for inp in session.get_inputs()},
+        'quantization': 'int8' if quantization else None,
+        'quantization_mode': quantization,
+        'files': files,
+        'files_sha256': {f: file_sha256(path.parent / f) for f in files},
+    }
+
+
+def update_manifest(output_dir: str, entries: List[Dict]) -> Path:
+    """
+    Add entries to output_dir/manifest.json, replacing those with the same
+    name, version and quantization; other models already listed are kept
+    """
+    manifest_path = Path(output_dir) / MANIFEST_NAME
+    models = json.loads(manifest_path.read_text())['models'] if manifest_path.exists() else []
+
+    def identity(entry):
+        return entry['name'], entry['version'], entry.get('quantization')
+
+    replaced = {identity(entry) for entry in entries}
+    models = [entry for entry in models if identity(entry) not in replaced] + entries
+    manifest_path.write_text(json.dumps({'models': models}, indent=2))
+    logger.info(f"Manifest updated: {manifest_path} ({len(models)} models)")
+    return manifest_path
+
+
 def main():
     parser = argparse.ArgumentParser(description="Convert ML models to ONNX format")
     parser.add_argument(
@@ -179,26 +693,72 @@ def main():
         default="./models",
         help="Output directory for ONNX models"
     )
+    parser.add_argument(
+        "--fixed-length",
+        action="store_true",
+        help="Export the Whisper encoder with a fixed 3000-frame input instead of a dynamic time axis"
+    )
     parser.add_argument(
         "--optimize",
         action="store_true",
         help="Optimize ONNX models after conversion"
     )
+    parser.add_argument(
+        "--quantize",
+        choices=QUANTIZATION_MODES,
+        default=None,
+        help="Also produce INT8 models (*.int8.onnx) and an FP32 vs INT8 report"
+    )
+    parser.add_argument(
+        "--calibration-dir",
+        type=str,
+        default=None,
+        help="Local audio directory for calibration/evaluation (required for static)"
+    )
+    parser.add_argument(
+        "--calibration-samples",
+        type=int,
+        default=64,
+        help="Maximum number of calibration clips"
+    )
+    parser.add_argument(
+        "--per-channel",
+        action="store_true",
+        help="Per-channel weight quantization"
+    )
+    parser.add_argument(
+        "--emotion-version",
+        type=str,
+        default="default",
+        help="Version the emotion model is registered under in manifest.json"
+    )
+    parser.add_argument(
+        "--skip-export",
+        action="store_true",
+        help="Use the models already in --output-dir instead of converting (no PyTorch needed)"
+    )
 
     args = parser.parse_args()
+    if args.quantize == "static" and not args.calibration_dir:
+        parser.error("--quantize static requires --calibration-dir")
 
     logger.info("=" * 60)
     logger.info("HearLoveen ML Model Converter")
     logger.info("Converting PyTorch models to ONNX format")
     logger.info("=" * 60)
 
-    # Convert Whisper
-    logger.info("\n[1/2] Converting Whisper Speech-to-Text model...")
-    whisper_path = convert_whisper_to_onnx(args.whisper_size, args.output_dir)
+    if args.skip_export:
+        whisper_path = Path(args.output_dir) / f"whisper_{args.whisper_size}.onnx"
+        emotion_path = Path(args.output_dir) / "emotion_analyzer.onnx"
+    else:
+        # Convert Whisper
+        logger.info("\n[1/2] Converting Whisper Speech-to-Text model...")
+        whisper_path = convert_whisper_to_onnx(args.whisper_size, args.output_dir,
+                                               dynamic_length=not args.fixed_length)
 
-    # Convert Emotion model
-    logger.info("\n[2/2] Converting Emotion Analysis model...")
-    emotion_path = create_emotion_model_onnx(args.output_dir)
+        # Convert Emotion model
+        logger.info("\n[2/2] Converting Emotion Analysis model...")
+        emotion_path = create_emotion_model_onnx(args.output_dir)
 
     # Optimize if requested
     if args.optimize:
@@ -206,6 +766,33 @@ def main():
         optimize_onnx_model(whisper_path)
         optimize_onnx_model(emotion_path)
 
+    # Quantize if requested (from the FP32 exports, not the optimized graphs)
+    if args.quantize:
+        logger.info(f"\n[Quantization] {args.quantize} INT8...")
+        quantize_and_report(
+            {"whisper": whisper_path, "emotion": emotion_path},
+            args.quantize,
+            calibration_dir=args.calibration_dir,
+            calibration_samples=args.calibration_samples,
+            per_channel=args.per_channel,
+            report_path=Path(args.output_dir) / f"quantization_report_{args.quantize}.json"
+        )
+
+    # Register what was produced (the INT8 encoder shares the FP32 decoder files)
+    whisper_files = whisper_companion_files(args.whisper_size)
+    entries = [
+        manifest_entry(whisper_path, "whisper", args.whisper_size, "speech_to_text", files=whisper_files),
+        manifest_entry(emotion_path, "emotion", args.emotion_version, "emotion"),
+    ]
+    if args.quantize:
+        entries += [
+            manifest_entry(whisper_path.with_suffix('.int8.onnx'), "whisper", args.whisper_size, "speech_to_text",
+                           quantization=args.quantize, files=whisper_files),
+            manifest_entry(emotion_path.with_suffix('.int8.onnx'), "emotion", args.emotion_version, "emotion",
+                           quantization=args.quantize),
+        ]
+    update_manifest(args.output_dir, entries)
+
     logger.info("\n" + "=" * 60)
     logger.info("✓ All models converted successfully!")
     logger.info(f"Models saved to: {Path(args.output_dir).absolute()}")
@@ -0,0 +1,279 @@
+# CTC forced alignment (memory-bounded Viterbi)
+#
+# The DP only ever needs the previous row, so we keep two float32 rows and a
+# bit-packed backpointer table (1 bit per cell: advance or stay). When even the
+# packed table would exceed ALIGN_MAX_BYTES we fall back to checkpointing:
+# the forward pass keeps one DP row every K frames and the backtrack recomputes
+# each K-frame segment from its checkpoint.
+import os, math, threading
+import numpy as np
+
+ALIGN_MAX_BYTES = int(os.getenv("ALIGN_MAX_BYTES", str(64 * 1024 * 1024)))
+ALIGN_BLOCK_FRAMES = int(os.getenv("ALIGN_BLOCK_FRAMES", "256"))
+# full | band | beam  (band/beam fall back to full when the constraint bites)
+ALIGN_MODE = os.getenv("ALIGN_MODE", "full").lower()
+ALIGN_BAND_WIDTH = int(os.getenv("ALIGN_BAND_WIDTH", "8"))        # +/- targets around the diagonal
+ALIGN_BAND_MAX_WIDENINGS = int(os.getenv("ALIGN_BAND_MAX_WIDENINGS", "2"))
+ALIGN_MIN_FRAME_LOGP = float(os.getenv("ALIGN_MIN_FRAME_LOGP", "-5.0"))  # widen below this avg score
+ALIGN_BEAM = float(os.getenv("ALIGN_BEAM", "12.0"))               # log-prob beam
+ALIGN_BEAM_MAX_WIDTH = int(os.getenv("ALIGN_BEAM_MAX_WIDTH", "64"))
+
+NEG = np.float32(-1e9)
+_EPS = np.float32(1e-8)
+
+_scratch = threading.local()
+
+def _buf(name, shape, dtype):
+    """Thread-local scratch buffer, grown on demand and reused across calls."""
+    size = int(np.prod(shape))
+    arr = getattr(_scratch, name, None)
+    if arr is None or arr.dtype != dtype or arr.size < size:
+        arr = np.empty(max(size, 1), dtype=dtype)
+        setattr(_scratch, name, arr)
+    return arr[:size].reshape(shape)
+
+def release_scratch():
+    """Drop this thread's scratch buffers (e.g. after an unusually long clip)."""
+    _scratch.__dict__.clear()
+
+def ctc_emissions(logits, target_seq_ids, t0, t1):
+    """
+    Log-emissions for frames [t0, t1): blank column and one column per target.
+    Returns (lb [t1-t0], la [t1-t0, N]) as float32, computed blockwise so the
+    full [T, V] posterior matrix is never materialised.
+    """
+    x = np.asarray(logits[t0:t1], dtype=np.float32)
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    s = np.sum(e, axis=-1, keepdims=True)
+    lb = np.log(np.maximum(e[:, 0] / s[:, 0], _EPS))
+    la = np.log(np.maximum(e[:, target_seq_ids] / s, _EPS))
+    return lb, la
+
+def _forward(logits, targets, t0, t1, row, bits=None, checkpoints=None, every=0):
+    """
+    Advance DP `row` (len N+1, holding dp[t0]) in place to dp[t1].
+    bits: optional uint8 [t1-t0, ceil((N+1)/8)] receiving packed backpointers.
+    checkpoints: optional dict filled with copies of dp[t] for t % every == 0.
+    """
+    N = row.shape[0] - 1
+    block = max(1, ALIGN_BLOCK_FRAMES)
+    stay = _buf("stay", (N + 1,), np.float32)
+    mask = _buf("mask", (block, N + 1), np.bool_)
+    mask[:, 0] = False
+    for b0 in range(t0, t1, block):
+        b1 = min(t1, b0 + block)
+        lb, la = ctc_emissions(logits, targets, b0, b1)
+        for k in range(b1 - b0):
+            t = b0 + k
+            if checkpoints is not None and every and t % every == 0:
+                checkpoints[t] = row.copy()
+            np.add(row, lb[k], out=stay)
+            np.maximum(stay, NEG, out=stay)
+            adv = row[:-1] + la[k]
+            m = mask[k, 1:]
+            np.greater(adv, stay[1:], out=m)
+            np.copyto(row, stay)
+            np.copyto(row[1:], adv, where=m)
+        if bits is not None:
+            bits[b0 - t0:b1 - t0] = np.packbits(mask[:b1 - b0], axis=1)
+    return row
+
+def _bit(bits, i, n):
+    return (bits[i, n >> 3] >> (7 - (n & 7))) & 1
+
+def alignment_bytes(T, N, segment=None):
+    """Peak scratch memory (bytes) for aligning T frames to N targets."""
+    packed = (N + 1 + 7) // 8
+    seg = T if segment is None else segment
+    n_ckpt = 0 if segment is None else math.ceil(T / max(1, segment))
+    block = min(T, max(1, ALIGN_BLOCK_FRAMES))
+    return seg * packed + (n_ckpt + 2) * (N + 1) * 4 + block * (N + 1) * 5
+
+def _segment_frames(T, N, max_bytes):
+    """Frames per backtrack segment; T means no checkpointing is needed."""
+    if alignment_bytes(T, N) <= max_bytes:
+        return T
+    packed = (N + 1 + 7) // 8
+    row = (N + 1) * 4
+    # minimise seg*packed + (T/seg)*row, then grow while it still fits the budget
+    seg = max(1, int(math.sqrt(T * row / packed)))
+    while seg < T and alignment_bytes(T, N, seg * 2) <= max_bytes:
+        seg *= 2
+    return seg
+
+def _viterbi_full(logits, target_seq_ids, max_bytes=None):
+    T = logits.shape[0]
+    N = len(target_seq_ids)
+    targets = np.asarray(target_seq_ids, dtype=np.intp)
+    max_bytes = ALIGN_MAX_BYTES if max_bytes is None else max_bytes
+    seg = _segment_frames(T, N, max_bytes)
+    packed = (N + 1 + 7) // 8
+
+    row = _buf("row", (N + 1,), np.float32)
+    row.fill(NEG)
+    row[0] = 0.0
+    checkpoints = {} if seg < T else None
+    bits = _buf("bits", (seg, packed), np.uint8)
+    _forward(logits, targets, 0, T, row, bits=bits if seg == T else None,
+             checkpoints=checkpoints, every=seg)
+
+    # backtrack best n at T
+    n = int(np.argmax(row))
+    assign = np.full(T, -1, dtype=np.int32)  # -1 = blank
+    t_end = T
+    while t_end > 0 and n > 0:
+        t_start = (t_end - 1) // seg * seg
+        if checkpoints is not None:
+            np.copyto(row, checkpoints.pop(t_start))
+            _forward(logits, targets, t_start, t_end, row, bits=bits)
+        t = t_end
+        while t > t_start and n > 0:
+            if _bit(bits, t - 1 - t_start, n):
+                assign[t-1] = n-1  # frame t-1 assigned to target index (n-1)
+                n -= 1
+            t -= 1
+        t_end = t_start
+    return assign
+
+
+# --------- Banded / beam-pruned alignment ---------
+def _windowed(logits, targets, next_window, max_width, beam=None):
+    """
+    Viterbi restricted to a per-frame window of target positions, O(T*W).
+    next_window(t, lo, hi) -> (nlo, nhi) proposes the window for dp[t+1] given
+    the active window of dp[t]. With `beam`, cells more than `beam` below the
+    frame maximum are pruned and the window shrinks to the survivors.
+    Returns (assign, score, edge_hits) or None when the window outgrows max_width.
+    """
+    T = logits.shape[0]
+    N = targets.shape[0]
+    block = max(1, ALIGN_BLOCK_FRAMES)
+    packed = (max_width + 7) // 8
+    row = _buf("row", (N + 1,), np.float32)
+    row.fill(NEG)
+    row[0] = 0.0
+    mask = _buf("wmask", (block, max_width), np.bool_)
+    bits = _buf("wbits", (T, packed), np.uint8)
+    los = _buf("wlo", (T,), np.int32)
+    his = _buf("whi", (T,), np.int32)
+    clip = _buf("wclip", (T,), np.int8)  # 1: band cut the low side, 2: the high side
+    lo = hi = 0
+    for b0 in range(0, T, block):
+        b1 = min(T, b0 + block)
+        x = np.asarray(logits[b0:b1], dtype=np.float32)
+        e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        s = np.sum(e, axis=-1, keepdims=True)
+        lbs = np.log(np.maximum(e[:, 0] / s[:, 0], _EPS))
+        # a window grows by at most one target per frame, so this covers the block
+        c0, c1 = max(lo - 1, 0), min(N, hi + b1 - b0)
+        las = np.log(np.maximum(e[:, targets[c0:c1]] / s, _EPS))
+        mask[:b1 - b0] = False
+        for k in range(b1 - b0):
+            t = b0 + k
+            nlo, nhi = next_window(t, lo, hi)
+            clip[t] = (nlo > lo) | ((nhi < min(hi + 1, N)) << 1)
+            nlo = max(nlo, lo)
+            nhi = min(nhi, hi + 1, N)
+            if nhi < nlo:
+                nlo = nhi = min(hi + 1, N)
+            w = nhi - nlo + 1
+            if w > max_width:
+                return None
+            stay = np.maximum(row[nlo:nhi + 1] + lbs[k], NEG)
+            a0 = max(nlo, 1)
+            adv = row[a0 - 1:nhi] + las[k, a0 - 1 - c0:nhi - c0]
+            m = mask[k, a0 - nlo:w]
+            np.greater(adv, stay[a0 - nlo:], out=m)
+            row[nlo:nhi + 1] = stay
+            np.copyto(row[a0:nhi + 1], adv, where=m)
+            if nlo > lo:
+                row[lo:nlo] = NEG
+            los[t], his[t] = nlo, nhi  # bit offsets are relative to the unpruned window
+            if beam is not None:
+                win = row[nlo:nhi + 1]
+                keep = np.flatnonzero(win >= win.max() - beam)
+                win[:keep[0]] = NEG
+                win[keep[-1] + 1:] = NEG
+                nlo, nhi = nlo + int(keep[0]), nlo + int(keep[-1])
+            lo, hi = nlo, nhi
+        bits[b0:b1] = np.packbits(mask[:b1 - b0], axis=1)
+    n = lo + int(np.argmax(row[lo:hi + 1]))
+    score = float(row[n])
+    assign = np.full(T, -1, dtype=np.int32)
+    edge_hits = 0
+    t = T
+    while t > 0:
+        wlo, c = int(los[t-1]), int(clip[t-1])
+        if (c & 1 and n == wlo) or (c & 2 and n == his[t-1]):
+            edge_hits += 1
+        if n > 0 and _bit(bits, t - 1, n - wlo):
+            assign[t-1] = n-1
+            n -= 1
+        t -= 1
+    return assign, score, edge_hits
+
+def banded_ctc_align(logits, target_seq_ids, width=None, info=None):
+    """
+    Alignment restricted to a diagonal band of +/- `width` target positions
+    around n = t*N/T. The band is doubled (up to ALIGN_BAND_MAX_WIDENINGS times)
+    when the best path runs along its edge or scores below ALIGN_MIN_FRAME_LOGP
+    per frame; if it is still too narrow we fall back to the full DP.
+    """
+    T = logits.shape[0]
+    N = len(target_seq_ids)
+    targets = np.asarray(target_seq_ids, dtype=np.intp)
+    width = ALIGN_BAND_WIDTH if width is None else width
+    info = {} if info is None else info
+    info.update(mode="band", widenings=0, fallback=False)
+    for attempt in range(ALIGN_BAND_MAX_WIDENINGS + 1):
+        info["width"] = width
+        if T == 0 or 2 * width + 1 >= N + 1:
+            # band spans every target position: identical to the full search
+            info["fallback"] = attempt > 0
+            return _viterbi_full(logits, target_seq_ids)
+        def band(t, lo, hi, w=width):
+            c = ((t + 1) * N) // T
+            return c - w, c + w
+        assign, score, edge_hits = _windowed(logits, targets, band, 2 * width + 1)
+        info["edge_hits"] = edge_hits
+        if edge_hits == 0 and score / T >= ALIGN_MIN_FRAME_LOGP:
+            return assign
+        width *= 2
+        info["widenings"] = attempt + 1
+    info["fallback"] = True
+    return _viterbi_full(logits, target_seq_ids)
+
+def beam_ctc_align(logits, target_seq_ids, beam=None, max_width=None, info=None):
+    """
+    Alignment that keeps only cells within `beam` log-prob of the frame best.
+    Falls back to the full DP if the surviving window exceeds `max_width`
+    targets or the pruned search cannot reach a complete path.
+    """
+    T = logits.shape[0]
+    N = len(target_seq_ids)
+    targets = np.asarray(target_seq_ids, dtype=np.intp)
+    beam = ALIGN_BEAM if beam is None else beam
+    max_width = ALIGN_BEAM_MAX_WIDTH if max_width is None else max_width
+    info = {} if info is None else info
+    info.update(mode="beam", beam=beam, fallback=False)
+    if T > 0 and N > 0:
+        res = _windowed(logits, targets, lambda t, lo, hi: (lo, hi + 1), max_width, beam=beam)
+        if res is not None and res[1] > NEG / 2:
+            return res[0]
+    info["fallback"] = True
+    return _viterbi_full(logits, target_seq_ids)
+
+def viterbi_ctc_align(logits, target_seq_ids, max_bytes=None, mode=None, info=None):
+    """
+    Viterbi alignment for CTC: target_seq_ids excludes blanks. We'll align frames T to sequence N.
+    Returns frame->target index (-1 for blank).
+    mode: full | band | beam (default ALIGN_MODE); `info` receives mode/fallback details.
+    """
+    mode = (mode or ALIGN_MODE).lower()
+    if mode == "band":
+        return banded_ctc_align(logits, target_seq_ids, info=info)
+    if mode == "beam":
+        return beam_ctc_align(logits, target_seq_ids, info=info)
+    if info is not None:
+        info.update(mode="full", fallback=False)
+    return _viterbi_full(logits, target_seq_ids, max_bytes=max_bytes)
@@ -0,0 +1,50 @@
+"""
+Peak-allocation benchmark for CTC forced alignment.
+
+Compares the original full-matrix DP footprint ((T+1)x(N+1) float32 dp +
+int32 bp) against viterbi_ctc_align, measured with tracemalloc.
+
+    python benchmarks/bench_alignment_memory.py --frames 3000 30000 --targets 50 200
+"""
+import argparse, os, sys, time, tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from alignment import viterbi_ctc_align, release_scratch, ALIGN_MAX_BYTES
+
+
+def full_matrix_bytes(T, N):
+    return (T + 1) * (N + 1) * (4 + 4) + T * 40 * 4  # dp + bp + softmax copy (V=40)
+
+
+def measure(T, N, max_bytes, mode):
+    rng = np.random.default_rng(0)
+    logits = rng.standard_normal((T, 40)).astype(np.float32)
+    targets = list(rng.integers(1, 40, size=N))
+    release_scratch()
+    tracemalloc.start()
+    start = time.perf_counter()
+    viterbi_ctc_align(logits, targets, max_bytes=max_bytes, mode=mode)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alignment memory benchmark")
+    parser.add_argument("--frames", type=int, nargs="+", default=[500, 3000, 30000])
+    parser.add_argument("--targets", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--max-bytes", type=int, default=ALIGN_MAX_BYTES)
+    parser.add_argument("--mode", choices=["full", "band", "beam"], default="full")
+    args = parser.parse_args()
+
+    print(f"{'T':>7} {'N':>5} {'full DP MB':>11} {'peak MB':>9} {'time s':>8}")
+    for T in args.frames:
+        for N in args.targets:
+            peak, elapsed = measure(T, N, args.max_bytes, args.mode)
+            print(f"{T:>7} {N:>5} {full_matrix_bytes(T, N)/2**20:>11.2f} {peak/2**20:>9.2f} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
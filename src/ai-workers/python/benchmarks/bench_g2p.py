@@ -0,0 +1,100 @@
+"""
+G2P throughput on large word lists: the per-character loops the worker used
+before g2p.py vs. the compiled rule tables (one batch call per list).
+
+Lists are either all-distinct random words ("unique") or drawn Zipf-like from
+a --vocab sized vocabulary, as word banks and child lexicons are ("zipf").
+
+    python benchmarks/bench_g2p.py --words 100000 --vocab 5000
+"""
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from g2p import get_table, FA_LETTERS
+
+ALPHABETS = {
+    "en": "abcdefghijklmnopqrstuvwxyz",
+    "de": "abcdefghijklmnopqrstuvwxyzäöüß",
+    "fa": "".join(FA_LETTERS),
+}
+
+
+def loop_en(words):
+    vmap = {"a":"AH","e":"EH","i":"IH","o":"AO","u":"UH"}
+    cmap = {"b":"B","c":"K","d":"D","f":"F","g":"G","h":"HH","j":"JH","k":"K","l":"L","m":"M",
+            "n":"N","p":"P","q":"K","r":"R","s":"S","t":"T","v":"V","w":"W","x":"K","y":"Y","z":"Z"}
+    seq = []
+    for w in words:
+        for ch in ''.join([c for c in w.lower() if c.isalpha()]):
+            seq.append(vmap[ch] if ch in vmap else cmap.get(ch, "S"))
+    return seq
+
+
+def loop_de(words):
+    vmap = {"a":"AA","e":"EH","i":"IH","o":"AO","u":"UH"}
+    cmap = {"b":"B","c":"K","d":"D","f":"F","g":"G","h":"HH","j":"JH","k":"K","l":"L","m":"M","n":"N","p":"P","q":"K","r":"R","s":"S","t":"T","v":"V","w":"V","x":"K","y":"Y","z":"Z"}
+    seq = []
+    for w in words:
+        wl = str(w).lower().replace("ä","ae").replace("ö","oe").replace("ü","ue").replace("ß","ss")
+        for ch in wl:
+            if ch in vmap: seq.append(vmap[ch])
+            elif ch.isalpha(): seq.append(cmap.get(ch,"S"))
+    return seq
+
+
+def loop_fa(words):
+    seq = []
+    for w in words:
+        for ch in str(w):
+            seq.append(FA_LETTERS.get(ch, "AH"))
+    return seq
+
+
+LOOPS = {"en": loop_en, "de": loop_de, "fa": loop_fa}
+
+
+def make_words(lang, n, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list(ALPHABETS[lang]))
+    lens = rng.integers(2, 10, size=n)
+    chars = rng.choice(letters, size=int(lens.sum()))
+    bounds = np.concatenate([[0], np.cumsum(lens)])
+    return ["".join(chars[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def make_zipf(lang, n, vocab, seed=0):
+    words = make_words(lang, vocab, seed)
+    rank = np.random.default_rng(seed + 1).zipf(1.2, size=n) % vocab
+    return [words[r] for r in rank]
+
+
+def timed(fn, words, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(words)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="G2P throughput benchmark")
+    parser.add_argument("--words", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=5000)
+    parser.add_argument("--langs", nargs="+", default=["en", "de", "fa"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'lang':>4} {'list':>7} {'words':>8} {'loop ms':>9} {'table ms':>9} {'words/s':>10} {'speedup':>8}")
+    for lang in args.langs:
+        table = get_table(lang)
+        for kind, words in (("unique", make_words(lang, args.words)), ("zipf", make_zipf(lang, args.words, args.vocab))):
+            loop_s = timed(LOOPS[lang], words, args.repeat)
+            table_s = timed(table, words, args.repeat)
+            print(f"{lang:>4} {kind:>7} {len(words):>8} {loop_s * 1000:>9.1f} {table_s * 1000:>9.1f} "
+                  f"{len(words) / table_s:>10.0f} {loop_s / table_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Per-clip latency of GOP scoring vs. clip length.
+
+    python benchmarks/bench_gop.py --seconds 3 30 600
+"""
+import argparse, os, sys, time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from gop import score_segments, gop_score
+
+V = 40
+HOP = 0.02
+
+
+def make_clip(seconds, phones_per_second=8):
+    rng = np.random.default_rng(0)
+    T = int(seconds / HOP)
+    logits = rng.standard_normal((T, V)).astype(np.float32)
+    S = max(1, int(seconds * phones_per_second))
+    bounds = np.linspace(0, T, S + 1).astype(int)
+    ids = rng.integers(1, V, size=S)
+    segments = [{"p": f"P{i}", "start": round(a * HOP, 3), "end": round(b * HOP, 3), "conf": 0.5}
+                for i, a, b in zip(ids, bounds[:-1], bounds[1:])]
+    return logits, segments, list(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GOP scoring benchmark")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[3, 30, 600])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    labels = ["<blank>"] + [f"P{i}" for i in range(1, V)]
+
+    print(f"{'seconds':>8} {'segments':>9} {'ms/clip':>8}")
+    for sec in args.seconds:
+        logits, segments, ids = make_clip(sec)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            gop_score(score_segments(logits, segments, ids, labels), "neutral")
+        ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{sec:>8.0f} {len(segments):>9} {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
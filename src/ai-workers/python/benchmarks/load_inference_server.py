@@ -0,0 +1,91 @@
+"""
+Load test for inference_server.py with the dummy models.
+
+Starts the server on a temp socket, then K worker processes each send
+--requests clips (random 1-6 s, 16 kHz) through InferenceClient. The same
+load is replayed with K in-process sessions (one copy per worker, as without
+the server) for comparison.
+
+Clip lengths are exact sample counts by default, like real uploads; a larger
+--quantum rounds them so equal lengths (and batches) become more likely than
+in production traffic.
+
+    python benchmarks/load_inference_server.py --workers 8 --requests 200 --hidden 512
+"""
+import argparse, os, sys, tempfile, threading, time, asyncio
+import multiprocessing as mp
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from inference_server import InferenceClient, InferenceServer, load_sessions, write_dummy_models
+
+SR = 16000
+
+
+def clips(seed, n, max_seconds, quantum):
+    rng = np.random.default_rng(seed)
+    lens = (rng.integers(SR, int(max_seconds * SR), size=n) // quantum) * quantum
+    return [rng.standard_normal(k).astype(np.float32) * 0.1 for k in lens]
+
+
+def client_worker(args):
+    mode, socket_path, model_dir, seed, n, max_seconds, quantum = args
+    if mode == "server":
+        client = InferenceClient(socket_path)
+        run = lambda m, x: client.run(m, x)
+    else:
+        sessions = load_sessions(os.path.join(model_dir, "asr.onnx"), os.path.join(model_dir, "ser.onnx"), threads=1)
+        run = lambda m, x: sessions[m].run(None, {"input": x[None]})[0]
+    lat = []
+    for x in clips(seed, n, max_seconds, quantum):
+        start = time.perf_counter()
+        assert run("asr", x) is not None and run("ser", x) is not None
+        lat.append(time.perf_counter() - start)
+    return lat
+
+
+def start_server(model_dir, socket_path, max_batch, max_wait_ms):
+    sessions = load_sessions(os.path.join(model_dir, "asr.onnx"), os.path.join(model_dir, "ser.onnx"))
+    server = InferenceServer(sessions, max_batch, max_wait_ms)
+    ready = threading.Event()
+    threading.Thread(target=lambda: asyncio.run(server.serve(socket_path, ready)), daemon=True).start()
+    ready.wait(10)
+    return server
+
+
+def run_mode(mode, args, socket_path, model_dir):
+    jobs = [(mode, socket_path, model_dir, seed, args.requests, args.max_seconds, args.quantum) for seed in range(args.workers)]
+    start = time.perf_counter()
+    with mp.get_context("fork").Pool(args.workers) as pool:
+        lat = np.concatenate(pool.map(client_worker, jobs))
+    wall = time.perf_counter() - start
+    return len(lat) / wall, np.percentile(lat, 50) * 1000, np.percentile(lat, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inference server load test (dummy models)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent worker processes")
+    parser.add_argument("--requests", type=int, default=100, help="Clips per worker")
+    parser.add_argument("--max-seconds", type=float, default=6.0)
+    parser.add_argument("--quantum", type=int, default=1, help="Clip length granularity (samples, 1 = exact lengths)")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--hidden", type=int, default=512, help="Dummy ASR encoder width (0 = single conv)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="infer-load-")
+    model_dir = os.path.join(tmp, "models")
+    write_dummy_models(model_dir, hidden=args.hidden)
+    socket_path = os.path.join(tmp, "infer.sock")
+    server = start_server(model_dir, socket_path, args.max_batch, args.max_wait_ms)
+
+    print(f"{'mode':>10} {'sessions':>9} {'clips/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode, copies in (("in-process", args.workers), ("server", 1)):
+        rate, p50, p95 = run_mode(mode, args, socket_path, model_dir)
+        print(f"{mode:>10} {copies:>9} {rate:>9.1f} {p50:>8.2f} {p95:>8.2f}")
+    for name, b in server.batchers.items():
+        print(f"[{name}] {b.items} clips in {b.batches} batches, mean batch fill {b.items / max(b.batches, 1):.2f}")
+
+
+if __name__ == "__main__":
+    main()
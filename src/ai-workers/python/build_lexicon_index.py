@@ -0,0 +1,94 @@
+"""
+Build the word-bank phoneme indexes the worker memory-maps (LEXICON_INDEX_DIR).
+
+Word banks are text files (one word per line) or CSV/JSONL with a `word` and
+an optional `lang` column; --from-db also adds every child_lexicon word. Each
+word is converted with every backend of its language (fa/de: the compiled
+rule tables; en: each --backends G2P backend) and written as
+<out>/<lang>-<backend>/, so the message path only runs G2P for
+out-of-vocabulary words.
+
+    python build_lexicon_index.py wordbank.txt wordbank_fa.csv --out /data/lexicon --backends g2p_en phonetisaurus
+"""
+import argparse, csv, json, os, time
+
+import main as worker
+from g2p import LANGUAGES, get_table, detect_language
+from lexicon_index import write_index
+
+
+def read_word_bank(path, default_lang=None):
+    """[(word, lang or None)] from a .txt, .csv or .jsonl word bank."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [{"word": line.strip()} for line in f if line.strip() and not line.startswith("#")]
+    return [(r["word"].strip(), r.get("lang") or default_lang) for r in rows if (r.get("word") or "").strip()]
+
+
+def read_child_lexicons(pg_conn):
+    import psycopg2, psycopg2.extras
+    with psycopg2.connect(pg_conn) as conn:
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute("select * from child_lexicon where words is not null")
+            return [(w, row.get("lang")) for row in cur.fetchall() for w in row["words"] if w and w.strip()]
+
+
+def group_by_language(entries):
+    """{lang: [unique words]}; words without a language are detected by script."""
+    out = {}
+    for word, lang in entries:
+        lang = (lang or detect_language([word])).lower()
+        out.setdefault(lang if lang in LANGUAGES else "en", {})[word] = None
+    return {lang: list(words) for lang, words in out.items()}
+
+
+def converters(lang, backends):
+    """[(backend name, words -> per-word lists)] to build for a language."""
+    if lang != "en":
+        return [("table", get_table(lang, worker.INVENTORY.variant(lang)).words)]
+    return [(b, worker.get_g2p_backend(b).words) for b in backends]
+
+
+def build(entries, out_dir, backends, batch=5000):
+    os.makedirs(out_dir, exist_ok=True)
+    for lang, words in sorted(group_by_language(entries).items()):
+        for backend, convert in converters(lang, backends):
+            start = time.time()
+            mapping = {}
+            for i in range(0, len(words), batch):
+                chunk = words[i:i + batch]
+                mapping.update(zip(chunk, convert(chunk)))
+            path = write_index(out_dir, lang, backend, mapping)
+            print(f"[lexicon] {lang}-{backend}: {len(mapping)} words in {time.time() - start:.1f}s -> {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute word-bank phoneme indexes")
+    parser.add_argument("word_banks", nargs="*", help="Word bank files (.txt, .csv, .jsonl)")
+    parser.add_argument("--out", default=worker.LEXICON_INDEX_DIR or None, help="Index directory (default: LEXICON_INDEX_DIR)")
+    parser.add_argument("--lang", default=None, help="Language for rows without one (default: detect by script)")
+    parser.add_argument("--backends", nargs="+", default=[worker.G2P_BACKEND],
+                        help="English G2P backends to index (g2p_en, phonetisaurus, sequitur)")
+    parser.add_argument("--from-db", action="store_true", help="Also index child_lexicon words (needs PG_CONN)")
+    args = parser.parse_args()
+    if not args.out:
+        parser.error("--out or LEXICON_INDEX_DIR is required")
+
+    entries = []
+    for path in args.word_banks:
+        entries.extend(read_word_bank(path, args.lang))
+    if args.from_db:
+        if not worker.PG_CONN:
+            parser.error("--from-db requires PG_CONN")
+        entries.extend(read_child_lexicons(worker.PG_CONN))
+    if not entries:
+        parser.error("no words: pass word bank files and/or --from-db")
+    build(entries, args.out, [b.lower() for b in args.backends])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# Rule-table grapheme-to-phoneme conversion (en / de / fa)
+#
+# Each language is a table of letters, multi-character graphemes, context
+# rules and whole-word exceptions, compiled once into:
+#   1. a code point normalisation lookup (script variants, diacritics; 1:1 or
+#      deletion, applied in numpy)
+#   2. a regex trie (one branch per first letter; longest grapheme and context
+#      rules first) that rewrites every rule match to a private-use code point
+#   3. a code point -> phone id lookup table
+# A whole word list is converted in one pass over "\n".join(words) and the
+# lookup runs in numpy, so there is no Python loop per character.
+import re
+import numpy as np
+
+_PUA = 0xE000   # private-use code points stand in for compiled rules
+_BMP = 0x10000  # lookup table size; characters above the BMP are dropped
+_LETTER = "[^\\W\\d_]"
+
+# (grapheme, phones) or (grapheme, phones, left, right); left/right are regex
+# fragments for the surrounding characters ("^"/"$" = no adjacent letter).
+EN_RULES = [
+    ("c", "S", "", "[eiy]"),
+    ("y", "IY", "[^\\naeiou]", "$"),
+    ("e", "", "[aeiou][^\\naeiou]", "$"),  # silent final e (cake, bone)
+    ("sh", "SH"), ("ch", "CH"), ("th", "TH"), ("ng", "NG"), ("ph", "F"), ("ck", "K"),
+    ("wh", "W"), ("qu", "K W"), ("ee", "IY"), ("ea", "IY"), ("oo", "UW"), ("ai", "EY"),
+    ("ay", "EY"), ("oa", "OW"), ("ou", "AW"), ("oi", "OY"), ("oy", "OY"),
+]
+EN_LETTERS = {
+    "a": "AH", "e": "EH", "i": "IH", "o": "AO", "u": "UH",
+    "b": "B", "c": "K", "d": "D", "f": "F", "g": "G", "h": "HH", "j": "JH", "k": "K", "l": "L", "m": "M",
+    "n": "N", "p": "P", "q": "K", "r": "R", "s": "S", "t": "T", "v": "V", "w": "W", "x": "K S", "y": "Y", "z": "Z",
+}
+EN_LEXICON = {
+    "cat": "K AE T", "dog": "D AO G", "mama": "M AA M AA",
+    "papa": "P AA P AA", "car": "K AA R", "ball": "B AO L",
+}
+
+DE_RULES = [
+    ("sp", "SH P", "^", ""), ("st", "SH T", "^", ""),
+    ("ch", "K", "[aou]", ""),
+    ("b", "P", "", "$"), ("d", "T", "", "$"), ("g", "K", "", "$"),
+    ("er", "ER", "", "$"),
+    ("s", "Z", "", "[aeiouäöü]"),
+    ("h", "", "[aeiouäöü]", ""),  # Dehnungs-h
+    ("sch", "SH"), ("tsch", "CH"), ("ch", "SH"), ("ck", "K"), ("tz", "T S"), ("pf", "P F"), ("ph", "F"),
+    ("qu", "K V"), ("ng", "NG"), ("th", "T"), ("dt", "T"), ("ss", "S"),
+    ("ei", "AY"), ("ai", "AY"), ("ie", "IY"), ("eu", "OY"), ("äu", "OY"), ("au", "AW"),
+    ("aa", "AA"), ("ee", "EY"), ("oo", "OW"),
+]
+DE_LETTERS = {
+    "a": "AA", "e": "EH", "i": "IH", "o": "AO", "u": "UH", "ä": "EH", "ö": "ER", "ü": "UW", "ß": "S",
+    "b": "B", "c": "K", "d": "D", "f": "F", "g": "G", "h": "HH", "j": "Y", "k": "K", "l": "L", "m": "M",
+    "n": "N", "p": "P", "q": "K", "r": "R", "s": "S", "t": "T", "v": "F", "w": "V", "x": "K S", "y": "Y",
+    "z": "T S",
+}
+
+_FA_VOWEL = "اآوی"
+FA_RULES = [
+    ("خوا", "KH AA"),                                   # silent vav (خواهر)
+    ("او", "UW", "^", ""), ("ای", "IY", "^", ""),
+    ("و", "UW", f"[^\\n{_FA_VOWEL}]", f"(?![{_FA_VOWEL}])"),
+    ("ی", "IY", f"[^\\n{_FA_VOWEL}]", f"(?![{_FA_VOWEL}])"),
+    ("ه", "EH", f"[^\\n{_FA_VOWEL}]", "$"),             # final silent h
+]
+FA_LETTERS = {
+    "ا": "AA", "آ": "AA", "ب": "B", "پ": "P", "ت": "T", "ث": "S", "ج": "JH", "چ": "CH", "ح": "HH", "خ": "KH",
+    "د": "D", "ذ": "Z", "ر": "R", "ز": "Z", "ژ": "ZH", "س": "S", "ش": "SH", "ص": "S", "ض": "Z", "ط": "T",
+    "ظ": "Z", "ع": "AH", "غ": "GH", "ف": "F", "ق": "G", "ک": "K", "گ": "G", "ل": "L", "م": "M", "ن": "N",
+    "و": "V", "ه": "HH", "ی": "Y",
+}
+# Arabic-script variants, harakat, tatweel and ZWNJ
+FA_NORMALIZE = {
+    "ي": "ی", "ى": "ی", "ئ": "ی", "ك": "ک", "أ": "ا", "إ": "ا", "ٱ": "ا", "ؤ": "و", "ة": "ه", "ۀ": "ه",
+    "ـ": None, "‌": None, "‍": None, "ء": None,
+    **{chr(c): None for c in range(0x064B, 0x0653)},
+}
+
+
+class G2PTable:
+    """
+    Compiled rule table for one language.
+
+    Args:
+      lang: language code
+      letters: {single character: "PH PH"} applied after the rules
+      rules: [(grapheme, phones[, left, right])] multi-character/context rules
+      normalize: {char: replacement or None} applied after lower()
+      unknown: phones for letters missing from `letters`
+      lexicon: {word: "PH PH"} whole-word exceptions
+      inventory: PhonemeInventory (language variant); phones it only knows as
+        aliases are rewritten to the model's labels at compile time
+    """
+    def __init__(self, lang, letters, rules=(), normalize=None, unknown="S", lexicon=None, inventory=None):
+        self.lang = lang
+        canon = (lambda p: inventory.labels[inventory.id(p)] if p in inventory else p) if inventory else (lambda p: p)
+        self._norm = None
+        if normalize:  # 1:1 or deletion, applied as a code point lookup
+            self._norm = np.arange(_BMP, dtype=np.uint32)
+            for c, r in normalize.items():
+                self._norm[ord(c)] = ord(r) if r else _BMP
+
+        # Trie over the first character: every top-level branch starts with a
+        # literal, so the regex engine skips positions no rule can start at.
+        # Left contexts move behind that literal as lookbehinds.
+        rules = [(w, p, "^", "$") for w, p in (lexicon or {}).items()] + list(rules)
+        ordered = [r for r in rules if len(r) == 4] + sorted((r for r in rules if len(r) == 2), key=lambda r: -len(r[0]))
+        branches = {}
+        for i, rule in enumerate(ordered):
+            g = rule[0]
+            left, right = (rule[2], rule[3]) if len(rule) == 4 else ("", "")
+            first = re.escape(g[0])
+            if left == "^":
+                tail = f"(?<!{_LETTER}{first})"
+            elif left:
+                tail = f"(?<={left}{first})"
+            else:
+                tail = ""
+            tail += re.escape(g[1:])
+            if right == "$":
+                tail += f"(?!{_LETTER})"
+            elif right.startswith("(?"):
+                tail += right
+            elif right:
+                tail += f"(?={right})"
+            branches.setdefault(first, []).append((i, f"({tail})"))
+        groups, alts = [], []
+        for first, tails in branches.items():
+            groups.extend(i for i, _ in tails)
+            alts.append(first + "(?:" + "|".join(t for _, t in tails) + ")")
+        self._rules = re.compile("|".join(alts)) if alts else None
+        self._codes = [chr(_PUA + i) for i in groups]  # capture group -> rule code point
+
+        # code point -> up to `width` phone ids (-1 = nothing); "\n" -> separator
+        outputs = {ord(c): p for c, p in letters.items()}
+        outputs.update({_PUA + i: r[1] for i, r in enumerate(ordered)})
+        outputs = {c: [canon(p) for p in ph.split()] for c, ph in outputs.items()}
+        unknown = [canon(p) for p in (unknown or "").split()]
+        self.phones = sorted({p for ph in outputs.values() for p in ph} | set(unknown))
+        pid = {p: i for i, p in enumerate(self.phones)}
+        self.sep = len(self.phones)
+        width = max([len(ph) for ph in outputs.values()] + [len(unknown), 1])
+        lut = np.full((_BMP, width), -1, dtype=np.int16)
+        if unknown:
+            letter = np.array([chr(c).isalpha() for c in range(_BMP)])
+            lut[letter, :len(unknown)] = [pid[p] for p in unknown]
+        for c, ph in outputs.items():
+            lut[c] = -1
+            lut[c, :len(ph)] = [pid[p] for p in ph]
+        lut[ord("\n")] = -1
+        lut[ord("\n"), 0] = self.sep
+        self._lut = lut
+        self._labels = np.array(self.phones + ["\n"], dtype=object)
+
+    def _sub(self, m):
+        return self._codes[m.lastindex - 1]
+
+    def _ids(self, words):
+        """Flat phone ids for the word list, with `sep` between words."""
+        text = "\n".join([str(w).replace("\n", " ") for w in words]).lower()
+        if self._norm is not None:
+            codes = self._norm[np.minimum(np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32), _BMP - 1)]
+            text = codes[codes < _BMP].tobytes().decode("utf-32-le")
+        if self._rules is not None:
+            text = self._rules.sub(self._sub, text)
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        ids = self._lut[np.minimum(codes, _BMP - 1)].ravel()
+        return ids[ids >= 0]
+
+    def words(self, words):
+        """Per-word phone lists for a word list, converted in one batch."""
+        words = [str(w) for w in words]
+        uniq = list(dict.fromkeys(words))  # word lists repeat heavily; convert each word once
+        if not uniq:
+            return []
+        if len(uniq) * 2 > len(words):
+            uniq = words
+        ids = self._ids(uniq)
+        cuts = np.flatnonzero(ids == self.sep)
+        labels = self._labels[ids].tolist()
+        bounds = zip(np.concatenate([[0], cuts + 1]).tolist(), np.append(cuts, len(ids)).tolist())
+        per = [labels[a:b] for a, b in bounds]
+        if uniq is words:
+            return per
+        by_word = dict(zip(uniq, per))
+        return [list(by_word[w]) for w in words]
+
+    def __call__(self, words):
+        """Flat phone sequence for a word list."""
+        words = [str(w) for w in words]
+        uniq = dict.fromkeys(words)
+        if len(uniq) * 2 > len(words):  # mostly distinct: convert as is
+            ids = self._ids(words)
+            return self._labels[ids[ids != self.sep]].tolist()
+        ids = self._ids(uniq)
+        uniq = {w: i for i, w in enumerate(uniq)}
+        # expand per-word id runs of the distinct words back to the full list
+        cuts = np.flatnonzero(ids == self.sep)
+        starts = np.concatenate([[0], cuts + 1])
+        lens = np.append(cuts, len(ids)) - starts
+        inv = np.fromiter(map(uniq.__getitem__, words), dtype=np.intp, count=len(words))
+        n = lens[inv]
+        pos = np.arange(int(n.sum())) + np.repeat(starts[inv] - (np.cumsum(n) - n), n)
+        return self._labels[ids[pos]].tolist()
+
+
+LANGUAGES = {
+    "en": dict(letters=EN_LETTERS, rules=EN_RULES, lexicon=EN_LEXICON, unknown="S"),
+    "de": dict(letters=DE_LETTERS, rules=DE_RULES, unknown="S"),
+    "fa": dict(letters=FA_LETTERS, rules=FA_RULES, normalize=FA_NORMALIZE, unknown="AH"),
+}
+
+_TABLES = {}
+
+def get_table(lang, inventory=None):
+    """Compiled table for `lang` (cached per inventory); unknown languages get English."""
+    lang = lang if lang in LANGUAGES else "en"
+    key = (lang, inventory.version if inventory is not None else None)
+    table = _TABLES.get(key)
+    if table is None:
+        table = _TABLES[key] = G2PTable(lang, inventory=inventory, **LANGUAGES[lang])
+    return table
+
+_ARABIC = re.compile("[؀-ۿ]")
+_GERMAN = re.compile("[äöüßÄÖÜ]")
+
+def detect_language(words):
+    """Script-based guess for G2P_LANG=auto: fa for Arabic script, de for umlauts/ß, else en."""
+    text = " ".join(str(w) for w in words)
+    if _ARABIC.search(text):
+        return "fa"
+    if _GERMAN.search(text):
+        return "de"
+    return "en"
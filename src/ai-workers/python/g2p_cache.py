@@ -0,0 +1,136 @@
+# Per-child G2P cache (Postgres child_g2p_cache) with bulk writes
+#
+# Writes are one statement per batch: execute_values upsert for small batches,
+# COPY into a temp staging table plus a single INSERT ... SELECT ... ON
+# CONFLICT merge for large ones. With async writes, store() only enqueues; a
+# background thread coalesces pending batches (last write per child/word wins)
+# and flushes them, so the message path never waits on the cache.
+import os, io, json, queue, threading, time
+
+G2P_CACHE_COPY_MIN = int(os.getenv("G2P_CACHE_COPY_MIN", "500"))     # rows; COPY at or above this
+G2P_CACHE_ASYNC = os.getenv("G2P_CACHE_ASYNC", "1") == "1"
+G2P_CACHE_QUEUE = int(os.getenv("G2P_CACHE_QUEUE", "10000"))         # pending batches before dropping
+G2P_CACHE_FLUSH_MS = float(os.getenv("G2P_CACHE_FLUSH_MS", "200"))   # coalescing window
+
+SCHEMA_SQL = "create table if not exists child_g2p_cache(child_id uuid, word text, phonemes jsonb, primary key(child_id,word));"
+
+MERGE_SQL = """
+insert into child_g2p_cache(child_id, word, phonemes)
+select child_id, word, phonemes from g2p_cache_stage
+on conflict (child_id, word) do update set phonemes = excluded.phonemes
+"""
+
+def cache_rows(child_id, mapping):
+    """[(child_id, word, phonemes json)] for {word: [phonemes]}."""
+    child_id = str(child_id)
+    return [(child_id, w, json.dumps(ph)) for w, ph in mapping.items()]
+
+def _copy_text(rows):
+    """Rows as COPY text format (tab separated, backslash escaped)."""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return "".join(f"{c}\t{esc(w)}\t{esc(p)}\n" for c, w, p in rows)
+
+def write_rows(cur, rows, copy_min=G2P_CACHE_COPY_MIN):
+    """Upsert cache rows with one statement (execute_values) or COPY + one merge."""
+    if not rows:
+        return
+    if len(rows) < copy_min:
+        import psycopg2.extras
+        psycopg2.extras.execute_values(cur, """
+            insert into child_g2p_cache(child_id, word, phonemes) values %s
+            on conflict (child_id, word) do update set phonemes = excluded.phonemes
+            """, rows, template="(%s::uuid, %s, %s::jsonb)", page_size=max(len(rows), 1))
+        return
+    cur.execute("create temp table if not exists g2p_cache_stage(child_id uuid, word text, phonemes jsonb) on commit delete rows")
+    cur.copy_expert("copy g2p_cache_stage(child_id, word, phonemes) from stdin", io.StringIO(_copy_text(rows)))
+    cur.execute(MERGE_SQL)
+
+class G2PCache:
+    def __init__(self, pg_conn, async_writes=G2P_CACHE_ASYNC, max_pending=G2P_CACHE_QUEUE,
+                 flush_ms=G2P_CACHE_FLUSH_MS, writer=None):
+        self.pg_conn = pg_conn
+        self.async_writes = async_writes
+        self.flush_s = flush_ms / 1000.0
+        self._writer = writer or self._write
+        self._schema_ready = False
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _ensure_schema(self, cur):
+        if not self._schema_ready:
+            cur.execute(SCHEMA_SQL)
+            self._schema_ready = True
+
+    def lookup(self, child_id, words):
+        """{word: phonemes} for the cached words of a child."""
+        import psycopg2
+        with psycopg2.connect(self.pg_conn) as conn:
+            with conn.cursor() as cur:
+                self._ensure_schema(cur)
+                cur.execute('select word, phonemes from child_g2p_cache where child_id=%s and word = any(%s)',
+                            (str(child_id), list(words)))
+                return dict(cur.fetchall())
+
+    def _write(self, rows):
+        import psycopg2
+        with psycopg2.connect(self.pg_conn) as conn:
+            with conn.cursor() as cur:
+                self._ensure_schema(cur)
+                write_rows(cur, rows)
+            conn.commit()
+
+    def store(self, child_id, mapping):
+        """Cache {word: phonemes} for a child; returns immediately when async writes are enabled."""
+        if not mapping:
+            return
+        if not self.async_writes:
+            self._writer(cache_rows(child_id, mapping))
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((str(child_id), dict(mapping)))
+        except queue.Full:
+            self.dropped += 1
+            print("[WARN] g2p cache queue full; dropped write for", child_id)
+
+    # ---- background writer ----
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="g2p-cache-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            pending = {}
+            n = 0
+            deadline = time.monotonic() + self.flush_s
+            while True:
+                child_id, mapping = item
+                for w, ph in mapping.items():
+                    pending[(child_id, w)] = ph
+                n += 1
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            try:
+                self._writer([(c, w, json.dumps(ph)) for (c, w), ph in pending.items()])
+            except Exception as ex:
+                print("[WARN] g2p cache write:", ex)
+            finally:
+                for _ in range(n):
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued write has been attempted."""
+        if self._thread is not None:
+            self._queue.join()
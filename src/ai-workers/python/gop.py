@@ -0,0 +1,85 @@
+# Goodness-of-pronunciation scoring from CTC posteriors
+#
+# Works on the logits the ASR pass already produced (no extra model call).
+# Posteriors are renormalised over phone labels only, so the blank that
+# dominates CTC output does not swamp the phone competition. For every aligned
+# segment s with target phone p:
+#   LPP = mean_t log P(p | o_t)                     (log posterior probability)
+#   LPR = LPP - max_q mean_t log P(q | o_t)         (log posterior ratio)
+#   GOP = mean_t [log P(p | o_t) - max_q log P(q | o_t)]
+# All segments are scored together from prefix sums over frames.
+import numpy as np
+
+GOP_TOP_K = 3
+
+def phone_log_posteriors(logits):
+    """log-softmax over the non-blank columns; [T, V-1] float32."""
+    x = np.asarray(logits, dtype=np.float32)[:, 1:]
+    x = x - np.max(x, axis=-1, keepdims=True)
+    return x - np.log(np.sum(np.exp(x), axis=-1, keepdims=True))
+
+def _label(labels, i):
+    return labels[i] if i < len(labels) else f"ID{i}"
+
+def segment_frames(segments, T, hop=0.02):
+    """Frame bounds [start, end) for segments carrying start/end in seconds."""
+    starts = np.array([int(round(s["start"] / hop)) for s in segments], dtype=np.intp)
+    ends = np.array([int(round(s["end"] / hop)) for s in segments], dtype=np.intp)
+    starts = np.clip(starts, 0, max(T - 1, 0))
+    ends = np.clip(np.maximum(ends, starts + 1), 0, T)
+    return starts, ends
+
+def score_segments(logits, segments, phone_ids, labels, hop=0.02, top_k=GOP_TOP_K):
+    """
+    Args:
+      logits: np.ndarray [T, V] unnormalized (column 0 = blank)
+      segments: list of {p, start, end, conf}
+      phone_ids: target id (into labels) per segment; <= 0 means unknown
+      labels: phoneme labels indexed by id
+    Returns:
+      copies of `segments` with gop, lpp, lpr and subs (likelier phones, best first)
+    """
+    if not segments:
+        return []
+    logp = phone_log_posteriors(logits)
+    T, P = logp.shape
+    starts, ends = segment_frames(segments, T, hop)
+    lens = (ends - starts)[:, None].astype(np.float64)
+    csum = np.zeros((T + 1, P), dtype=np.float64)
+    np.cumsum(logp, axis=0, out=csum[1:])
+    cmax = np.zeros(T + 1, dtype=np.float64)
+    np.cumsum(np.max(logp, axis=1), out=cmax[1:])
+
+    mean = (csum[ends] - csum[starts]) / lens                   # [S, P]
+    mean_max = (cmax[ends] - cmax[starts]) / lens[:, 0]        # [S]
+    ids = np.asarray(phone_ids, dtype=np.intp)
+    valid = (ids > 0) & (ids <= P)
+    cols = np.where(valid, ids - 1, 0)
+    rows = np.arange(len(segments))
+    lpp = mean[rows, cols]
+    lpr = lpp - np.max(mean, axis=1)
+    gop = lpp - mean_max
+
+    k = min(top_k, P)
+    order = np.argsort(-mean, axis=1)[:, :k + 1]
+    out = []
+    for s, seg in enumerate(segments):
+        res = dict(seg)
+        if valid[s]:
+            subs = [_label(labels, q + 1) for q in order[s] if q != cols[s] and mean[s, q] > lpp[s]][:k]
+            res.update(gop=round(float(gop[s]), 3), lpp=round(float(lpp[s]), 3),
+                       lpr=round(float(lpr[s]), 3), subs=subs)
+        else:
+            res.update(gop=None, lpp=None, lpr=None, subs=[_label(labels, q + 1) for q in order[s][:k]])
+        out.append(res)
+    return out
+
+def gop_score(scored_segments, emotion_label):
+    """0..100 clip score: mean per-phone exp(GOP), with the composite_score emotion penalty."""
+    gops = [s["gop"] for s in scored_segments if s.get("gop") is not None]
+    if not gops:
+        return 0
+    base = int(round(100 * float(np.mean(np.exp(gops)))))
+    if emotion_label in ("frustrated","angry","sad"):
+        base -= 10
+    return max(0, min(100, base))
@@ -0,0 +1,347 @@
+"""
+Node-local ONNX inference server shared by the worker replicas on a node.
+
+Owns the ASR/SER sessions (one copy per node instead of one per worker pod)
+and serves them over a Unix socket. Requests for the same model that arrive
+within INFER_MAX_WAIT_MS are batched (the wait ends early once every
+connected worker has a request queued): clips are grouped by length (padding at
+most INFER_<MODEL>_PAD_RATIO, 0 = equal lengths only), run as one [B, N]
+batch, and each item's output is cut back to its own length. Workers use
+InferenceClient (INFER_SOCKET) and fall back to in-process sessions whenever
+the server is unreachable or lacks a model.
+
+The models take no length input or attention mask, so padding would change
+their outputs and both pad ratios default to 0. Uploads almost never have
+equal sample counts, so with the defaults the server effectively does not
+batch (mean batch fill ~1.0 on realistic lengths, see
+benchmarks/load_inference_server.py): what it buys is one copy of the
+sessions per node instead of one per worker, not throughput.
+
+Wire format, both directions: !II (header bytes, payload bytes), a JSON
+header, then the raw float32 payload.
+
+    python inference_server.py --socket /var/run/hear-infer/infer.sock
+    python inference_server.py --socket /tmp/infer.sock --dummy /tmp/dummy-models   # load testing
+"""
+import os, json, time, socket, struct, asyncio, argparse, threading
+import numpy as np
+
+INFER_SOCKET = os.getenv("INFER_SOCKET", "")
+INFER_MAX_BATCH = int(os.getenv("INFER_MAX_BATCH", "8"))
+INFER_MAX_WAIT_MS = float(os.getenv("INFER_MAX_WAIT_MS", "5"))
+INFER_ASR_PAD_RATIO = float(os.getenv("INFER_ASR_PAD_RATIO", "0"))   # >0 only for frame-local models: no attention mask, padding leaks into attention encoders
+INFER_SER_PAD_RATIO = float(os.getenv("INFER_SER_PAD_RATIO", "0"))   # pooled classifier: equal lengths only
+INFER_TIMEOUT_S = float(os.getenv("INFER_TIMEOUT_S", "30"))
+INFER_RETRY_S = float(os.getenv("INFER_RETRY_S", "10"))              # back-off after a failed connect
+INFER_METRICS_PORT = int(os.getenv("INFER_METRICS_PORT", "0"))
+
+_FRAME = struct.Struct("!II")
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if not k:
+            raise ConnectionError("inference server closed the connection")
+        got += k
+    return buf
+
+def _pack(header, payload=b""):
+    head = json.dumps(header).encode("utf-8")
+    return _FRAME.pack(len(head), len(payload)) + head + payload
+
+
+# ---------- Client (used by the worker) ----------
+class InferenceClient:
+    """
+    Blocking client, one connection per thread. run() returns the model's
+    first output for a single clip (batch dim kept, like session.run(...)[0]),
+    or None when the caller should use its in-process session.
+    """
+    def __init__(self, path, timeout=INFER_TIMEOUT_S, retry_s=INFER_RETRY_S):
+        self.path = path
+        self.timeout = timeout
+        self.retry_s = retry_s
+        self._local = threading.local()
+        self._down_until = {}  # model (or None for the socket) -> monotonic time
+
+    def _sock(self):
+        s = getattr(self._local, "sock", None)
+        if s is None:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(self.timeout)
+            s.connect(self.path)
+            self._local.sock = s
+        return s
+
+    def _close(self):
+        s = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if s is not None:
+            try:
+                s.close()
+            except OSError:
+                pass
+
+    def _request(self, header, payload=b""):
+        s = self._sock()
+        s.sendall(_pack(header, payload))
+        hlen, plen = _FRAME.unpack(_recv_exact(s, _FRAME.size))
+        head = json.loads(bytes(_recv_exact(s, hlen)))
+        return head, _recv_exact(s, plen) if plen else b""
+
+    def available(self, model=None):
+        now = time.monotonic()
+        return self._down_until.get(None, 0) <= now and self._down_until.get(model, 0) <= now
+
+    def run(self, model, x):
+        if not self.available(model):
+            return None
+        x = np.ascontiguousarray(x, dtype=np.float32).reshape(-1)
+        try:
+            head, payload = self._request({"op": "run", "model": model, "n": int(x.size)}, x.tobytes())
+        except (OSError, ConnectionError, ValueError) as ex:
+            self._close()
+            self._down_until[None] = time.monotonic() + self.retry_s
+            print("[WARN] inference server unavailable:", ex)
+            return None
+        if "error" in head:
+            self._down_until[model] = time.monotonic() + self.retry_s
+            print(f"[WARN] inference server ({model}):", head["error"])
+            return None
+        return np.frombuffer(payload, dtype=np.float32).reshape(head["shape"])
+
+    def info(self):
+        head, _ = self._request({"op": "info"})
+        return head
+
+
+# ---------- Server ----------
+class Batcher:
+    """Collects requests for one session and runs them in length-grouped batches."""
+    def __init__(self, name, sess, max_batch, max_wait_s, pad_ratio, metrics=None, clients=None):
+        self.name = name
+        self.sess = sess
+        self.input = sess.get_inputs()[0].name
+        dim0 = sess.get_inputs()[0].shape[0] if sess.get_inputs()[0].shape else 1
+        self.max_batch = max_batch if not isinstance(dim0, int) else max(1, min(max_batch, dim0))
+        self.max_wait_s = max_wait_s
+        self.pad_ratio = pad_ratio
+        self.metrics = metrics
+        self.clients = clients or (lambda: float("inf"))  # connected workers: each has at most one request in flight
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, x):
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((x, fut))
+        return await fut
+
+    def groups(self, batch):
+        """Split a batch into runs whose padding stays within pad_ratio."""
+        batch = sorted(batch, key=lambda r: r[0].size)
+        out, cur = [], []
+        for item in batch:
+            if cur and (len(cur) >= self.max_batch or item[0].size > cur[0][0].size * (1 + self.pad_ratio)):
+                out.append(cur)
+                cur = []
+            cur.append(item)
+        if cur:
+            out.append(cur)
+        return out
+
+    def run_group(self, group):
+        """Outputs (batch dim kept) for each clip of a group."""
+        lens = [x.size for x, _ in group]
+        L = max(lens)
+        X = np.zeros((len(group), L), dtype=np.float32)
+        for i, (x, _) in enumerate(group):
+            X[i, :x.size] = x
+        out = self.sess.run(None, {self.input: X})[0]
+        res = []
+        for i, n in enumerate(lens):
+            y = out[i]
+            if y.ndim >= 2 and n < L:  # [T, V]: drop the frames that only cover padding
+                y = y[:max(1, int(round(y.shape[0] * n / L)))]
+            res.append(np.ascontiguousarray(y[None], dtype=np.float32))
+        return res
+
+    async def loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < min(self.max_batch * 4, self.clients()):
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            for group in self.groups(batch):
+                try:
+                    outs = await loop.run_in_executor(None, self.run_group, group)
+                except Exception as ex:
+                    for _, fut in group:
+                        if not fut.done():
+                            fut.set_exception(ex)
+                    continue
+                self.batches += 1
+                self.items += len(group)
+                if self.metrics is not None:
+                    self.metrics.observe(len(group))
+                for (_, fut), y in zip(group, outs):
+                    if not fut.done():
+                        fut.set_result((y, len(group)))
+
+
+class InferenceServer:
+    def __init__(self, sessions, max_batch=INFER_MAX_BATCH, max_wait_ms=INFER_MAX_WAIT_MS, pad_ratios=None, metrics=None):
+        pad_ratios = pad_ratios or {"asr": INFER_ASR_PAD_RATIO, "ser": INFER_SER_PAD_RATIO}
+        self.connections = 0
+        self.batchers = {name: Batcher(name, sess, max_batch, max_wait_ms / 1000.0, pad_ratios.get(name, 0.0), metrics,
+                                       clients=lambda: self.connections)
+                         for name, sess in sessions.items() if sess is not None}
+
+    def info(self):
+        return {"models": {name: {"outputs": [o.shape for o in b.sess.get_outputs()], "max_batch": b.max_batch,
+                                  "batches": b.batches, "items": b.items}
+                           for name, b in self.batchers.items()}}
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    hlen, plen = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                except asyncio.IncompleteReadError:
+                    break
+                head = json.loads(await reader.readexactly(hlen))
+                payload = await reader.readexactly(plen) if plen else b""
+                if head.get("op") == "info":
+                    writer.write(_pack(self.info()))
+                elif head.get("op") == "run":
+                    b = self.batchers.get(head.get("model"))
+                    if b is None:
+                        writer.write(_pack({"error": f"model {head.get('model')!r} not loaded"}))
+                    else:
+                        try:
+                            y, size = await b.submit(np.frombuffer(payload, dtype=np.float32))
+                            writer.write(_pack({"shape": list(y.shape), "batch": size}, y.tobytes()))
+                        except Exception as ex:
+                            writer.write(_pack({"error": f"{type(ex).__name__}: {ex}"}))
+                else:
+                    writer.write(_pack({"error": f"unknown op {head.get('op')!r}"}))
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, path, ready=None):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self.handle, path=path)
+        os.chmod(path, 0o666)
+        tasks = [asyncio.create_task(b.loop()) for b in self.batchers.values()]
+        if ready is not None:
+            ready.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+def load_sessions(asr_path, ser_path, threads=0):
+    import onnxruntime as ort
+    out = {}
+    for name, path in (("asr", asr_path), ("ser", ser_path)):
+        if not path or not os.path.isfile(path):
+            print(f"[WARN] {name} model not found at {path}; not served")
+            continue
+        so = ort.SessionOptions()
+        if threads > 0:
+            so.intra_op_num_threads = threads
+        out[name] = ort.InferenceSession(path, so, providers=["CPUExecutionProvider"])
+    return out
+
+
+def write_dummy_models(out_dir, vocab=40, hop=320, classes=5, hidden=0, layers=2):
+    """
+    Dynamic-batch stand-ins for asr.onnx ([B, N] -> [B, N//hop, vocab]: strided
+    conv, plus `layers` hidden x hidden ReLU layers when hidden > 0 to mimic
+    an encoder's cost) and ser.onnx ([B, N] -> [B, classes]); returns their paths.
+    """
+    import onnx
+    from onnx import helper, TensorProto, numpy_helper
+    rng = np.random.default_rng(0)
+    os.makedirs(out_dir, exist_ok=True)
+    weight = lambda name, *shape: numpy_helper.from_array((rng.standard_normal(shape) / np.sqrt(shape[-1])).astype(np.float32), name)
+
+    width = hidden or vocab
+    nodes = [helper.make_node("Unsqueeze", ["input", "axis1"], ["x3"]),
+             helper.make_node("Conv", ["x3", "w0"], ["c"], kernel_shape=[hop], strides=[hop]),
+             helper.make_node("Transpose", ["c"], ["h0" if hidden else "logits"], perm=[0, 2, 1])]
+    inits = [numpy_helper.from_array(np.array([1], dtype=np.int64), "axis1"), weight("w0", width, 1, hop)]
+    if hidden:
+        for i in range(layers):
+            nodes += [helper.make_node("MatMul", [f"h{i}", f"w{i + 1}"], [f"m{i}"]),
+                      helper.make_node("Relu", [f"m{i}"], [f"h{i + 1}"])]
+            inits.append(weight(f"w{i + 1}", hidden, hidden))
+        nodes.append(helper.make_node("MatMul", [f"h{layers}", "wo"], ["logits"]))
+        inits.append(weight("wo", hidden, vocab))
+    asr = helper.make_graph(
+        nodes, "dummy_asr",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["B", "N"])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["B", "T", vocab])],
+        inits)
+    ser = helper.make_graph(
+        [helper.make_node("Abs", ["input"], ["a"]),
+         helper.make_node("ReduceMean", ["a"], ["m"], axes=[1], keepdims=1),
+         helper.make_node("MatMul", ["m", "w"], ["scores"])],
+        "dummy_ser",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["B", "N"])],
+        [helper.make_tensor_value_info("scores", TensorProto.FLOAT, ["B", classes])],
+        [numpy_helper.from_array(rng.standard_normal((1, classes)).astype(np.float32), "w")])
+    paths = []
+    for name, graph in (("asr", asr), ("ser", ser)):
+        model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+        model.ir_version = 8
+        path = os.path.join(out_dir, f"{name}.onnx")
+        onnx.save(model, path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Node-local ONNX inference server")
+    parser.add_argument("--socket", default=INFER_SOCKET or "/var/run/hear-infer/infer.sock")
+    parser.add_argument("--asr", default=os.getenv("ONNX_ASR_PATH", "/models/asr.onnx"))
+    parser.add_argument("--ser", default=os.getenv("ONNX_SER_PATH", "/models/ser.onnx"))
+    parser.add_argument("--max-batch", type=int, default=INFER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=INFER_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=int(os.getenv("ORT_INTRA_OP_THREADS", "0")))
+    parser.add_argument("--dummy", default=None, help="Write and serve dummy models from this directory")
+    parser.add_argument("--dummy-hidden", type=int, default=0, help="Hidden width of the dummy ASR encoder")
+    args = parser.parse_args()
+
+    if args.dummy:
+        args.asr, args.ser = write_dummy_models(args.dummy, hidden=args.dummy_hidden)
+    metrics = None
+    if INFER_METRICS_PORT:
+        from prometheus_client import Histogram, start_http_server
+        metrics = Histogram("infer_batch_size", "Clips per ONNX batch", buckets=(1, 2, 4, 8, 16, 32))
+        start_http_server(INFER_METRICS_PORT)
+    os.makedirs(os.path.dirname(os.path.abspath(args.socket)), exist_ok=True)
+    server = InferenceServer(load_sessions(args.asr, args.ser, args.threads), args.max_batch, args.max_wait_ms, metrics=metrics)
+    print(f"[infer] serving {sorted(server.batchers)} on {args.socket} (max batch {args.max_batch}, wait {args.max_wait_ms}ms)")
+    asyncio.run(server.serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Phoneme inventory: one id<->label mapping shared by every stage
+#
+# Built once at startup from PHONEMES (JSON list) or the default ARPAbet set.
+# Lookups are dict/array based instead of list.index, and language variants
+# alias phones produced by the fa/de G2P maps onto the model's labels.
+import os, json, hashlib
+import numpy as np
+
+DEFAULT_PHONEMES = ["<blank>","AA","AE","AH","AO","AW","AY","B","CH","D","DH","EH","ER","EY","F","G","HH","IH","IY","JH","K","L","M","N","NG","OW","OY","P","R","S","SH","T","TH","UH","UW","V","W","Y","Z","ZH"]
+
+# G2P output phones that the acoustic model has no label for -> closest label
+LANGUAGE_ALIASES = {
+    "fa": {"KH": "K", "GH": "G"},
+    "de": {},
+    "en": {},
+}
+
+class PhonemeInventory:
+    def __init__(self, labels, name="custom", aliases=None, lang=None):
+        self.labels = list(labels)
+        self.name = name
+        self.lang = lang
+        self.index = {p: i for i, p in enumerate(self.labels)}
+        for src, dst in (aliases or {}).items():
+            if src not in self.index and dst in self.index:
+                self.index[src] = self.index[dst]
+        self.label_array = np.array(self.labels + ["<unk>"], dtype=object)
+        digest = hashlib.sha1("\x1f".join(self.labels).encode("utf-8")).hexdigest()[:8]
+        self.version = f"{name}@{digest}" + (f"+{lang}" if lang else "")
+
+    @classmethod
+    def load(cls, path=None):
+        if path and os.path.isfile(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(json.load(f), name=os.path.splitext(os.path.basename(path))[0])
+        return cls(DEFAULT_PHONEMES, name="arpabet40")
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.index
+
+    def variant(self, lang):
+        """Same labels, with the G2P aliases of `lang` (fa/de/en) resolvable."""
+        lang = (lang or "").lower()
+        if lang == (self.lang or "") or lang not in LANGUAGE_ALIASES:
+            return self
+        return PhonemeInventory(self.labels, self.name, LANGUAGE_ALIASES[lang], lang)
+
+    def id(self, label, default=0):
+        return self.index.get(label, default)
+
+    def ids(self, labels, default=0):
+        """Label sequence -> np.ndarray[int32] of ids (unknown -> default)."""
+        get = self.index.get
+        return np.fromiter((get(p, default) for p in labels), dtype=np.int32, count=len(labels))
+
+    def labels_for(self, ids):
+        """Id array -> list of labels; ids outside the inventory become 'ID<n>'."""
+        ids = np.asarray(ids, dtype=np.int64)
+        ok = (ids >= 0) & (ids < len(self.labels))
+        out = self.label_array[np.where(ok, ids, len(self.labels))]
+        if not ok.all():
+            for k in np.flatnonzero(~ok):
+                out[k] = f"ID{ids[k]}"
+        return out.tolist()
+
+    def validate_model(self, sess, what="ASR"):
+        """Raise if the session's output vocabulary does not match this inventory."""
+        if sess is None:
+            return
+        shape = sess.get_outputs()[0].shape
+        V = shape[-1] if shape else None
+        if isinstance(V, int) and V != len(self.labels):
+            raise ValueError(f"{what} model vocab size {V} != phoneme inventory {self.version} size {len(self.labels)}")
@@ -0,0 +1,108 @@
+# Precomputed word-bank phoneme index (one per language and G2P backend)
+#
+# Layout of <root>/<lang>-<backend>/:
+#   keys.npy     uint64, sorted 64-bit hashes of the normalised words
+#   offsets.npy  uint32 [n + 1], phone run of word i = phones[offsets[i]:offsets[i+1]]
+#   phones.npy   uint8 ids into meta.json "phones"
+#   meta.json    lang, backend, phones, count, built_at
+# The arrays are memory-mapped read-only, so every worker process shares the
+# same page-cache copy; lookups are a vectorised searchsorted over the keys.
+import os, json, time, shutil, hashlib, unicodedata
+import numpy as np
+
+def normalize_word(word):
+    return unicodedata.normalize("NFC", str(word).strip().lower())
+
+def word_key(word):
+    """64-bit key of a normalised word."""
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+def index_name(lang, backend):
+    return f"{lang}-{backend}"
+
+class LexiconIndex:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.lang = self.meta["lang"]
+        self.backend = self.meta["backend"]
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.phones = np.load(os.path.join(path, "phones.npy"), mmap_mode="r")
+        self._labels = np.array(self.meta["phones"], dtype=object)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, words):
+        """{word: [phones]} for the words in the index (out-of-vocabulary words are absent)."""
+        words = list(dict.fromkeys(words))
+        if not words or not len(self.keys):
+            return {}
+        q = np.fromiter((word_key(normalize_word(w)) for w in words), dtype=np.uint64, count=len(words))
+        pos = np.minimum(np.searchsorted(self.keys, q), len(self.keys) - 1)
+        hit = np.flatnonzero(self.keys[pos] == q)
+        out = {}
+        for i in hit.tolist():
+            a, b = int(self.offsets[pos[i]]), int(self.offsets[pos[i] + 1])
+            out[words[i]] = self._labels[self.phones[a:b]].tolist()
+        return out
+
+def write_index(root, lang, backend, mapping):
+    """
+    Write {word: [phones]} as <root>/<lang>-<backend>/ (replacing any previous build).
+    Returns the index path.
+    """
+    entries = {}
+    for w, ph in mapping.items():
+        entries.setdefault(normalize_word(w), list(ph or []))
+    words = list(entries)
+    keys = np.fromiter((word_key(w) for w in words), dtype=np.uint64, count=len(words))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    if len(keys) > 1 and np.any(keys[1:] == keys[:-1]):
+        raise ValueError(f"word key collision in {index_name(lang, backend)}")
+    phone_set = sorted({p for ph in entries.values() for p in ph})
+    if len(phone_set) > 255:
+        raise ValueError(f"{len(phone_set)} distinct phones do not fit uint8 ids")
+    pid = {p: i for i, p in enumerate(phone_set)}
+    runs = [entries[words[i]] for i in order.tolist()]
+    lens = np.fromiter((len(r) for r in runs), dtype=np.uint32, count=len(runs))
+    offsets = np.zeros(len(runs) + 1, dtype=np.uint32)
+    np.cumsum(lens, out=offsets[1:])
+    phones = np.fromiter((pid[p] for r in runs for p in r), dtype=np.uint8, count=int(offsets[-1]))
+
+    path = os.path.join(root, index_name(lang, backend))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    np.save(os.path.join(tmp, "keys.npy"), keys)
+    np.save(os.path.join(tmp, "offsets.npy"), offsets)
+    np.save(os.path.join(tmp, "phones.npy"), phones)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"lang": lang, "backend": backend, "phones": phone_set, "count": len(runs),
+                   "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}, f)
+    old = f"{path}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.isdir(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return path
+
+def open_indexes(root):
+    """{(lang, backend): LexiconIndex} for every built index under root."""
+    out = {}
+    if not root or not os.path.isdir(root):
+        return out
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.endswith((".tmp", ".old")) or not os.path.isfile(os.path.join(path, "meta.json")):
+            continue
+        try:
+            idx = LexiconIndex(path)
+            out[(idx.lang, idx.backend)] = idx
+        except Exception as ex:
+            print(f"[WARN] lexicon index {name}:", ex)
+    return out
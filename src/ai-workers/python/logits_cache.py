@@ -0,0 +1,160 @@
+# Cached ASR logits so re-analysis can skip the ONNX model
+#
+# Logits are stored as float16, zstd-compressed, keyed by sha256(audio) and
+# the ASR model version, next to a small JSON sidecar (emotion, submission,
+# model version, compression). Loading decompresses once into an uncompressed
+# .npy under <root>/mmap/ and memory-maps it, so repeated re-analysis is
+# I/O-free; that directory is an LRU bounded by LOGITS_CACHE_MMAP_MB.
+# An optional blob container (SAS URL) mirrors the local store.
+import os, io, json, hashlib
+import numpy as np
+
+try:
+    import zstandard as zstd
+except Exception as ex:  # optional: fall back to uncompressed .npy
+    zstd = None
+    print("[WARN] zstandard not available; logits cache stored uncompressed:", ex)
+
+ZSTD_LEVEL = int(os.getenv("LOGITS_CACHE_ZSTD_LEVEL", "3"))
+MMAP_MB = float(os.getenv("LOGITS_CACHE_MMAP_MB", "2048"))  # decompressed copies kept under <root>/mmap/
+
+def file_version(path):
+    """Content hash of a model file (short), or 'dummy' when it is missing."""
+    if not path or not os.path.isfile(path):
+        return "dummy"
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def cache_key(audio_bytes, model_version):
+    return f"{hashlib.sha256(audio_bytes).hexdigest()}-{model_version}"
+
+class LogitsStore:
+    def __init__(self, root, container_url=None, mmap_bytes=MMAP_MB * 1024 * 1024):
+        self.root = root
+        self.container_url = container_url
+        self.mmap_bytes = mmap_bytes
+        for sub in ("logits", "meta", "mmap", "by-submission"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self._container = None
+
+    # ---- layout ----
+    def _blob_name(self, key, compression):
+        return f"logits/{key}.npy" + (".zst" if compression == "zstd" else "")
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _remote(self):
+        if self.container_url and self._container is None:
+            from azure.storage.blob import ContainerClient
+            self._container = ContainerClient.from_container_url(self.container_url)
+        return self._container
+
+    # ---- write ----
+    def put(self, key, logits, meta=None, submission_id=None):
+        buf = io.BytesIO()
+        np.save(buf, np.ascontiguousarray(logits, dtype=np.float16))
+        data = buf.getvalue()
+        compression = "zstd" if zstd else None
+        if compression:
+            data = zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        meta = dict(meta or {}, key=key, shape=list(np.shape(logits)), compression=compression)
+        meta_bytes = json.dumps(meta).encode("utf-8")
+        self._write(self._blob_name(key, compression), data)
+        self._write(f"meta/{key}.json", meta_bytes)
+        if submission_id:
+            self._write(f"by-submission/{submission_id}", key.encode("utf-8"))
+        return key
+
+    def _write(self, name, data):
+        path = self._path(name)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        remote = self._remote()
+        if remote is not None:
+            remote.upload_blob(name, data, overwrite=True)
+
+    # ---- read ----
+    def _local(self, name):
+        """Local path for `name`, fetching it from the container if needed."""
+        path = self._path(name)
+        if not os.path.isfile(path):
+            remote = self._remote()
+            if remote is None:
+                return None
+            try:
+                data = remote.download_blob(name).readall()
+            except Exception:
+                return None
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return path
+
+    def _read(self, name):
+        path = self._local(name)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def key_for_submission(self, submission_id):
+        data = self._read(f"by-submission/{submission_id}")
+        return data.decode("utf-8") if data else None
+
+    def meta(self, key):
+        data = self._read(f"meta/{key}.json")
+        return json.loads(data) if data else None
+
+    def get(self, key):
+        """Memory-mapped float16 [T, V] logits, or None if not cached."""
+        meta = self.meta(key)
+        if meta is None:
+            return None
+        if "compression" in meta:
+            compression = meta["compression"]
+        else:  # written before the sidecar recorded it
+            compression = "zstd" if self._local(self._blob_name(key, "zstd")) else None
+        if compression is None:
+            path = self._local(self._blob_name(key, None))
+            return np.load(path, mmap_mode="r") if path else None
+        if not zstd:
+            print(f"[WARN] logits {key} are zstd-compressed but zstandard is not available")
+            return None
+        mm = self._path("mmap", f"{key}.npy")
+        if os.path.isfile(mm):
+            os.utime(mm)  # most recently used
+        else:
+            data = self._read(self._blob_name(key, "zstd"))
+            if data is None:
+                return None
+            tmp = f"{mm}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zstd.ZstdDecompressor().decompress(data))
+            os.replace(tmp, mm)
+            self._prune_mmap(keep=mm)
+        return np.load(mm, mmap_mode="r")
+
+    def _prune_mmap(self, keep):
+        """Drop the least recently used decompressed copies beyond mmap_bytes (open maps stay valid)."""
+        files = []
+        with os.scandir(self._path("mmap")) as it:
+            for entry in it:
+                if entry.name.endswith(".npy") and entry.path != keep:
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files) + os.path.getsize(keep)
+        for _, size, path in sorted(files):
+            if total <= self.mmap_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,139 @@
+# Incremental per-child phoneme proficiency (for curriculum focus)
+#
+# child_phoneme_stats keeps an exponentially decayed count / mean / M2 per
+# (child, phoneme). Each clip's observations are merged in SQL (one upsert per
+# message, inside the report transaction), so concurrent replicas never lose
+# each other's observations; the same statement returns all of the child's
+# rows, so the focus is ranked on current stats rather than on what this
+# replica loaded earlier. A per-process LRU cache mirrors the rows and the
+# last written focus set (curricula are derived from them with hysteresis);
+# it is only updated once the transaction has committed (remember), and
+# dropped (forget) when anything fails.
+import os, math
+from collections import OrderedDict
+import numpy as np
+
+PROF_HALF_LIFE_DAYS = float(os.getenv("PROF_HALF_LIFE_DAYS", "14"))
+PROF_MIN_COUNT = float(os.getenv("PROF_MIN_COUNT", "2"))      # effective observations before ranking
+PROF_FOCUS_SIZE = int(os.getenv("PROF_FOCUS_SIZE", "3"))
+PROF_HYSTERESIS = float(os.getenv("PROF_HYSTERESIS", "0.05"))  # keep a focus phoneme until this much above the cut
+PROF_CACHE_SIZE = int(os.getenv("PROF_CACHE_SIZE", "10000"))   # children
+
+SCHEMA_SQL = """
+create table if not exists child_phoneme_stats(
+  child_id uuid not null,
+  phoneme text not null,
+  n double precision not null,
+  mean double precision not null,
+  m2 double precision not null,
+  updated_at timestamptz not null default now(),
+  primary key(child_id, phoneme)
+);
+"""
+
+def segment_value(seg):
+    """Per-segment proficiency in 0..1: exp(GOP) when scored, else CTC confidence."""
+    if seg.get("gop") is not None:
+        return math.exp(seg["gop"])
+    return float(seg.get("conf", 0.0))
+
+def batch_stats(segments):
+    """{phoneme: (count, mean, m2)} for one clip."""
+    groups = {}
+    for s in segments:
+        try:
+            groups.setdefault(s["p"], []).append(segment_value(s))
+        except Exception:
+            pass
+    out = {}
+    for p, v in groups.items():
+        x = np.asarray(v, dtype=np.float64)
+        out[p] = (float(x.size), float(x.mean()), float(((x - x.mean()) ** 2).sum()))
+    return out
+
+def derive_focus(stats, current=None, size=PROF_FOCUS_SIZE, min_count=PROF_MIN_COUNT, margin=PROF_HYSTERESIS):
+    """
+    Weakest `size` phonemes by decayed mean. Phonemes already in `current`
+    stay while their mean is within `margin` of the cut-off, so a single clip
+    cannot flip the curriculum back and forth.
+    """
+    pool = {p: v[1] for p, v in stats.items() if v[0] >= min_count} or {p: v[1] for p, v in stats.items()}
+    if not pool:
+        return list(current or [])
+    ranked = sorted(pool, key=pool.get)
+    cut = pool[ranked[min(size, len(ranked)) - 1]] + margin
+    keep = [p for p in (current or []) if p in pool and pool[p] <= cut][:size]
+    return keep + [p for p in ranked if p not in keep][:size - len(keep)]
+
+class ProficiencyStore:
+    def __init__(self, half_life_days=PROF_HALF_LIFE_DAYS, cache_size=PROF_CACHE_SIZE):
+        self.half_life_s = half_life_days * 86400.0
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # child_id -> {"stats": {p: (n, mean, m2)}, "focus": [...]}
+        self._schema_ready = False
+
+    def _entry(self, cur, child_id):
+        entry = self._cache.get(child_id)
+        if entry is not None:
+            self._cache.move_to_end(child_id)
+            return entry
+        cur.execute('select phoneme, n, mean, m2 from child_phoneme_stats where child_id=%s', (child_id,))
+        stats = {r[0]: (float(r[1]), float(r[2]), float(r[3])) for r in cur.fetchall()}
+        cur.execute('select "FocusPhonemesCsv" from "ChildCurricula" where "ChildId"=%s', (child_id,))
+        row = cur.fetchone()
+        focus = [p for p in (row[0] or "").split(",") if p] if row else []
+        entry = {"stats": stats, "focus": focus}
+        self._cache[child_id] = entry
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def observe(self, cur, child_id, segments):
+        """
+        Merge one clip into the child's stats (single upsert); returns the
+        updated entry without touching the cache (see remember).
+        """
+        import psycopg2.extras
+        if not self._schema_ready:
+            cur.execute(SCHEMA_SQL)
+            self._schema_ready = True
+        child_id = str(child_id)
+        cached = self._entry(cur, child_id)
+        entry = {"stats": dict(cached["stats"]), "focus": list(cached["focus"])}
+        batch = batch_stats(segments)
+        if not batch:
+            return entry
+        lam = f"power(0.5, greatest(0, extract(epoch from now() - child_phoneme_stats.updated_at)) / {float(self.half_life_s)!r})"
+        rows = psycopg2.extras.execute_values(cur, f"""
+            with up as (
+            insert into child_phoneme_stats(child_id, phoneme, n, mean, m2, updated_at) values %s
+            on conflict (child_id, phoneme) do update set
+              n = {lam} * child_phoneme_stats.n + excluded.n,
+              mean = ({lam} * child_phoneme_stats.n * child_phoneme_stats.mean + excluded.n * excluded.mean)
+                     / ({lam} * child_phoneme_stats.n + excluded.n),
+              m2 = {lam} * child_phoneme_stats.m2 + excluded.m2
+                   + ({lam} * child_phoneme_stats.n * excluded.n / ({lam} * child_phoneme_stats.n + excluded.n))
+                     * power(child_phoneme_stats.mean - excluded.mean, 2),
+              updated_at = now()
+            returning child_id, phoneme, n, mean, m2
+            )
+            select phoneme, n, mean, m2 from up
+            union all
+            select s.phoneme, s.n, s.mean, s.m2 from child_phoneme_stats s
+            where s.child_id = (select child_id from up limit 1)
+              and not exists (select 1 from up where up.phoneme = s.phoneme)
+            """, [(child_id, p, n, m, s) for p, (n, m, s) in batch.items()],
+            template="(%s::uuid, %s, %s, %s, %s, now())", page_size=len(batch), fetch=True)
+        entry["stats"] = {p: (float(n), float(m), float(s)) for p, n, m, s in rows}
+        return entry
+
+    def remember(self, child_id, entry):
+        """Cache an entry returned by observe once its transaction has committed."""
+        child_id = str(child_id)
+        self._cache[child_id] = entry
+        self._cache.move_to_end(child_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def forget(self, child_id):
+        self._cache.pop(str(child_id), None)
@@ -0,0 +1,192 @@
+"""
+Offline re-scoring of archived submissions.
+
+Reads a manifest (CSV or JSONL with submissionId, childId and a local path or
+blobUrl per row), runs the worker pipeline (main.analyze_bytes) in a process
+pool and writes results as Parquet part files under --out. Each part is
+written atomically, so re-running with the same --out resumes where the last
+run stopped.
+
+With --from-logits, rows whose ASR logits are in the LOGITS_CACHE_DIR store
+only re-run decoding, alignment and scoring.
+
+Models are loaded once in the parent and the pool is forked, so every worker
+shares the same read-only session weights; each worker runs single-threaded
+ONNX/BLAS so the pool keeps all cores busy without oversubscription.
+
+    python rescore.py manifest.csv --out rescore/ --workers 8 --diff
+"""
+import os
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+os.environ.setdefault("ORT_INTRA_OP_THREADS", "1")
+
+import argparse, csv, glob, json, time, uuid
+import multiprocessing as mp
+
+import main as worker
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("submission_id", pa.string()), ("child_id", pa.string()), ("source", pa.string()),
+        ("score", pa.int32()), ("emotion", pa.string()), ("weakness", pa.string()),
+        ("segments", pa.string()), ("error", pa.string()), ("cached", pa.bool_()), ("seconds", pa.float64()),
+        ("scoring", pa.string()), ("rescored_at", pa.string()),
+    ])
+
+
+def read_manifest(path):
+    """Rows of {submission_id, child_id, source} from CSV or JSONL."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    out = []
+    for r in rows:
+        source = r.get("path") or r.get("blobUrl") or r.get("blob_url")
+        sid = r.get("submissionId") or r.get("submission_id") or source
+        if source:
+            out.append({"submission_id": str(sid),
+                        "child_id": r.get("childId") or r.get("child_id") or None,
+                        "source": source})
+    return out
+
+
+def read_source(source):
+    if source.startswith(("http://", "https://")):
+        from azure.storage.blob import BlobClient
+        return BlobClient.from_blob_url(source).download_blob().readall()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def rescore_one(row):
+    start = time.time()
+    res = {"submission_id": row["submission_id"], "child_id": row["child_id"], "source": row["source"],
+           "score": None, "emotion": None, "weakness": None, "segments": None, "error": None, "cached": False}
+    try:
+        target_ph = worker.resolve_target_phonemes(row["child_id"])
+        r = None
+        if row.get("from_logits"):
+            r = worker.reanalyze_cached(submission_id=row["submission_id"], target_ph=target_ph)
+        res["cached"] = r is not None
+        if r is None:
+            r = worker.analyze_bytes(read_source(row["source"]), target_ph, row["submission_id"])
+        res.update(score=int(r["score"]), emotion=r["emotion"], weakness=r["weakness"],
+                   segments=json.dumps(r["segments"]))
+    except Exception as ex:
+        res["error"] = f"{type(ex).__name__}: {ex}"
+    res["seconds"] = round(time.time() - start, 4)
+    return res
+
+
+def completed_ids(out_dir, retry_errors=False):
+    import pyarrow.parquet as pq
+    done = set()
+    for part in glob.glob(os.path.join(out_dir, "part-*.parquet")):
+        t = pq.read_table(part, columns=["submission_id", "error"]).to_pydict()
+        for sid, err in zip(t["submission_id"], t["error"]):
+            if err is None or not retry_errors:
+                done.add(sid)
+    return done
+
+
+def write_part(out_dir, results):
+    import pyarrow as pa, pyarrow.parquet as pq
+    rescored_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    for r in results:
+        r["scoring"] = worker.SCORING
+        r["rescored_at"] = rescored_at
+    name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp = os.path.join(out_dir, "." + name + ".tmp")
+    pq.write_table(pa.Table.from_pylist(results, schema=_schema()), tmp)
+    os.replace(tmp, os.path.join(out_dir, name))
+
+
+def run(manifest, out_dir, workers=None, flush_every=256, retry_errors=False, from_logits=False):
+    os.makedirs(out_dir, exist_ok=True)
+    rows = read_manifest(manifest)
+    for r in rows:
+        r["from_logits"] = from_logits
+    done = completed_ids(out_dir, retry_errors)
+    todo = [r for r in rows if r["submission_id"] not in done]
+    workers = workers or os.cpu_count() or 1
+    print(f"[rescore] {len(rows)} in manifest, {len(rows) - len(todo)} already done, {len(todo)} to go on {workers} workers")
+    if not todo:
+        return 0
+    start, n, errors, buf = time.time(), 0, 0, []
+    ctx = mp.get_context("fork")
+    with ctx.Pool(workers) as pool:
+        for res in pool.imap_unordered(rescore_one, todo, chunksize=max(1, min(16, len(todo) // (workers * 4)))):
+            buf.append(res)
+            n += 1
+            errors += res["error"] is not None
+            if len(buf) >= flush_every:
+                write_part(out_dir, buf)
+                buf = []
+                print(f"[rescore] {n}/{len(todo)} ({n / (time.time() - start):.1f}/s, {errors} errors)")
+    if buf:
+        write_part(out_dir, buf)
+    print(f"[rescore] finished {n} in {time.time() - start:.1f}s ({errors} errors)")
+    return n
+
+
+def diff_reports(out_dir, pg_conn):
+    """Compare new scores with the latest FeedbackReports row per submission; writes diff.parquet."""
+    import pyarrow as pa, pyarrow.parquet as pq
+    import psycopg2
+    parts = sorted(glob.glob(os.path.join(out_dir, "part-*.parquet")))
+    new = {}
+    for part in parts:  # later parts win
+        t = pq.read_table(part, columns=["submission_id", "score", "error"]).to_pydict()
+        for sid, score, err in zip(t["submission_id"], t["score"], t["error"]):
+            if err is None:
+                new[sid] = score
+    old = {}
+    ids = list(new)
+    with psycopg2.connect(pg_conn) as conn:
+        with conn.cursor() as cur:
+            for i in range(0, len(ids), 5000):
+                cur.execute("""
+                    select distinct on ("SubmissionId") "SubmissionId"::text, "Score0_100"
+                    from "FeedbackReports" where "SubmissionId"::text = any(%s)
+                    order by "SubmissionId", "CreatedAtUtc" desc
+                    """, (ids[i:i+5000],))
+                old.update(cur.fetchall())
+    rows = [{"submission_id": sid, "old_score": old.get(sid), "new_score": score,
+             "delta": None if old.get(sid) is None else score - old[sid]}
+            for sid, score in new.items()]
+    pq.write_table(pa.Table.from_pylist(rows), os.path.join(out_dir, "diff.parquet"))
+    deltas = [r["delta"] for r in rows if r["delta"] is not None]
+    if deltas:
+        changed = sum(1 for d in deltas if d != 0)
+        print(f"[diff] {len(deltas)} compared, {changed} changed, mean |delta| {sum(map(abs, deltas)) / len(deltas):.2f}")
+    else:
+        print("[diff] no matching FeedbackReports")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score archived submissions")
+    parser.add_argument("manifest", help="CSV/JSONL with submissionId, childId, path or blobUrl")
+    parser.add_argument("--out", required=True, help="Output directory for Parquet parts (resumable)")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: all cores)")
+    parser.add_argument("--flush-every", type=int, default=256, help="Results per Parquet part / checkpoint")
+    parser.add_argument("--retry-errors", action="store_true", help="Re-run rows that failed previously")
+    parser.add_argument("--from-logits", action="store_true",
+                        help="Reuse cached ASR logits (LOGITS_CACHE_DIR) and skip the models where possible")
+    parser.add_argument("--diff", action="store_true", help="Diff scores against FeedbackReports (needs PG_CONN)")
+    args = parser.parse_args()
+
+    run(args.manifest, args.out, args.workers, args.flush_every, args.retry_errors, args.from_logits)
+    if args.diff:
+        if not worker.PG_CONN:
+            parser.error("--diff requires PG_CONN")
+        diff_reports(args.out, worker.PG_CONN)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Tests for CTC forced alignment"""
+import numpy as np
+import pytest
+
+import alignment
+from alignment import viterbi_ctc_align, alignment_bytes
+
+
+def reference_align(logits, target_seq_ids):
+    """Full (T+1)x(N+1) DP, as the worker originally implemented it."""
+    T = logits.shape[0]
+    N = len(target_seq_ids)
+    e = np.exp(logits - np.max(logits, axis=-1, keepdims=True))
+    probs = e / np.sum(e, axis=-1, keepdims=True)
+    dp = np.full((T+1, N+1), -1e9, dtype=np.float32)
+    bp = np.full((T+1, N+1), -1, dtype=np.int32)
+    dp[0, 0] = 0.0
+    for t in range(1, T+1):
+        opt_blank = dp[t-1, :] + np.log(max(probs[t-1, 0], 1e-8))
+        dp[t, :] = np.maximum(dp[t, :], opt_blank)
+        for n in range(1, N+1):
+            val_adv = dp[t-1, n-1] + np.log(max(probs[t-1, target_seq_ids[n-1]], 1e-8))
+            if val_adv > dp[t, n]:
+                dp[t, n] = val_adv
+                bp[t, n] = 1
+    n = int(np.argmax(dp[T, :]))
+    assign = np.full(T, -1, dtype=np.int32)
+    t = T
+    while t > 0 and n >= 0:
+        if bp[t, n] == 1:
+            assign[t-1] = n-1
+            n -= 1
+        t -= 1
+    return assign
+
+
+def make_logits(T, V, targets, seed=0):
+    """Blank-heavy logits with the targets spoken in order."""
+    rng = np.random.default_rng(seed)
+    logits = rng.standard_normal((T, V)).astype(np.float32)
+    logits[:, 0] += 2.0
+    bounds = np.linspace(0, T, len(targets) + 1).astype(int)
+    for k, pid in enumerate(targets):
+        logits[bounds[k]:bounds[k] + max(1, (bounds[k+1] - bounds[k]) // 2), pid] += 4.0
+    return logits
+
+
+@pytest.mark.parametrize("T,V,N", [(1, 5, 1), (40, 10, 6), (300, 40, 25), (700, 40, 64)])
+def test_matches_full_dp(T, V, N):
+    rng = np.random.default_rng(T)
+    targets = list(rng.integers(1, V, size=N))
+    logits = make_logits(T, V, targets, seed=N)
+    np.testing.assert_array_equal(viterbi_ctc_align(logits, targets), reference_align(logits, targets))
+
+
+def test_checkpointed_matches_full_dp():
+    targets = [3, 7, 7, 12, 5, 9, 1, 30, 22, 14]
+    logits = make_logits(900, 40, targets, seed=3)
+    expected = reference_align(logits, targets)
+    # budget far below the packed backpointer table forces checkpoint recomputation
+    budget = alignment_bytes(900, len(targets)) // 4
+    np.testing.assert_array_equal(viterbi_ctc_align(logits, targets, max_bytes=budget), expected)
+
+
+def test_empty_target_is_all_blank():
+    logits = make_logits(20, 8, [1, 2], seed=1)
+    assert (viterbi_ctc_align(logits, []) == -1).all()
+
+
+def test_scratch_buffers_are_reused():
+    targets = [1, 2, 3]
+    logits = make_logits(50, 8, targets)
+    viterbi_ctc_align(logits, targets)
+    row = alignment._scratch.row
+    viterbi_ctc_align(logits[:30], targets)
+    assert alignment._scratch.row is row
+
+
+@pytest.mark.parametrize("T,N", [(200, 12), (600, 40), (1500, 90)])
+def test_banded_matches_full_dp(T, N):
+    rng = np.random.default_rng(N)
+    targets = list(rng.integers(1, 40, size=N))
+    logits = make_logits(T, 40, targets, seed=T)
+    info = {}
+    assign = viterbi_ctc_align(logits, targets, mode="band", info=info)
+    assert info["mode"] == "band" and not info["fallback"]
+    np.testing.assert_array_equal(assign, reference_align(logits, targets))
+
+
+@pytest.mark.parametrize("T,N", [(200, 12), (600, 40)])
+def test_beam_matches_full_dp(T, N):
+    rng = np.random.default_rng(N)
+    targets = list(rng.integers(1, 40, size=N))
+    logits = make_logits(T, 40, targets, seed=T)
+    info = {}
+    assign = viterbi_ctc_align(logits, targets, mode="beam", info=info)
+    assert not info["fallback"]
+    np.testing.assert_array_equal(assign, reference_align(logits, targets))
+
+
+def test_band_widens_and_falls_back_when_too_narrow():
+    # all targets spoken in the first fifth of the clip: far off the diagonal
+    targets = list(range(1, 31))
+    logits = make_logits(100, 40, targets, seed=5)
+    logits = np.concatenate([logits, np.tile(logits[-1:], (400, 1))])
+    logits[100:, 0] += 10.0
+    info = {}
+    assign = alignment.banded_ctc_align(logits, targets, width=2, info=info)
+    assert info["widenings"] > 0
+    np.testing.assert_array_equal(assign, reference_align(logits, targets))
+
+
+def test_beam_falls_back_when_window_overflows():
+    targets = [1, 2, 3, 4, 5, 6]
+    logits = np.zeros((30, 8), dtype=np.float32)  # flat posteriors: nothing gets pruned
+    info = {}
+    assign = alignment.beam_ctc_align(logits, targets, max_width=3, info=info)
+    assert info["fallback"]
+    np.testing.assert_array_equal(assign, reference_align(logits, targets))
@@ -0,0 +1,49 @@
+"""Tests for the compiled G2P rule tables"""
+from g2p import G2PTable, get_table, detect_language
+from inventory import PhonemeInventory
+
+
+def test_multi_character_graphemes_win_over_letters():
+    de = get_table("de")
+    assert de.words(["Schule", "Katze"]) == [["SH", "UH", "L", "EH"], ["K", "AA", "T", "S", "EH"]]
+    assert get_table("en")(["ship"]) == ["SH", "IH", "P"]
+
+
+def test_context_rules():
+    de = get_table("de")
+    assert de.words(["Buch", "ich"]) == [["B", "UH", "K"], ["IH", "SH"]]       # ach- vs ich-Laut
+    assert de.words(["Spiel", "Hund"]) == [["SH", "P", "IY", "L"], ["HH", "UH", "N", "T"]]  # initial sp, final devoicing
+    assert get_table("en").words(["city", "cake"]) == [["S", "IH", "T", "IY"], ["K", "AH", "K"]]
+
+
+def test_lexicon_exceptions_are_whole_words():
+    en = get_table("en")
+    assert en.words(["Cat!", "catalog"]) == [["K", "AE", "T"], ["K", "AH", "T", "AH", "L", "AO", "G"]]
+
+
+def test_batch_matches_single_words_and_repeats():
+    de = get_table("de")
+    words = ["Buch", "Hund", "Buch", "ich", "Hund", "Buch"]
+    single = [de.words([w])[0] for w in words]
+    assert de.words(words) == single
+    assert de(words) == [p for ph in single for p in ph]
+    assert de([]) == [] and de.words([]) == []
+
+
+def test_farsi_normalisation_and_inventory_aliases():
+    inv = PhonemeInventory.load()
+    fa = get_table("fa", inv.variant("fa"))
+    assert fa(["كتاب"]) == fa(["کتاب"]) == ["K", "T", "AA", "B"]   # Arabic kaf
+    assert fa(["خواهر"]) == ["K", "AA", "HH", "R"]                  # KH -> K for the model
+    assert "KH" in get_table("fa").phones
+
+
+def test_unknown_letters_and_custom_table():
+    t = G2PTable("xx", {"a": "AA"}, rules=[("ab", "B", "^", "")], unknown="S")
+    assert t.words(["ab", "cab", "a-1"]) == [["B"], ["S", "AA", "S"], ["AA"]]
+
+
+def test_detect_language():
+    assert detect_language(["سلام"]) == "fa"
+    assert detect_language(["Größe"]) == "de"
+    assert detect_language(["hello"]) == "en"
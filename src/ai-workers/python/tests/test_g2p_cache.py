@@ -0,0 +1,49 @@
+"""Tests for the bulk/async child_g2p_cache writer"""
+import json
+import threading
+
+from g2p_cache import G2PCache, _copy_text, cache_rows
+
+CHILD = "00000000-0000-0000-0000-000000000001"
+
+
+def test_copy_text_escapes_fields():
+    rows = cache_rows(CHILD, {"a\tb": ["AA"], "c\\d": []})
+    assert _copy_text(rows) == f'{CHILD}\ta\\tb\t["AA"]\n{CHILD}\tc\\\\d\t[]\n'
+
+
+def test_sync_store_writes_one_batch():
+    batches = []
+    cache = G2PCache("", async_writes=False, writer=batches.append)
+    cache.store(CHILD, {"cat": ["K", "AE", "T"], "dog": ["D", "AO", "G"]})
+    cache.store(CHILD, {})
+    assert batches == [[(CHILD, "cat", json.dumps(["K", "AE", "T"])), (CHILD, "dog", json.dumps(["D", "AO", "G"]))]]
+
+
+def test_async_store_coalesces_and_never_blocks():
+    release = threading.Event()
+    batches = []
+
+    def writer(rows):
+        release.wait(5)
+        batches.append(sorted(rows))
+
+    cache = G2PCache("", async_writes=True, flush_ms=50, writer=writer)
+    cache.store(CHILD, {"cat": ["K"]})
+    cache.store(CHILD, {"cat": ["K", "AE", "T"], "dog": ["D"]})   # returns while the writer is blocked
+    release.set()
+    cache.flush()
+    rows = [r for b in batches for r in b]
+    assert (CHILD, "cat", json.dumps(["K", "AE", "T"])) in rows     # last write wins
+    assert (CHILD, "dog", json.dumps(["D"])) in rows
+    assert len(batches) <= 2
+
+
+def test_async_queue_full_drops():
+    release = threading.Event()
+    cache = G2PCache("", async_writes=True, max_pending=1, flush_ms=0, writer=lambda rows: release.wait(5))
+    for i in range(5):
+        cache.store(CHILD, {f"w{i}": ["AA"]})
+    assert cache.dropped >= 1
+    release.set()
+    cache.flush()
@@ -0,0 +1,55 @@
+"""Tests for GOP scoring"""
+import numpy as np
+
+from gop import phone_log_posteriors, score_segments, gop_score
+
+LABELS = ["<blank>", "AA", "B", "K", "S", "T"]
+
+
+def make_clip():
+    rng = np.random.default_rng(0)
+    logits = rng.standard_normal((60, len(LABELS))).astype(np.float32)
+    logits[0:20, 3] += 5.0   # K
+    logits[20:40, 1] += 5.0  # AA
+    logits[40:60, 4] += 5.0  # S, but the target says T
+    segments = [
+        {"p": "K", "start": 0.0, "end": 0.4, "conf": 0.9},
+        {"p": "AA", "start": 0.4, "end": 0.8, "conf": 0.9},
+        {"p": "T", "start": 0.8, "end": 1.2, "conf": 0.2},
+    ]
+    return logits, segments, [3, 1, 5]
+
+
+def test_matches_per_segment_computation():
+    logits, segments, ids = make_clip()
+    scored = score_segments(logits, segments, ids, LABELS)
+    logp = phone_log_posteriors(logits)
+    for seg, (a, b), pid in zip(scored, [(0, 20), (20, 40), (40, 60)], ids):
+        chunk = logp[a:b].astype(np.float64)
+        lpp = chunk[:, pid - 1].mean()
+        assert np.isclose(seg["lpp"], lpp, atol=1e-3)
+        assert np.isclose(seg["lpr"], lpp - chunk.mean(axis=0).max(), atol=1e-3)
+        assert np.isclose(seg["gop"], (chunk[:, pid - 1] - chunk.max(axis=1)).mean(), atol=1e-3)
+
+
+def test_substitution_candidates():
+    logits, segments, ids = make_clip()
+    scored = score_segments(logits, segments, ids, LABELS)
+    assert scored[0]["subs"] == [] and scored[1]["subs"] == []
+    assert scored[2]["subs"][0] == "S"
+    assert scored[2]["gop"] < scored[0]["gop"]
+
+
+def test_unknown_phone_is_not_scored():
+    logits, segments, _ = make_clip()
+    scored = score_segments(logits, segments, [3, 0, 5], LABELS)
+    assert scored[1]["gop"] is None
+
+
+def test_gop_score_range_and_emotion_penalty():
+    logits, segments, ids = make_clip()
+    scored = score_segments(logits, segments, ids, LABELS)
+    calm = gop_score(scored, "neutral")
+    assert 0 <= calm <= 100
+    assert gop_score(scored, "frustrated") == max(0, calm - 10)
+    assert gop_score([], "neutral") == 0
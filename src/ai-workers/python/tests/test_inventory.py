@@ -0,0 +1,54 @@
+"""Tests for the phoneme inventory"""
+import json
+
+import numpy as np
+import pytest
+
+from inventory import PhonemeInventory, DEFAULT_PHONEMES
+
+
+class FakeOutput:
+    def __init__(self, shape):
+        self.shape = shape
+
+
+class FakeSession:
+    def __init__(self, shape):
+        self._out = [FakeOutput(shape)]
+
+    def get_outputs(self):
+        return self._out
+
+
+def test_ids_and_labels_roundtrip():
+    inv = PhonemeInventory.load()
+    ids = inv.ids(["K", "AE", "T", "??"])
+    assert ids.dtype == np.int32
+    assert ids.tolist() == [DEFAULT_PHONEMES.index(p) for p in ("K", "AE", "T")] + [0]
+    assert inv.labels_for(ids[:3]) == ["K", "AE", "T"]
+    assert inv.labels_for([1, len(inv) + 2]) == ["AA", f"ID{len(inv) + 2}"]
+
+
+def test_load_from_file_and_version(tmp_path):
+    path = tmp_path / "phones.json"
+    path.write_text(json.dumps(["<blank>", "A", "B"]))
+    inv = PhonemeInventory.load(str(path))
+    assert len(inv) == 3 and inv.version.startswith("phones@")
+    assert inv.version != PhonemeInventory.load().version
+
+
+def test_language_variant_aliases():
+    inv = PhonemeInventory.load()
+    assert inv.id("KH") == 0
+    fa = inv.variant("fa")
+    assert fa.id("KH") == inv.id("K") and fa.id("GH") == inv.id("G")
+    assert fa.labels == inv.labels and fa.version.endswith("+fa")
+    assert inv.variant("xx") is inv
+
+
+def test_validate_model_vocab():
+    inv = PhonemeInventory.load()
+    inv.validate_model(FakeSession([1, "T", len(inv)]))
+    inv.validate_model(FakeSession([1, "T", "V"]))  # dynamic vocab axis: nothing to check
+    with pytest.raises(ValueError):
+        inv.validate_model(FakeSession([1, "T", len(inv) + 1]))
@@ -0,0 +1,23 @@
+"""Tests for the memory-mapped word-bank phoneme index"""
+import numpy as np
+
+from lexicon_index import LexiconIndex, open_indexes, write_index
+
+
+def test_roundtrip_and_oov(tmp_path):
+    path = write_index(str(tmp_path), "de", "table", {"Buch": ["B", "UH", "K"], "ich": ["IH", "SH"], "ja": []})
+    idx = LexiconIndex(path)
+    assert len(idx) == 3
+    assert idx.lookup(["buch ", "ICH", "ja", "Hund"]) == {"buch ": ["B", "UH", "K"], "ICH": ["IH", "SH"], "ja": []}
+    assert isinstance(idx.phones, np.memmap) and idx.phones.dtype == np.uint8
+
+
+def test_rebuild_replaces_and_open_indexes(tmp_path):
+    write_index(str(tmp_path), "en", "g2p_en", {"cat": ["K", "AE", "T"]})
+    write_index(str(tmp_path), "en", "g2p_en", {"dog": ["D", "AO", "G"]})
+    write_index(str(tmp_path), "fa", "table", {"تو": ["T", "UW"]})
+    indexes = open_indexes(str(tmp_path))
+    assert set(indexes) == {("en", "g2p_en"), ("fa", "table")}
+    assert indexes[("en", "g2p_en")].lookup(["cat", "dog"]) == {"dog": ["D", "AO", "G"]}
+    assert indexes[("fa", "table")].lookup(["تو"]) == {"تو": ["T", "UW"]}
+    assert open_indexes(str(tmp_path / "missing")) == {}
@@ -0,0 +1,60 @@
+"""Tests for the cached ASR logits store"""
+import numpy as np
+
+from logits_cache import LogitsStore, cache_key
+
+
+def test_roundtrip_is_float16_memmap(tmp_path):
+    store = LogitsStore(str(tmp_path))
+    logits = np.random.default_rng(0).standard_normal((120, 40)).astype(np.float32)
+    key = cache_key(b"RIFF-audio", "v1")
+    store.put(key, logits, {"emotion": "happy", "model_version": "v1"}, submission_id="sub-1")
+
+    cached = store.get(key)
+    assert isinstance(cached, np.memmap)
+    assert cached.dtype == np.float16 and cached.shape == logits.shape
+    np.testing.assert_allclose(cached, logits, atol=2e-3)
+    assert store.key_for_submission("sub-1") == key
+    assert store.meta(key)["emotion"] == "happy"
+    # a second store over the same root serves it without re-decompressing
+    assert np.array_equal(LogitsStore(str(tmp_path)).get(key), cached)
+
+
+def test_miss_returns_none(tmp_path):
+    store = LogitsStore(str(tmp_path))
+    assert store.get(cache_key(b"other", "v1")) is None
+    assert store.key_for_submission("nope") is None
+
+
+def test_key_depends_on_audio_and_model_version():
+    assert cache_key(b"a", "v1") != cache_key(b"a", "v2")
+    assert cache_key(b"a", "v1") != cache_key(b"b", "v1")
+
+
+def test_decompressed_copies_are_bounded(tmp_path):
+    logits = np.zeros((100, 40), dtype=np.float32)  # 8 kB as float16
+    store = LogitsStore(str(tmp_path), mmap_bytes=20_000)
+    keys = [cache_key(bytes([i]), "v1") for i in range(4)]
+    for key in keys:
+        store.put(key, logits)
+        store.get(key)
+    kept = sorted(p.name for p in (tmp_path / "mmap").iterdir())
+    assert kept == sorted(f"{key}.npy" for key in keys[-2:])
+    assert store.get(keys[0]).shape == (100, 40)  # evicted copies are decompressed again
+
+
+def test_compression_is_read_from_the_sidecar(tmp_path, monkeypatch):
+    import json
+    import logits_cache
+    logits = np.ones((10, 4), dtype=np.float32)
+    plain, packed = cache_key(b"plain", "v1"), cache_key(b"packed", "v1")
+    store = LogitsStore(str(tmp_path))
+    store.put(packed, logits)
+    monkeypatch.setattr(logits_cache, "zstd", None)  # a writer without zstandard
+    store.put(plain, logits)
+    monkeypatch.undo()
+
+    assert np.array_equal(store.get(plain), logits) and np.array_equal(store.get(packed), logits)
+    meta = tmp_path / "meta" / f"{packed}.json"
+    meta.write_text(json.dumps({k: v for k, v in json.loads(meta.read_text()).items() if k != "compression"}))
+    assert np.array_equal(LogitsStore(str(tmp_path)).get(packed), logits)  # older entries
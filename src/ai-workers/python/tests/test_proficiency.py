@@ -0,0 +1,87 @@
+"""Tests for the per-child phoneme proficiency store"""
+import math
+
+from proficiency import batch_stats, derive_focus, segment_value
+
+
+def test_batch_stats_groups_by_phoneme():
+    segs = [{"p": "R", "conf": 0.2}, {"p": "R", "conf": 0.4}, {"p": "S", "conf": 0.9, "gop": math.log(0.5)}]
+    stats = batch_stats(segs)
+    n, mean, m2 = stats["R"]
+    assert n == 2 and math.isclose(mean, 0.3) and math.isclose(m2, 0.02)
+    assert math.isclose(stats["S"][1], 0.5)  # GOP wins over conf when present
+    assert segment_value({"p": "T", "conf": 0.7}) == 0.7
+
+
+def test_derive_focus_picks_weakest_with_enough_evidence():
+    stats = {"R": (5, 0.2, 0.0), "S": (5, 0.4, 0.0), "TH": (5, 0.3, 0.0), "K": (5, 0.9, 0.0), "L": (1, 0.0, 0.0)}
+    assert derive_focus(stats, size=3) == ["R", "TH", "S"]
+
+
+def test_derive_focus_hysteresis_prevents_flapping():
+    stats = {"R": (5, 0.20, 0.0), "TH": (5, 0.30, 0.0), "S": (5, 0.42, 0.0), "K": (5, 0.40, 0.0)}
+    # K just edged below S: the current focus keeps S (within the margin)
+    assert derive_focus(stats, current=["R", "TH", "S"], size=3, margin=0.05) == ["R", "TH", "S"]
+    # ...until S is clearly stronger than the cut-off
+    stats["S"] = (5, 0.60, 0.0)
+    assert derive_focus(stats, current=["R", "TH", "S"], size=3, margin=0.05) == ["R", "TH", "K"]
+
+
+def test_derive_focus_cold_start_uses_everything():
+    assert derive_focus({"R": (1, 0.5, 0.0)}, size=3) == ["R"]
+    assert derive_focus({}, current=["R", "S"]) == ["R", "S"]
+
+
+class FakeCursor:
+    """Answers the store's queries from `rows` (child_phoneme_stats) and `focus`."""
+
+    class connection:
+        encoding = "UTF8"
+
+    def __init__(self, rows, focus=None, rowcount=1):
+        self.rows, self.focus, self.rowcount = rows, focus, rowcount
+        self.sql = []
+
+    def mogrify(self, template, args):
+        return (template % tuple(repr(a) for a in args)).encode()
+
+    def execute(self, sql, params=None):
+        self.sql.append(sql.decode() if isinstance(sql, bytes) else sql)
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchone(self):
+        return (self.focus,) if self.focus is not None else None
+
+
+def test_observe_returns_full_stats_and_caches_only_on_remember():
+    from proficiency import ProficiencyStore
+    store = ProficiencyStore()
+    cur = FakeCursor([("R", 3.0, 0.4, 0.0)], focus="R")
+    store.observe(cur, "c1", [{"p": "S", "conf": 0.9}])
+    assert "union all" in cur.sql[-1]  # untouched phonemes come back with the upsert
+
+    cur.rows = [("S", 1.0, 0.9, 0.0), ("R", 5.0, 0.2, 0.0)]  # R was updated by another replica
+    entry = store.observe(cur, "c1", [{"p": "S", "conf": 0.9}])
+    assert entry["stats"] == {"S": (1.0, 0.9, 0.0), "R": (5.0, 0.2, 0.0)}
+    assert store._cache["c1"]["stats"] == {"R": (3.0, 0.4, 0.0)}  # not committed yet
+
+    store.remember("c1", entry)
+    assert store._cache["c1"] is entry
+
+
+def test_curriculum_write_is_conditional_on_the_focus_read(monkeypatch):
+    import main
+    from proficiency import ProficiencyStore
+    monkeypatch.setattr(main, "PROFICIENCY", ProficiencyStore())
+    segs = [{"p": "R", "conf": 0.2}, {"p": "S", "conf": 0.3}]
+    rows = [("R", 4.0, 0.2, 0.0), ("S", 4.0, 0.3, 0.0)]
+
+    cur = FakeCursor(rows, focus="K", rowcount=0)  # another replica changed the focus meanwhile
+    assert main.update_curriculum("", "c1", segs, 80, cur=cur) is None
+    assert cur.sql[-1].strip().endswith("= %s")
+
+    cur = FakeCursor(rows, focus="K", rowcount=1)
+    main.PROFICIENCY.forget("c1")
+    assert main.update_curriculum("", "c1", segs, 80, cur=cur)["focus"] == ["R", "S"]
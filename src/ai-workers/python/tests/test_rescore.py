@@ -0,0 +1,49 @@
+"""Tests for the offline re-scoring CLI"""
+import csv
+
+import numpy as np
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+sf = pytest.importorskip("soundfile")
+rescore = pytest.importorskip("rescore")
+
+
+def write_manifest(tmp_path, n):
+    path = tmp_path / "manifest.csv"
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["submissionId", "childId", "path"])
+        w.writeheader()
+        for i in range(n):
+            wav = tmp_path / f"clip{i}.wav"
+            sf.write(wav, (0.1 * np.sin(np.arange(16000) * (i + 1) / 50)).astype("float32"), 16000)
+            w.writerow({"submissionId": f"s{i}", "childId": "", "path": str(wav)})
+        w.writerow({"submissionId": "missing", "childId": "", "path": str(tmp_path / "nope.wav")})
+    return str(path)
+
+
+def test_rescore_writes_parquet_and_resumes(tmp_path):
+    manifest = write_manifest(tmp_path, 3)
+    out = str(tmp_path / "out")
+    assert rescore.run(manifest, out, workers=2, flush_every=2) == 4
+    rows = pq.read_table(out).to_pylist()
+    by_id = {r["submission_id"]: r for r in rows}
+    assert set(by_id) == {"s0", "s1", "s2", "missing"}
+    assert by_id["missing"]["error"] and by_id["s0"]["error"] is None
+    assert 0 <= by_id["s0"]["score"] <= 100
+    # second run picks up from the checkpointed parts
+    assert rescore.run(manifest, out, workers=2) == 0
+    assert rescore.run(manifest, out, workers=2, retry_errors=True) == 1
+
+
+def test_rescore_from_cached_logits(tmp_path, monkeypatch):
+    from logits_cache import LogitsStore
+    monkeypatch.setattr(rescore.worker, "LOGITS_STORE", LogitsStore(str(tmp_path / "cache")))
+    manifest = write_manifest(tmp_path, 2)
+    rescore.run(manifest, str(tmp_path / "first"), workers=1)
+    rescore.run(manifest, str(tmp_path / "second"), workers=1, from_logits=True)
+    first = {r["submission_id"]: r for r in pq.read_table(str(tmp_path / "first")).to_pylist()}
+    second = {r["submission_id"]: r for r in pq.read_table(str(tmp_path / "second")).to_pylist()}
+    for sid in ("s0", "s1"):
+        assert second[sid]["cached"] and not first[sid]["cached"]
+        assert second[sid]["emotion"] == first[sid]["emotion"]